@@ -1,9 +1,15 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import Profile, Vendor, Wishlist, EmailConfirmationToken, NewsletterSubscriber
+from .models import (
+    Profile, Vendor, Wishlist, EmailConfirmationToken, NewsletterSubscriber, OutboundEmail, NewsletterCampaign,
+)
+from django.utils import timezone
 from django.utils.html import format_html
 
+from . import campaigns, emails, outbox, vendors
+from .exports import ExportActionsMixin
+
 class CustomUserAdmin(UserAdmin):
     search_fields = ['username', 'first_name', 'last_name', 'email']
     ordering = ['username']
@@ -57,99 +63,24 @@ class VendorAdmin(admin.ModelAdmin):
         )
     approval_actions.short_description = 'Actions'
     
-    def approve_vendors(self, request, queryset):
-        from django.core.mail import EmailMultiAlternatives
-        from django.template.loader import render_to_string
-        from django.conf import settings
+    def _site_url(self, request):
         from django.contrib.sites.shortcuts import get_current_site
-        
-        count = 0
-        for vendor in queryset:
-            if not vendor.is_approved:
-                vendor.is_approved = True
-                vendor.save()
-                count += 1
-                
-                # Envoyer un email de confirmation
-                try:
-                    current_site = get_current_site(request)
-                    context = {
-                        'vendor': vendor,
-                        'shop_name': vendor.shop_name,
-                        'user': vendor.profile.user,
-                        'site_url': f"{'https' if request.is_secure() else 'http'}://{current_site.domain}",
-                    }
-                    
-                    html_message = render_to_string('email/vendor_approved.html', context)
-                    plain_message = render_to_string('email/vendor_approved_text.txt', context)
-                    
-                    subject = f'Votre demande de vendeur a été approuvée - {vendor.shop_name}'
-                    from_email = settings.DEFAULT_FROM_EMAIL
-                    to_email = vendor.profile.user.email
-                    
-                    email = EmailMultiAlternatives(
-                        subject=subject,
-                        body=plain_message,
-                        from_email=from_email,
-                        to=[to_email]
-                    )
-                    email.attach_alternative(html_message, "text/html")
-                    email.send(fail_silently=False)
-                    
-                except Exception as e:
-                    self.message_user(request, f"Erreur lors de l'envoi de l'email à {vendor.shop_name}: {str(e)}", level='ERROR')
-        
+        return f"{'https' if request.is_secure() else 'http'}://{get_current_site(request).domain}"
+    
+    def approve_vendors(self, request, queryset):
+        # Une requête UPDATE pour la sélection ; emails envoyés en arrière-plan (voir Hackerz/vendors.py)
+        count = vendors.approve(queryset, self._site_url(request))
         self.message_user(
             request,
-            f"{count} vendeur{'s' if count > 1 else ''} {'ont' if count > 1 else 'a'} été approuvé{'s' if count > 1 else ''} et notifié{'s' if count > 1 else ''} par email."
+            f"{count} vendeur{'s' if count > 1 else ''} {'ont' if count > 1 else 'a'} été approuvé{'s' if count > 1 else ''} ; les notifications sont en cours d'envoi."
         )
     approve_vendors.short_description = "Approuver les vendeurs sélectionnés"
     
     def reject_vendors(self, request, queryset):
-        from django.core.mail import EmailMultiAlternatives
-        from django.template.loader import render_to_string
-        from django.conf import settings
-        from django.contrib.sites.shortcuts import get_current_site
-        
-        count = 0
-        for vendor in queryset:
-            if vendor.is_approved:
-                vendor.is_approved = False
-                vendor.save()
-                count += 1
-                
-                # Envoyer un email de rejet
-                try:
-                    current_site = get_current_site(request)
-                    context = {
-                        'vendor': vendor,
-                        'shop_name': vendor.shop_name,
-                        'user': vendor.profile.user,
-                        'site_url': f"{'https' if request.is_secure() else 'http'}://{current_site.domain}",
-                    }
-                    
-                    html_message = render_to_string('email/vendor_rejected.html', context)
-                    plain_message = render_to_string('email/vendor_rejected_text.txt', context)
-                    
-                    subject = f'Mise à jour de votre demande de vendeur - {vendor.shop_name}'
-                    from_email = settings.DEFAULT_FROM_EMAIL
-                    to_email = vendor.profile.user.email
-                    
-                    email = EmailMultiAlternatives(
-                        subject=subject,
-                        body=plain_message,
-                        from_email=from_email,
-                        to=[to_email]
-                    )
-                    email.attach_alternative(html_message, "text/html")
-                    email.send(fail_silently=False)
-                    
-                except Exception as e:
-                    self.message_user(request, f"Erreur lors de l'envoi de l'email à {vendor.shop_name}: {str(e)}", level='ERROR')
-        
+        count = vendors.reject(queryset, self._site_url(request))
         self.message_user(
             request,
-            f"{count} vendeur{'s' if count > 1 else ''} {'a' if count == 1 else 'ont'} été rejeté{'s' if count > 1 else ''} et notifié{'s' if count > 1 else ''} par email."
+            f"{count} vendeur{'s' if count > 1 else ''} {'a' if count == 1 else 'ont'} été rejeté{'s' if count > 1 else ''} ; les notifications sont en cours d'envoi."
         )
     reject_vendors.short_description = "Rejeter les vendeurs sélectionnés"
     
@@ -168,44 +99,12 @@ class VendorAdmin(admin.ModelAdmin):
     def approve_vendor(self, request, vendor_id):
         from django.shortcuts import get_object_or_404, redirect
         from django.contrib import messages
-        from django.core.mail import EmailMultiAlternatives
-        from django.template.loader import render_to_string
-        from django.conf import settings
-        from django.contrib.sites.shortcuts import get_current_site
         
         vendor = get_object_or_404(Vendor, id=vendor_id)
-        vendor.is_approved = True
-        vendor.save()
-        
-        # Envoyer un email de confirmation
-        try:
-            current_site = get_current_site(request)
-            context = {
-                'vendor': vendor,
-                'shop_name': vendor.shop_name,
-                'user': vendor.profile.user,
-                'site_url': f"{'https' if request.is_secure() else 'http'}://{current_site.domain}",
-            }
-            
-            html_message = render_to_string('email/vendor_approved.html', context)
-            plain_message = render_to_string('email/vendor_approved_text.txt', context)
-            
-            subject = f'Votre demande de vendeur a été approuvée - {vendor.shop_name}'
-            from_email = settings.DEFAULT_FROM_EMAIL
-            to_email = vendor.profile.user.email
-            
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=plain_message,
-                from_email=from_email,
-                to=[to_email]
-            )
-            email.attach_alternative(html_message, "text/html")
-            email.send(fail_silently=False)
-            
-            messages.success(request, f"Le vendeur {vendor.shop_name} a été approuvé avec succès et notifié par email.")
-        except Exception as e:
-            messages.warning(request, f"Le vendeur {vendor.shop_name} a été approuvé mais l'email n'a pas pu être envoyé: {str(e)}")
+        if vendors.approve(Vendor.objects.filter(pk=vendor.pk), self._site_url(request)):
+            messages.success(request, f"Le vendeur {vendor.shop_name} a été approuvé avec succès ; il sera notifié par email.")
+        else:
+            messages.info(request, f"Le vendeur {vendor.shop_name} était déjà approuvé.")
         
         return redirect('admin:Hackerz_vendor_changelist')
 
@@ -222,13 +121,14 @@ class EmailConfirmationTokenAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['token', 'created']
 
-class NewsletterSubscriberAdmin(admin.ModelAdmin):
+class NewsletterSubscriberAdmin(ExportActionsMixin, admin.ModelAdmin):
     list_display = ['email', 'is_active', 'created', 'updated']
     list_filter = ['is_active', 'created', 'updated']
     search_fields = ['email']
     date_hierarchy = 'created'
     readonly_fields = ['created', 'updated']
-    actions = ['activate_subscribers', 'deactivate_subscribers', 'send_test_email']
+    actions = ['activate_subscribers', 'deactivate_subscribers', 'send_test_email', 'export_csv', 'export_jsonl']
+    export_name = 'subscribers'
     
     def activate_subscribers(self, request, queryset):
         queryset.update(is_active=True)
@@ -241,61 +141,66 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
     deactivate_subscribers.short_description = "Désactiver les abonnés sélectionnés"
     
     def send_test_email(self, request, queryset):
-        from django.core.mail import send_mail
-        from django.conf import settings
-        from django.utils.html import strip_tags
-        
-        subject = "Test de newsletter Hackerz"
-        html_message = """
-        <html>
-            <head>
-                <style>
-                    body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-                    .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-                    .header { text-align: center; padding: 20px 0; }
-                    .header h1 { color: #00ff41; margin: 0; }
-                    .content { padding: 20px 0; }
-                    .footer { text-align: center; font-size: 12px; color: #999; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>Hackerz Newsletter</h1>
-                    </div>
-                    <div class="content">
-                        <p>Bonjour,</p>
-                        <p>Ceci est un message de test de la newsletter Hackerz.</p>
-                        <p>Merci de vous être inscrit à notre newsletter.</p>
-                        <p>Cordialement,<br>L'équipe Hackerz</p>
-                    </div>
-                    <div class="footer">
-                        <p>&copy; 2025 Hackerz. Tous droits réservés.</p>
-                    </div>
-                </div>
-            </body>
-        </html>
-        """
+        email = emails.render('newsletter_test')
         
-        count = 0
-        for subscriber in queryset:
-            if subscriber.is_active:
-                try:
-                    send_mail(
-                        subject,
-                        strip_tags(html_message),
-                        settings.DEFAULT_FROM_EMAIL,
-                        [subscriber.email],
-                        html_message=html_message,
-                        fail_silently=False,
-                    )
-                    count += 1
-                except Exception as e:
-                    self.message_user(request, f"Erreur lors de l'envoi à {subscriber.email}: {str(e)}", level='ERROR')
-        
-        self.message_user(request, f"E-mail de test envoyé à {count} abonnés actifs.")
+        # Envoi en arrière-plan, par lots, sous forme d'une campagne limitée à la sélection
+        subscriber_ids = list(queryset.filter(is_active=True).values_list('pk', flat=True))
+        campaign = NewsletterCampaign.objects.create(
+            subject=email.subject,
+            body=email.text,
+            html_body=email.html,
+            subscriber_ids=subscriber_ids,
+        )
+        campaigns.start(campaign)
+        self.message_user(request, f"E-mail de test planifié pour {len(subscriber_ids)} abonnés actifs (campagne #{campaign.pk}).")
     send_test_email.short_description = "Envoyer un e-mail de test aux abonnés sélectionnés"
 
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'progress', 'throughput_display', 'failure_rate_display', 'started_at', 'finished_at']
+    list_filter = ['status', 'created']
+    search_fields = ['subject']
+    readonly_fields = [
+        'status', 'progress', 'throughput_display', 'failure_rate_display', 'last_error',
+        'started_at', 'finished_at', 'created', 'updated',
+    ]
+    actions = ['start_campaigns']
+    
+    def progress(self, obj):
+        return f"{obj.processed} / {obj.total}"
+    progress.short_description = 'Progression'
+    
+    def throughput_display(self, obj):
+        return f"{obj.throughput:.1f} emails/s"
+    throughput_display.short_description = 'Débit'
+    
+    def failure_rate_display(self, obj):
+        return f"{obj.failure_rate:.1%}"
+    failure_rate_display.short_description = "Taux d'échec"
+    
+    def start_campaigns(self, request, queryset):
+        started = sum(1 for campaign in queryset if campaigns.start(campaign))
+        self.message_user(request, f"{started} campagne(s) planifiée(s) (les campagnes interrompues reprennent où elles s'étaient arrêtées).")
+    start_campaigns.short_description = "Lancer ou reprendre l'envoi des campagnes sélectionnées"
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipients', 'status', 'attempts', 'send_after', 'sent_at']
+    list_filter = ['status', 'domain', 'created']
+    search_fields = ['subject', 'to', 'reference']
+    date_hierarchy = 'created'
+    readonly_fields = ['attempts', 'batch', 'locked_at', 'sent_at', 'last_error', 'created', 'updated']
+    actions = ['retry_emails']
+    
+    def recipients(self, obj):
+        return ', '.join(obj.to)
+    recipients.short_description = 'Destinataires'
+    
+    def retry_emails(self, request, queryset):
+        updated = queryset.filter(status='failed').update(status='pending', attempts=0, send_after=timezone.now())
+        if updated:
+            outbox.schedule()
+        self.message_user(request, f"{updated} email(s) remis en file d'envoi.")
+    retry_emails.short_description = "Renvoyer les emails en échec sélectionnés"
+
 # Réenregistrer le modèle User avec notre configuration personnalisée
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
@@ -303,4 +208,6 @@ admin.site.register(Profile, ProfileAdmin)
 admin.site.register(Vendor, VendorAdmin)
 admin.site.register(Wishlist, WishlistAdmin)
 admin.site.register(EmailConfirmationToken, EmailConfirmationTokenAdmin)
-admin.site.register(NewsletterSubscriber, NewsletterSubscriberAdmin) 
\ No newline at end of file
+admin.site.register(NewsletterSubscriber, NewsletterSubscriberAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
+admin.site.register(NewsletterCampaign, NewsletterCampaignAdmin)
@@ -6,4 +6,7 @@ class HackerzConfig(AppConfig):
     name = 'Hackerz'
 
     def ready(self):
-        import Hackerz.signals  # Importer les signaux au démarrage 
\ No newline at end of file
+        import Hackerz.signals  # Importer les signaux au démarrage 
+        import Hackerz.exports  # Enregistrer les exports
+        import Hackerz.campaigns  # Enregistrer les tâches d'arrière-plan
+        import Hackerz.outbox
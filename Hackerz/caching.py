@@ -0,0 +1,139 @@
+"""
+Cache applicatif partagé : clés par espace de noms et versionnées, calcul
+protégé contre les ruées (« cache stampede »).
+
+Chaque application a son espace de noms (shop, blog, api). Une clé est formée
+de l'espace de noms, de son numéro de version et des éléments fournis par
+l'appelant ; incrémenter la version (bump_version, branché sur les signaux
+des modèles concernés) invalide d'un coup toutes les entrées de l'espace.
+
+get_or_compute() ne laisse qu'un seul processus recalculer une entrée
+absente (verrou posé avec cache.add, les autres attendent le résultat) et
+recalcule par anticipation, avec une probabilité croissante à l'approche de
+l'expiration, les entrées coûteuses (algorithme XFetch) : l'entrée en place
+reste servie pendant le recalcul.
+
+Le backend est choisi dans settings.CACHES (variable d'environnement
+CACHE_BACKEND) ; le verrou n'est partagé entre processus qu'avec un backend
+partagé (fichier ou Redis).
+"""
+import hashlib
+import math
+import random
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+NAMESPACES = ('shop', 'blog', 'api')
+
+# Durée de vie par défaut d'une entrée (secondes)
+DEFAULT_TIMEOUT = 300
+# Durée maximale du verrou de calcul, au cas où le processus qui le tient meurt
+LOCK_TIMEOUT = 30
+# Attente maximale du résultat calculé par un autre processus
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+# Au-delà, les éléments de la clé sont remplacés par leur empreinte
+MAX_KEY_LENGTH = 200
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def get_version(namespace):
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Ne pas écraser une version posée entre-temps par un autre processus
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(namespace):
+    """Invalide toutes les entrées de l'espace de noms."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, timeout=None)
+
+
+def bump_on_commit(*namespaces):
+    """
+    Invalide les espaces de noms une fois la transaction validée : pour les
+    écritures faites par update(), qui n'envoient pas les signaux des modèles.
+    """
+    def bump():
+        for namespace in namespaces:
+            bump_version(namespace)
+    transaction.on_commit(bump)
+
+
+def invalidator(*namespaces):
+    """Récepteur de signal qui invalide les espaces de noms donnés."""
+    def receiver(**kwargs):
+        for namespace in namespaces:
+            bump_version(namespace)
+    return receiver
+
+
+def make_key(namespace, *parts):
+    suffix = ':'.join(str(part) for part in parts)
+    if len(suffix) > MAX_KEY_LENGTH or any(char.isspace() or ord(char) < 33 for char in suffix):
+        suffix = hashlib.md5(suffix.encode('utf-8')).hexdigest()
+    return f'{namespace}:{get_version(namespace)}:{suffix}'
+
+
+def _should_recompute(delta, expires_at, beta):
+    # XFetch : recalcul anticipé avec une probabilité qui croît à l'approche de
+    # l'expiration et avec le coût (delta) du calcul
+    if expires_at is None:
+        return False
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def get_or_compute(namespace, parts, compute, timeout=DEFAULT_TIMEOUT, beta=1.0):
+    """
+    Retourne la valeur en cache sous (namespace, *parts), ou la calcule avec
+    ``compute()`` et la met en cache pour ``timeout`` secondes.
+
+    ``beta`` règle l'anticipation du recalcul (0 la désactive).
+    """
+    if isinstance(parts, str):
+        parts = (parts,)
+    key = make_key(namespace, *parts)
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if not _should_recompute(delta, expires_at, beta):
+            return value
+        # Un seul processus recalcule ; les autres continuent de servir l'entrée
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            return value
+        locked = True
+    else:
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        # Un autre processus calcule déjà cette entrée : attendre son résultat
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # Calcul trop long ou processus mort : calculer sans attendre davantage
+
+    try:
+        start = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - start
+        expires_at = time.time() + timeout if timeout is not None else None
+        cache.set(key, (value, delta, expires_at), timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,242 @@
+"""
+Envoi des campagnes de newsletter.
+
+Une campagne est envoyée par une tâche d'arrière-plan (voir Hackerz/tasks.py),
+jamais dans la requête de l'admin. Les abonnés sont parcourus par lots de
+NEWSLETTER_CHUNK_SIZE dans l'ordre des clés primaires (pagination par clé :
+chaque lot est une requête ``pk > dernier traité``) ; chaque lot est envoyé
+sur une seule connexion SMTP.
+
+Après chaque lot, les résultats (CampaignDelivery) et le point de reprise
+(last_subscriber_id) sont enregistrés dans une même transaction : un envoi
+interrompu (serveur SMTP injoignable, processus arrêté) reprend au premier
+abonné non traité, lors de la nouvelle tentative de la tâche ou avec la
+commande ``send_campaign``. Seul un arrêt brutal du processus au milieu d'un
+lot peut faire renvoyer les emails de ce lot.
+
+Un envoi « réserve » la campagne par une requête UPDATE conditionnelle
+(statut -> 'sending') : une seule tâche ou commande l'envoie à la fois, et
+une campagne n'est planifiée qu'une fois tant que sa tâche n'est pas
+terminée. Une campagne restée « en cours d'envoi » sans nouveau lot depuis
+STALE_AFTER secondes (processus arrêté) peut de nouveau être réservée.
+
+Les quotas d'envoi par fournisseur (EMAIL_RATE_LIMITS, voir outbox.py) sont
+partagés avec la boîte d'envoi : un destinataire dont le domaine a atteint
+son quota est différé (CampaignDelivery « Différé ») sans bloquer les autres
+domaines. Les destinataires différés sont repris à la fin de la campagne ;
+s'ils sont tous encore au quota, la campagne repasse « Planifiée » et sa
+tâche est replanifiée après la fenêtre de quota.
+
+Un destinataire refusé par le serveur est compté en échec sans interrompre
+la campagne ; débit (emails/s) et taux d'échec sont calculés par le modèle.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import outbox
+from .models import BackgroundTask, CampaignDelivery, NewsletterCampaign, NewsletterSubscriber
+from .tasks import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'abonnés par lot (une connexion SMTP et un point de reprise par lot)
+CHUNK_SIZE = getattr(settings, 'NEWSLETTER_CHUNK_SIZE', 200)
+
+SEND_CAMPAIGN = 'newsletter.send_campaign'
+
+# Statuts à partir desquels un envoi peut réserver la campagne
+CLAIMABLE_STATUSES = ('draft', 'queued', 'failed')
+# Une campagne « en cours d'envoi » sans nouveau lot depuis plus longtemps est considérée comme interrompue
+STALE_AFTER = 600
+
+
+def recipients(campaign):
+    subscribers = NewsletterSubscriber.objects.filter(is_active=True)
+    if campaign.subscriber_ids is not None:
+        subscribers = subscribers.filter(pk__in=campaign.subscriber_ids)
+    return subscribers
+
+
+def start(campaign):
+    """
+    Planifie l'envoi de la campagne ; False si elle est déjà planifiée, en
+    cours ou envoyée, ou si sa tâche attend une nouvelle tentative.
+    """
+    reference = f'campaign:{campaign.pk}'
+    with transaction.atomic():
+        if BackgroundTask.objects.filter(name=SEND_CAMPAIGN, reference=reference, status__in=('pending', 'running')).exists():
+            return False
+        if not NewsletterCampaign.objects.filter(pk=campaign.pk, status__in=('draft', 'failed')).update(status='queued'):
+            return False
+        enqueue(SEND_CAMPAIGN, {'campaign_id': campaign.pk}, reference=reference)
+    campaign.status = 'queued'
+    return True
+
+
+@task(SEND_CAMPAIGN, max_attempts=10)
+def send_campaign(campaign_id):
+    campaign = run(NewsletterCampaign.objects.get(pk=campaign_id))
+    if campaign is None:
+        return {'skipped': True}
+    if campaign.status == 'queued':
+        # Destinataires différés encore au quota : reprise après la fenêtre
+        enqueue(SEND_CAMPAIGN, {'campaign_id': campaign.pk}, reference=f'campaign:{campaign.pk}', delay=outbox.RATE_WINDOW)
+        return {'sent': campaign.sent_count, 'failed': campaign.failed_count, 'throttled': True}
+    return {'sent': campaign.sent_count, 'failed': campaign.failed_count}
+
+
+def claim(campaign):
+    """Réserve la campagne pour l'envoi (statut 'sending') ; False si un autre envoi la détient ou si elle est envoyée."""
+    now = timezone.now()
+    claimable = Q(status__in=CLAIMABLE_STATUSES) | Q(status='sending', updated__lt=now - timedelta(seconds=STALE_AFTER))
+    return bool(NewsletterCampaign.objects.filter(claimable, pk=campaign.pk).update(status='sending', updated=now))
+
+
+def run(campaign, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Envoie la campagne à partir de son point de reprise ; ``progress(campaign)``
+    est appelé après chaque lot. Une erreur de connexion interrompt l'envoi
+    (statut « Interrompue ») après l'enregistrement du lot en cours.
+
+    Retourne la campagne, ou None si elle n'a pas pu être réservée (envoi en
+    cours ailleurs, ou campagne déjà envoyée). Si des destinataires différés
+    sont encore au quota de leur fournisseur, la campagne retournée est
+    « Planifiée » : l'envoi est à relancer plus tard.
+    """
+    if not claim(campaign):
+        return None
+    # Point de reprise et compteurs à jour, enregistrés par l'envoi précédent
+    campaign.refresh_from_db()
+    if campaign.started_at is None:
+        campaign.started_at = timezone.now()
+        campaign.total = recipients(campaign).count()
+        campaign.save(update_fields=['started_at', 'total', 'updated'])
+
+    subscribers = recipients(campaign).order_by('pk').values_list('pk', 'email')
+    try:
+        while True:
+            chunk = list(subscribers.filter(pk__gt=campaign.last_subscriber_id)[:chunk_size])
+            if not chunk:
+                break
+            deliveries = [
+                CampaignDelivery(campaign=campaign, subscriber_id=pk, email=email, domain=outbox.domain_of(email))
+                for pk, email in chunk
+            ]
+            _send(campaign, deliveries, _checkpoint)
+            _report(campaign, progress)
+
+        # Destinataires différés : repris tant que le quota de leur domaine le permet
+        deferred = CampaignDelivery.objects.filter(campaign=campaign, status='deferred')
+        while deferred.exists():
+            counts = outbox.sent_recently()
+            deliveries = list(deferred.exclude(domain__in=outbox.saturated_domains(counts)).order_by('pk')[:chunk_size])
+            if not deliveries:
+                NewsletterCampaign.objects.filter(pk=campaign.pk).update(status='queued', updated=timezone.now())
+                campaign.status = 'queued'
+                return campaign
+            _send(campaign, deliveries, _checkpoint_deferred)
+            _report(campaign, progress)
+    except Exception as exc:
+        NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+            status='failed', last_error=f'{type(exc).__name__}: {exc}', updated=timezone.now(),
+        )
+        campaign.status = 'failed'
+        raise
+
+    campaign.status = 'sent'
+    campaign.finished_at = timezone.now()
+    campaign.last_error = ''
+    campaign.save(update_fields=['status', 'finished_at', 'last_error', 'updated'])
+    return campaign
+
+
+def _build_message(campaign, email, connection):
+    message = EmailMultiAlternatives(
+        subject=campaign.subject,
+        body=campaign.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+        connection=connection,
+    )
+    if campaign.html_body:
+        message.attach_alternative(campaign.html_body, 'text/html')
+    return message
+
+
+def _report(campaign, progress):
+    logger.info(
+        "Campagne #%s : %s/%s traités, %.1f emails/s, %.1f %% d'échecs",
+        campaign.pk, campaign.processed, campaign.total, campaign.throughput, campaign.failure_rate * 100,
+    )
+    if progress is not None:
+        progress(campaign)
+
+
+def _send(campaign, deliveries, checkpoint):
+    """
+    Envoie la campagne aux destinataires (CampaignDelivery) sur une seule
+    connexion, en différant ceux dont le domaine a atteint son quota ;
+    ``checkpoint(campaign, deliveries)`` enregistre les destinataires traités,
+    même si le lot est interrompu.
+    """
+    counts = outbox.sent_recently()
+    done = []
+    connection = get_connection(fail_silently=False)
+    try:
+        with connection:
+            for delivery in deliveries:
+                if outbox.over_quota(delivery.domain, counts):
+                    delivery.status = 'deferred'
+                else:
+                    try:
+                        connection.send_messages([_build_message(campaign, delivery.email, connection)])
+                    except Exception as exc:
+                        if not outbox.is_permanent(exc):
+                            raise
+                        delivery.status = 'failed'
+                        delivery.error = f'{type(exc).__name__}: {exc}'
+                    else:
+                        delivery.status = 'sent'
+                        delivery.sent_at = timezone.now()
+                        counts[delivery.domain] += 1
+                done.append(delivery)
+    finally:
+        # Enregistrer ce qui a été envoyé, même si le lot est interrompu
+        if done:
+            checkpoint(campaign, done)
+
+
+def _count(campaign, deliveries):
+    """Ajoute les envois et échecs aux compteurs de la campagne (dans la transaction du lot)."""
+    sent = sum(1 for delivery in deliveries if delivery.status == 'sent')
+    failed = sum(1 for delivery in deliveries if delivery.status == 'failed')
+    NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+        last_subscriber_id=campaign.last_subscriber_id,
+        sent_count=F('sent_count') + sent,
+        failed_count=F('failed_count') + failed,
+        updated=timezone.now(),
+    )
+    campaign.sent_count += sent
+    campaign.failed_count += failed
+
+
+def _checkpoint(campaign, deliveries):
+    with transaction.atomic():
+        CampaignDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
+        campaign.last_subscriber_id = deliveries[-1].subscriber_id
+        _count(campaign, deliveries)
+
+
+def _checkpoint_deferred(campaign, deliveries):
+    handled = [delivery for delivery in deliveries if delivery.status != 'deferred']
+    if not handled:
+        return
+    with transaction.atomic():
+        CampaignDelivery.objects.bulk_update(handled, ['status', 'error', 'sent_at'])
+        _count(campaign, handled)
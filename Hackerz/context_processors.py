@@ -1,5 +1,7 @@
-from Hackerz_E_commerce.models import Category, Cart, CartItem
-from Hackerz_blog.models import Post
+from django.utils.functional import SimpleLazyObject
+
+from Hackerz_E_commerce.models import Cart
+from Hackerz import navigation, roles
 
 def global_context(request):
     """
@@ -19,18 +21,24 @@ def global_context(request):
     cart_items_count = 0
     cart_total = 0
     
+    # Le résumé du panier est maintenu sur la ligne Cart par les vues du panier
     if 'cart_id' in request.session:
-        try:
-            cart = Cart.objects.get(cart_id=request.session['cart_id'])
-            cart_items = CartItem.objects.filter(cart=cart, active=True)
-            cart_items_count = sum(item.quantity for item in cart_items)
-            cart_total = sum(item.sub_total() for item in cart_items)
-        except Cart.DoesNotExist:
-            pass
+        summary = Cart.objects.filter(
+            cart_id=request.session['cart_id']
+        ).values_list('item_count', 'total').first()
+        if summary:
+            cart_items_count, cart_total = summary
     
-    context['categories'] = Category.objects.all()
-    context['recent_posts'] = Post.objects.filter(status='published').order_by('-created')[:3]
+    # Données de navigation servies depuis le cache versionné
+    context['categories'] = navigation.shop_categories()
+    context['recent_posts'] = navigation.recent_posts()
     context['cart_items_count'] = cart_items_count
     context['cart_total'] = cart_total
     
+    # Rôles de l'utilisateur (roles.is_admin, roles.is_vendor, roles.is_client) :
+    # l'utilisateur et ses groupes ne sont chargés que si un gabarit les utilise,
+    # une fois par requête
+    if hasattr(request, 'user'):
+        context['roles'] = SimpleLazyObject(lambda: roles.get_roles(request.user))
+    
     return context 
\ No newline at end of file
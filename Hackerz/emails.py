@@ -0,0 +1,234 @@
+"""
+Emails transactionnels : gabarits compilés une fois par processus.
+
+Chaque email est déclaré dans EMAILS (objet, gabarit HTML, gabarit texte
+facultatif). À la première utilisation dans le processus, le gabarit HTML est
+préparé puis compilé :
+
+* les règles de ses blocs <style> sont appliquées aux balises (attribut
+  ``style``, comme l'exigent la plupart des clients de messagerie) ; les
+  balises et variables Django sont protégées pendant l'opération ;
+* sans gabarit texte, la version texte est dérivée du HTML à ce moment-là,
+  et non à chaque envoi.
+
+render() produit ensuite l'objet, le HTML et le texte avec un seul contexte :
+un envoi ne coûte que le rendu des gabarits compilés (les parties statiques
+sont déjà prêtes). Un gabarit modifié n'est relu qu'au redémarrage.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import cssselect2
+import lxml.html
+import tinycss2
+from django.template import Context, engines
+from django.template.loader import get_template
+
+from . import outbox
+
+
+@dataclass(frozen=True)
+class EmailTemplate:
+    subject: str
+    html: str
+    text: str = None
+
+
+EMAILS = {
+    'confirm_email': EmailTemplate(
+        subject='Confirmation de votre inscription sur Hackerz',
+        html='email/confirm_email.html',
+    ),
+    'two_factor_code': EmailTemplate(
+        subject='Code de vérification 2FA - Hackerz',
+        html='email/two_factor_code.html',
+        text='email/two_factor_code_text.txt',
+    ),
+    'newsletter_welcome': EmailTemplate(
+        subject="Confirmation d'inscription à la newsletter Hackerz",
+        html='email/newsletter_welcome.html',
+    ),
+    'newsletter_test': EmailTemplate(
+        subject='Test de newsletter Hackerz',
+        html='email/newsletter_test.html',
+    ),
+    'vendor_approved': EmailTemplate(
+        subject='Votre demande de vendeur a été approuvée - {{ shop_name }}',
+        html='email/vendor_approved.html',
+        text='email/vendor_approved_text.txt',
+    ),
+    'vendor_rejected': EmailTemplate(
+        subject='Mise à jour de votre demande de vendeur - {{ shop_name }}',
+        html='email/vendor_rejected.html',
+        text='email/vendor_rejected_text.txt',
+    ),
+    'order_confirmation': EmailTemplate(
+        subject='Confirmation de votre commande #{{ order.id }}',
+        html='email/order_confirmation.html',
+        text='email/order_confirmation_text.txt',
+    ),
+}
+
+
+class UnknownEmail(LookupError):
+    pass
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    text: str
+    html: str
+
+
+@dataclass(frozen=True)
+class CompiledEmail:
+    subject: object
+    html: object
+    text: object
+
+
+_TEMPLATE_TAG = re.compile(r'\{%.*?%\}|\{\{.*?\}\}|\{#.*?#\}', re.DOTALL)
+_PLACEHOLDER = re.compile(r'__DJ(\d+)__')
+_BLOCK_TAGS = {'p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr', 'li', 'ul', 'ol', 'table', 'br', 'hr'}
+
+
+def _protect(source):
+    """
+    Remplace les balises Django par des marqueurs neutres pour le parseur HTML :
+    commentaires entre les balises (la structure d'un tableau est préservée),
+    texte simple dans les attributs.
+    """
+    tags = []
+
+    def replace(match):
+        tags.append(match.group(0))
+        marker = f'__DJ{len(tags) - 1}__'
+        inside_tag = source.rfind('<', 0, match.start()) > source.rfind('>', 0, match.start())
+        return marker if inside_tag else f'<!--{marker}-->'
+
+    return _TEMPLATE_TAG.sub(replace, source), tags
+
+
+def _restore(markup, tags):
+    markup = re.sub(r'<!--(__DJ\d+__)-->', r'\1', markup)
+    return _PLACEHOLDER.sub(lambda match: tags[int(match.group(1))], markup)
+
+
+def _stylesheet_matcher(document):
+    matcher = cssselect2.Matcher()
+    for style in document.iter('style'):
+        rules = tinycss2.parse_stylesheet(style.text or '', skip_whitespace=True, skip_comments=True)
+        for rule in rules:
+            # Les règles @media, :hover et pseudo-éléments ne peuvent pas être
+            # appliqués en ligne : elles restent dans le bloc <style>
+            if rule.type != 'qualified-rule' or ':' in tinycss2.serialize(rule.prelude):
+                continue
+            declarations = [
+                (declaration.name, tinycss2.serialize(declaration.value).strip(), declaration.important)
+                for declaration in tinycss2.parse_declaration_list(rule.content, skip_whitespace=True, skip_comments=True)
+                if declaration.type == 'declaration'
+            ]
+            try:
+                selectors = cssselect2.compile_selector_list(rule.prelude)
+            except cssselect2.SelectorError:
+                continue
+            for selector in selectors:
+                matcher.add_selector(selector, declarations)
+    return matcher
+
+
+def inline_css(source):
+    """Applique les règles des blocs <style> de ``source`` (gabarit HTML) aux balises."""
+    protected, tags = _protect(source)
+    document = lxml.html.document_fromstring(protected)
+    matcher = _stylesheet_matcher(document)
+    for wrapper in cssselect2.ElementWrapper.from_html_root(document).iter_subtree():
+        matches = matcher.match(wrapper)
+        if not matches:
+            continue
+        styles = {}
+        important = set()
+        # Spécificité puis ordre d'apparition ; !important l'emporte
+        for _specificity, _order, _pseudo, declarations in sorted(matches, key=lambda match: match[:2]):
+            for name, value, is_important in declarations:
+                if name in important and not is_important:
+                    continue
+                styles[name] = value
+                if is_important:
+                    important.add(name)
+        element = wrapper.etree_element
+        for declaration in (element.get('style') or '').split(';'):
+            name, _, value = declaration.partition(':')
+            if name.strip() and name.strip() not in important:
+                styles[name.strip()] = value.strip()
+        element.set('style', '; '.join(f'{name}: {value}' for name, value in styles.items()))
+    doctype = '<!DOCTYPE html>\n' if source.lstrip().lower().startswith('<!doctype') else ''
+    return doctype + _restore(lxml.html.tostring(document, encoding='unicode'), tags)
+
+
+def html_to_text(source):
+    """Version texte d'un gabarit HTML (balises Django conservées), sans <head>."""
+    protected, tags = _protect(source)
+    document = lxml.html.document_fromstring(protected)
+    body = document.find('body')
+    parts = []
+
+    def walk(element):
+        if isinstance(element, lxml.html.HtmlComment):
+            # Balise Django protégée (les vrais commentaires sont omis)
+            if _PLACEHOLDER.fullmatch(element.text or ''):
+                parts.append(element.text)
+        elif element.tag in _BLOCK_TAGS:
+            parts.append('\n')
+        if isinstance(element.tag, str):
+            parts.append(element.text or '')
+            for child in element:
+                walk(child)
+            if element.tag == 'a' and element.get('href'):
+                parts.append(f" ({element.get('href')})")
+            if element.tag in _BLOCK_TAGS:
+                parts.append('\n')
+        parts.append(element.tail or '')
+
+    walk(body if body is not None else document)
+    lines = (' '.join(line.split()) for line in ''.join(parts).splitlines())
+    text = re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip() + '\n'
+    return _restore(text, tags)
+
+
+@lru_cache(maxsize=None)
+def compiled(name):
+    try:
+        spec = EMAILS[name]
+    except KeyError:
+        raise UnknownEmail(name) from None
+    engine = engines['django'].engine
+    html_source = get_template(spec.html).template.source
+    text_source = get_template(spec.text).template.source if spec.text else html_to_text(html_source)
+    return CompiledEmail(
+        subject=engine.from_string(spec.subject),
+        html=engine.from_string(inline_css(html_source)),
+        text=engine.from_string(text_source),
+    )
+
+
+def render(name, context=None):
+    """Objet, texte et HTML de l'email ``name`` avec un seul contexte."""
+    templates = compiled(name)
+    context = Context(context or {})
+    html = templates.html.render(context)
+    # Texte et objet ne sont pas du HTML : pas d'échappement
+    context.autoescape = False
+    return RenderedEmail(
+        subject=' '.join(templates.subject.render(context).split()),
+        text=templates.text.render(context),
+        html=html,
+    )
+
+
+def enqueue(name, to, context=None, **kwargs):
+    """Rend l'email ``name`` et le met dans la boîte d'envoi (voir outbox.enqueue)."""
+    email = render(name, context)
+    return outbox.enqueue(email.subject, email.text, to, html_body=email.html, **kwargs)
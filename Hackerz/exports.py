@@ -0,0 +1,196 @@
+"""
+Exports CSV / JSON Lines en flux continu (admin et commande ``export_data``).
+
+Chaque export est enregistré avec le décorateur ``exporter`` : ses colonnes
+et une fonction qui, à partir d'un queryset, produit une ligne (tuple) par
+enregistrement en le parcourant avec ``iterator(chunk_size=CHUNK_SIZE)``.
+Les lignes sont converties et envoyées au fur et à mesure
+(StreamingHttpResponse ou fichier) : la mémoire utilisée ne dépend pas du
+nombre d'enregistrements exportés.
+
+Les exports de la boutique sont dans Hackerz_E_commerce/exports.py.
+"""
+import csv
+import json
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import BooleanField
+from django.db.models.constants import LOOKUP_SEP
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import NewsletterSubscriber
+
+# Nombre d'enregistrements lus par requête
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Valeurs booléennes acceptées par les filtres (insensibles à la casse)
+_BOOLEANS = {'true': True, 'false': False, '1': True, '0': False}
+# Lookups dont la valeur est du type du champ (les autres, year, contains..., sont passés tels quels)
+_TYPED_LOOKUPS = (None, 'exact', 'gt', 'gte', 'lt', 'lte')
+
+# Un tableur interprète une cellule commençant par l'un de ces caractères comme une formule
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class UnknownExport(LookupError):
+    pass
+
+
+@dataclass
+class ExportSpec:
+    name: str
+    model: object
+    columns: tuple
+    rows: object
+    date_field: str
+
+    def queryset(self):
+        return self.model._default_manager.all()
+
+
+_registry = {}
+
+
+def exporter(name, model, columns, date_field='created'):
+    """Décorateur enregistrant la fonction ``rows(queryset)`` d'un export."""
+    def decorator(func):
+        _registry[name] = ExportSpec(name, model, tuple(columns), func, date_field)
+        return func
+    return decorator
+
+
+def get_export(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownExport(name) from None
+
+
+def export_names():
+    return sorted(_registry)
+
+
+def _to_boolean(value):
+    try:
+        return _BOOLEANS[value.lower()]
+    except KeyError:
+        raise ValidationError(f"« {value} » n'est pas un booléen (true ou false)") from None
+
+
+def _filter_value(model, lookup, value):
+    """Convertit la valeur texte d'un filtre avec le champ visé par ``lookup`` (``to_python``)."""
+    field, lookup_name = None, None
+    opts = model._meta
+    for part in lookup.split(LOOKUP_SEP):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            lookup_name = part
+            break
+        if field.related_model is not None:
+            opts = field.related_model._meta
+    if field is None or not isinstance(value, str):
+        # Champ inconnu : filter() lèvera FieldError
+        return value
+    if lookup_name == 'isnull':
+        return _to_boolean(value)
+    if lookup_name == 'in':
+        return [_filter_value(model, lookup.rpartition(LOOKUP_SEP)[0], item) for item in value.split(',')]
+    if lookup_name not in _TYPED_LOOKUPS:
+        return value
+    if isinstance(field, BooleanField):
+        return _to_boolean(value)
+    return field.to_python(value)
+
+
+def filter_queryset(spec, queryset, since=None, until=None, filters=None):
+    """
+    Restreint le queryset à la période [since, until] (dates incluses, fuseau
+    du site) et aux filtres ``{lookup: valeur}``, dont les valeurs texte sont
+    converties par le champ visé (true/false pour un booléen).
+    """
+    if since is not None:
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        queryset = queryset.filter(**{f'{spec.date_field}__gte': start})
+    if until is not None:
+        end = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min))
+        queryset = queryset.filter(**{f'{spec.date_field}__lt': end})
+    if filters:
+        queryset = queryset.filter(**{
+            lookup: _filter_value(spec.model, lookup, value) for lookup, value in filters.items()
+        })
+    return queryset
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer retourne la ligne au lieu de la stocker."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _json_value(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def stream(spec, queryset, fmt='csv'):
+    """Générateur des lignes de l'export (chaînes), en-tête compris pour le CSV."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(spec.columns)
+        for row in spec.rows(queryset):
+            yield writer.writerow([_csv_value(value) for value in row])
+    else:
+        for row in spec.rows(queryset):
+            yield json.dumps(dict(zip(spec.columns, row)), default=_json_value, ensure_ascii=False) + '\n'
+
+
+def streaming_response(spec, queryset, fmt='csv'):
+    filename = f"{spec.name}-{timezone.localdate():%Y%m%d}.{fmt}"
+    response = StreamingHttpResponse(stream(spec, queryset, fmt), content_type=f'{FORMATS[fmt]}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class ExportActionsMixin:
+    """
+    Actions d'admin « Exporter en CSV / JSON Lines » sur la sélection (ou tous
+    les résultats filtrés). Le ModelAdmin définit ``export_name`` et ajoute
+    'export_csv' et 'export_jsonl' à ses ``actions``.
+    """
+    export_name = None
+
+    def export_csv(self, request, queryset):
+        return streaming_response(get_export(self.export_name), queryset, 'csv')
+    export_csv.short_description = "Exporter la sélection en CSV"
+
+    def export_jsonl(self, request, queryset):
+        return streaming_response(get_export(self.export_name), queryset, 'jsonl')
+    export_jsonl.short_description = "Exporter la sélection en JSON Lines"
+
+
+@exporter('subscribers', NewsletterSubscriber, columns=('email', 'is_active', 'created', 'updated'))
+def subscriber_rows(subscribers):
+    return subscribers.values_list('email', 'is_active', 'created', 'updated').iterator(chunk_size=CHUNK_SIZE)
@@ -0,0 +1,97 @@
+"""
+Journalisation structurée du projet.
+
+Chaque module utilise son propre logger (``logging.getLogger(__name__)``) et
+passe ses valeurs en arguments (``logger.debug("Panier %s", cart_id)``) : le
+message n'est formaté que si l'enregistrement est émis, un appel sous le
+niveau configuré ne coûte qu'une comparaison d'entiers.
+
+Ce module fournit les éléments branchés dans settings.LOGGING et MIDDLEWARE :
+
+* RequestIdMiddleware : identifiant de corrélation de la requête (repris de
+  l'en-tête X-Request-ID ou généré), renvoyé dans la réponse ;
+* RequestIdFilter : ajoute cet identifiant (``request_id``) à chaque
+  enregistrement émis pendant la requête (« - » en dehors d'une requête) ;
+* SamplingFilter : ne garde qu'une fraction des enregistrements sous WARNING ;
+* JsonFormatter : une ligne JSON par enregistrement, avec les champs passés
+  dans ``extra``.
+
+Niveaux : LOG_LEVEL (INFO par défaut) et LOG_LEVELS, liste de
+``module=NIVEAU`` séparés par des virgules pour activer le DEBUG d'un module.
+"""
+import contextvars
+import json
+import logging
+import random
+import re
+import uuid
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+request_id = contextvars.ContextVar('request_id', default='-')
+
+# Attributs standard d'un LogRecord : tout le reste vient de ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+
+class RequestIdMiddleware:
+    """Associe un identifiant de corrélation à la requête et à ses logs."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        # Identifiant du proxy s'il est sûr (pas d'injection dans les logs), sinon un nouveau
+        value = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        request.request_id = value
+        token = request_id.set(value)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response[REQUEST_ID_HEADER] = value
+        return response
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Garde une fraction ``rate`` des enregistrements de niveau inférieur à WARNING."""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def module_levels(spec):
+    """Convertit ``"Hackerz_blog=DEBUG,Hackerz.tasks=WARNING"`` en configuration de loggers."""
+    loggers = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        if name and level:
+            loggers[name.strip()] = {'level': level.strip().upper()}
+    return loggers
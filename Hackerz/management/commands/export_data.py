@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.core.exceptions import FieldError, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from Hackerz import exports
+
+
+def _lookup(value):
+    field, sep, expected = value.partition('=')
+    if not sep or not field:
+        raise ValueError(value)
+    return field, expected
+
+
+class Command(BaseCommand):
+    help = "Exporte des données (commandes, produits, abonnés) en CSV ou JSON Lines, en flux continu"
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=exports.export_names(), help="Données à exporter")
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--since', type=date.fromisoformat, help="Date de début incluse (AAAA-MM-JJ)")
+        parser.add_argument('--until', type=date.fromisoformat, help="Date de fin incluse (AAAA-MM-JJ)")
+        parser.add_argument(
+            '--filter', dest='filters', action='append', type=_lookup, default=[], metavar='CHAMP=VALEUR',
+            help="Filtre supplémentaire (répétable), ex. --filter status=shipped --filter paid=true",
+        )
+        parser.add_argument('--output', '-o', help="Fichier de destination (sortie standard par défaut)")
+
+    def handle(self, *args, **options):
+        spec = exports.get_export(options['export'])
+        try:
+            queryset = exports.filter_queryset(
+                spec, spec.queryset(), options['since'], options['until'], dict(options['filters']),
+            )
+        except (FieldError, ValidationError, ValueError) as e:
+            raise CommandError(f"Filtre invalide : {e}") from e
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                for line in exports.stream(spec, queryset, options['format']):
+                    output.write(line)
+            self.stderr.write(self.style.SUCCESS(f"Export « {spec.name} » écrit dans {options['output']}."))
+        else:
+            for line in exports.stream(spec, queryset, options['format']):
+                self.stdout.write(line, ending='')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from Hackerz_E_commerce.models import Product
+from Hackerz_blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Pré-calcule le rendu HTML des descriptions de produits et des articles du blog"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Refaire le rendu même si le contenu est inchangé')
+        parser.add_argument('--batch-size', type=int, default=200, help='Nombre de lignes mises à jour par requête')
+
+    def handle(self, *args, **options):
+        targets = [
+            (Product, 'description', 'render_description', ['description_html', 'description_hash']),
+            (Post, 'content', 'render_content', ['content_html', 'content_hash']),
+        ]
+        for model, source, render, fields in targets:
+            rendered = self.prewarm(model, source, render, fields, options['force'], options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.verbose_name_plural} : {rendered} rendu(s) mis à jour."))
+
+    def prewarm(self, model, source, render, fields, force, batch_size):
+        rendered = 0
+        batch = []
+        for obj in model.objects.only('pk', source, *fields).iterator(chunk_size=batch_size):
+            if force:
+                setattr(obj, fields[1], '')
+            if getattr(obj, render)():
+                batch.append(obj)
+            if len(batch) >= batch_size:
+                rendered += len(batch)
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            rendered += len(batch)
+            model.objects.bulk_update(batch, fields)
+        return rendered
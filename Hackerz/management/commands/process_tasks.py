@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from Hackerz import tasks
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches d'arrière-plan en attente (factures, emails de confirmation...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Traiter les tâches dues puis quitter')
+        parser.add_argument('--sleep', type=float, default=2.0, help="Pause entre deux passes quand la file est vide (secondes)")
+        parser.add_argument('--limit', type=int, default=50, help='Nombre maximum de tâches par passe')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = tasks.run_pending(options['limit'])
+            self.stdout.write(self.style.SUCCESS(f"{processed} tâche(s) traitée(s)."))
+            return
+
+        self.stdout.write("File de tâches démarrée (Ctrl+C pour arrêter).")
+        try:
+            while True:
+                close_old_connections()
+                processed = tasks.run_pending(options['limit'])
+                if processed:
+                    self.stdout.write(f"{processed} tâche(s) traitée(s).")
+                else:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("File de tâches arrêtée.")
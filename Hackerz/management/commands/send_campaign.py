@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Hackerz import campaigns, outbox
+from Hackerz.models import NewsletterCampaign
+
+
+class Command(BaseCommand):
+    help = "Envoie (ou reprend) une campagne de newsletter au premier plan, en affichant sa progression"
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_id', type=int)
+        parser.add_argument('--chunk-size', type=int, default=campaigns.CHUNK_SIZE, help='Abonnés par lot')
+
+    def handle(self, *args, **options):
+        try:
+            campaign = NewsletterCampaign.objects.get(pk=options['campaign_id'])
+        except NewsletterCampaign.DoesNotExist:
+            raise CommandError(f"Campagne #{options['campaign_id']} introuvable.")
+        if campaign.status == 'sent':
+            self.stdout.write(f"La campagne #{campaign.pk} a déjà été envoyée.")
+            return
+
+        def progress(campaign):
+            self.stdout.write(
+                f"{campaign.processed}/{campaign.total} traités - {campaign.throughput:.1f} emails/s - "
+                f"{campaign.failure_rate:.1%} d'échecs"
+            )
+
+        while True:
+            try:
+                result = campaigns.run(campaign, options['chunk_size'], progress)
+            except Exception as e:
+                raise CommandError(f"Envoi interrompu après {campaign.processed} email(s) : {e}") from e
+            if result is None:
+                raise CommandError(f"La campagne #{campaign.pk} est déjà en cours d'envoi ou a été envoyée.")
+            campaign = result
+            if campaign.status != 'queued':
+                break
+            # Destinataires différés : quota du fournisseur atteint
+            self.stdout.write(f"Quota d'envoi atteint, reprise dans {outbox.RATE_WINDOW} s...")
+            time.sleep(outbox.RATE_WINDOW)
+        self.stdout.write(self.style.SUCCESS(
+            f"Campagne envoyée : {campaign.sent_count} envoyé(s), {campaign.failed_count} échec(s), "
+            f"{campaign.throughput:.1f} emails/s."
+        ))
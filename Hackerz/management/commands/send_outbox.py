@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from Hackerz import outbox
+
+
+class Command(BaseCommand):
+    help = "Remet les emails de la boîte d'envoi par lots, sur une connexion SMTP par lot"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Remettre les emails dus puis quitter')
+        parser.add_argument('--sleep', type=float, default=5.0, help="Pause entre deux passes quand rien n'est dû (secondes)")
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE, help='Nombre d\'emails par connexion SMTP')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = outbox.deliver_pending(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"{processed} email(s) traité(s)."))
+            return
+
+        self.stdout.write("Boîte d'envoi démarrée (Ctrl+C pour arrêter).")
+        try:
+            while True:
+                close_old_connections()
+                processed = outbox.deliver_pending(options['batch_size'])
+                if processed:
+                    self.stdout.write(f"{processed} email(s) traité(s).")
+                else:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("Boîte d'envoi arrêtée.")
@@ -0,0 +1,59 @@
+"""
+Rendu Markdown partagé par les produits et les articles du blog.
+
+La construction d'une instance ``markdown.Markdown`` (chargement des
+extensions, de Pygments pour codehilite...) est coûteuse : une instance est
+gardée par thread et réinitialisée entre deux conversions. Le HTML produit est
+stocké sur les modèles avec l'empreinte du texte source, afin de ne refaire le
+rendu que lorsque le contenu change.
+"""
+import hashlib
+import re
+import threading
+
+import markdown
+
+# À incrémenter quand le rendu change, pour invalider le HTML déjà stocké
+RENDERER_VERSION = '1'
+
+EXTENSIONS = [
+    'markdown.extensions.fenced_code',  # Pour les blocs de code avec ```
+    'markdown.extensions.codehilite',   # Pour la coloration syntaxique
+    'markdown.extensions.tables',       # Pour les tableaux
+    'markdown.extensions.nl2br',        # Convertir les retours à la ligne en <br>
+    'markdown.extensions.extra',        # Fonctionnalités supplémentaires
+]
+
+_CODE_BLOCK_RE = re.compile(r'<pre><code>(.*?)</code></pre>', re.DOTALL)
+_UL_RE = re.compile(r'<ul>\s*<li>')
+_OL_RE = re.compile(r'<ol>\s*<li>')
+
+_local = threading.local()
+
+
+def _get_markdown():
+    md = getattr(_local, 'md', None)
+    if md is None:
+        md = _local.md = markdown.Markdown(extensions=EXTENSIONS)
+    return md
+
+
+def content_hash(text):
+    """Empreinte du texte source (et de la version du rendu)."""
+    return hashlib.sha256(f'{RENDERER_VERSION}:{text or ""}'.encode('utf-8')).hexdigest()
+
+
+def to_html(content):
+    """Convertit du Markdown en HTML avec l'instance du thread courant."""
+    md = _get_markdown()
+    try:
+        return md.convert(content)
+    finally:
+        md.reset()
+
+
+def style_html(html):
+    """Ajoute les classes CSS du site aux blocs de code et aux listes."""
+    html = _CODE_BLOCK_RE.sub(r'<pre class="code-block"><code>\1</code></pre>', html)
+    html = _UL_RE.sub('<ul class="styled-list">\n<li>', html)
+    return _OL_RE.sub('<ol class="styled-list">\n<li>', html)
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hackerz', '0005_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Objet')),
+                ('body', models.TextField(verbose_name='Texte')),
+                ('html_body', models.TextField(blank=True, verbose_name='HTML')),
+                ('subscriber_ids', models.JSONField(blank=True, editable=False, null=True)),
+                ('status', models.CharField(choices=[('draft', 'Brouillon'), ('queued', 'Planifiée'), ('sending', "En cours d'envoi"), ('sent', 'Envoyée'), ('failed', 'Interrompue')], default='draft', max_length=10)),
+                ('last_subscriber_id', models.PositiveBigIntegerField(default=0, editable=False)),
+                ('total', models.PositiveIntegerField(default=0, editable=False)),
+                ('sent_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('failed_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('last_error', models.TextField(blank=True, editable=False)),
+                ('started_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Campagne de newsletter',
+                'verbose_name_plural': 'Campagnes de newsletter',
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('sent', 'Envoyé'), ('failed', 'Échoué')], max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='Hackerz.newslettersubscriber')),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='Hackerz.newslettercampaign')),
+            ],
+            options={
+                'verbose_name': 'Envoi de campagne',
+                'verbose_name_plural': 'Envois de campagne',
+                'indexes': [models.Index(fields=['campaign', 'status'], name='newsletter_delivery_status_idx')],
+                'unique_together': {('campaign', 'subscriber')},
+            },
+        ),
+    ]
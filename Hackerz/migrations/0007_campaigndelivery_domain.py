@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hackerz', '0006_newsletter_campaigns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaigndelivery',
+            name='domain',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='campaigndelivery',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='campaigndelivery',
+            name='status',
+            field=models.CharField(choices=[('sent', 'Envoyé'), ('failed', 'Échoué'), ('deferred', 'Différé')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='campaigndelivery',
+            index=models.Index(fields=['domain', 'sent_at'], name='newsletter_delivery_sent_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+"""
+Mixins communs aux modèles.
+
+CounterFieldsMixin protège les champs dénormalisés (compteurs, notes, état
+des statistiques) tenus à jour par des requêtes UPDATE atomiques : un save()
+complet d'une instance chargée avant ces UPDATE réécrirait leurs anciennes
+valeurs. L'UPDATE d'un save() complet omet donc les champs COUNTER_FIELDS.
+
+Si la ligne a été supprimée entre-temps, cet UPDATE ne touche aucune ligne
+et Django insère l'instance (tous ses champs), comme pour un save() ordinaire.
+Un save(update_fields=...) explicite n'est pas modifié.
+"""
+
+
+class CounterFieldsMixin:
+    # Champs modifiés uniquement par requête UPDATE, jamais réécrits par save()
+    COUNTER_FIELDS = ()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if update_fields is None:
+            values = [value for value in values if value[0].name not in self.COUNTER_FIELDS]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
@@ -91,4 +91,167 @@ class NewsletterSubscriber(models.Model):
     
     class Meta:
         verbose_name = "Abonné à la newsletter"
-        verbose_name_plural = "Abonnés à la newsletter" 
\ No newline at end of file
+        verbose_name_plural = "Abonnés à la newsletter" 
+
+class BackgroundTask(models.Model):
+    """Tâche exécutée en arrière-plan par la file locale (voir Hackerz/tasks.py)."""
+    STATUS_CHOICES = (
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminée'),
+        ('failed', 'Échouée'),
+    )
+    
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    # Objet concerné (ex. « order:42 »), pour retrouver les tâches d'une commande
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ('run_after', 'id')
+        indexes = [models.Index(fields=['status', 'run_after'])]
+        verbose_name = "Tâche d'arrière-plan"
+        verbose_name_plural = "Tâches d'arrière-plan"
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+
+class OutboundEmail(models.Model):
+    """Email de la boîte d'envoi, remis par lots (voir Hackerz/outbox.py)."""
+    STATUS_CHOICES = (
+        ('pending', 'En attente'),
+        ('sending', "En cours d'envoi"),
+        ('sent', 'Envoyé'),
+        ('failed', 'Échoué'),
+    )
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    # Pièces jointes lues dans default_storage à l'envoi : [{"path", "filename", "mimetype"}]
+    attachments = models.JSONField(default=list, blank=True)
+    # Domaine du destinataire, pour les quotas d'envoi par fournisseur
+    domain = models.CharField(max_length=100, blank=True)
+    # Objet concerné (ex. « order:42 »)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    send_after = models.DateTimeField(default=timezone.now)
+    # Lot d'envoi qui a réservé l'email
+    batch = models.CharField(max_length=32, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ('send_after', 'id')
+        indexes = [
+            # Emails dus (remise par lots)
+            models.Index(fields=['status', 'send_after'], name='outbox_status_due_idx'),
+            # Envois récents par fournisseur (quotas)
+            models.Index(fields=['domain', 'sent_at'], name='outbox_domain_sent_idx'),
+        ]
+        verbose_name = 'Email sortant'
+        verbose_name_plural = 'Emails sortants'
+    
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.get_status_display()})"
+
+
+class NewsletterCampaign(models.Model):
+    """Envoi d'une newsletter aux abonnés actifs, par lots et avec reprise (voir Hackerz/campaigns.py)."""
+    STATUS_CHOICES = (
+        ('draft', 'Brouillon'),
+        ('queued', 'Planifiée'),
+        ('sending', "En cours d'envoi"),
+        ('sent', 'Envoyée'),
+        ('failed', 'Interrompue'),
+    )
+    
+    subject = models.CharField(max_length=255, verbose_name='Objet')
+    body = models.TextField(verbose_name='Texte')
+    html_body = models.TextField(blank=True, verbose_name='HTML')
+    # Abonnés ciblés (clés primaires) ; vide : tous les abonnés actifs
+    subscriber_ids = models.JSONField(null=True, blank=True, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
+    # Point de reprise : dernier abonné traité, dans l'ordre des clés primaires
+    last_subscriber_id = models.PositiveBigIntegerField(default=0, editable=False)
+    total = models.PositiveIntegerField(default=0, editable=False)
+    sent_count = models.PositiveIntegerField(default=0, editable=False)
+    failed_count = models.PositiveIntegerField(default=0, editable=False)
+    last_error = models.TextField(blank=True, editable=False)
+    started_at = models.DateTimeField(null=True, blank=True, editable=False)
+    finished_at = models.DateTimeField(null=True, blank=True, editable=False)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Campagne de newsletter'
+        verbose_name_plural = 'Campagnes de newsletter'
+    
+    def __str__(self):
+        return self.subject
+    
+    @property
+    def processed(self):
+        return self.sent_count + self.failed_count
+    
+    @property
+    def throughput(self):
+        """Emails traités par seconde depuis le début de l'envoi."""
+        if self.started_at is None:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return self.processed / elapsed if elapsed > 0 else 0.0
+    
+    @property
+    def failure_rate(self):
+        return self.failed_count / self.processed if self.processed else 0.0
+
+
+class CampaignDelivery(models.Model):
+    """Résultat de l'envoi d'une campagne à un abonné."""
+    STATUS_CHOICES = (
+        ('sent', 'Envoyé'),
+        ('failed', 'Échoué'),
+        ('deferred', 'Différé'),
+    )
+    
+    campaign = models.ForeignKey(NewsletterCampaign, on_delete=models.CASCADE, related_name='deliveries')
+    subscriber = models.ForeignKey(NewsletterSubscriber, on_delete=models.CASCADE, related_name='deliveries')
+    email = models.EmailField()
+    # Domaine du destinataire, pour les quotas d'envoi par fournisseur (voir outbox.py)
+    domain = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('campaign', 'subscriber')
+        indexes = [
+            models.Index(fields=['campaign', 'status'], name='newsletter_delivery_status_idx'),
+            models.Index(fields=['domain', 'sent_at'], name='newsletter_delivery_sent_idx'),
+        ]
+        verbose_name = 'Envoi de campagne'
+        verbose_name_plural = 'Envois de campagne'
+    
+    def __str__(self):
+        return f"{self.campaign} → {self.email} ({self.get_status_display()})"
@@ -0,0 +1,76 @@
+"""
+Cache des données de navigation communes à toutes les pages.
+
+Catégories de la boutique, catégories et tags du blog et articles récents sont
+chargés une seule fois par processus puis servis depuis la mémoire. Ils sont
+invalidés grâce au numéro de version de l'espace de noms « navigation » du
+cache applicatif (voir caching.py), incrémenté par les signaux de sauvegarde
+et de suppression (voir signals.py), ce qui invalide aussi les autres
+processus quand le cache est partagé.
+"""
+import threading
+
+from Hackerz import caching
+
+NAMESPACE = 'navigation'
+
+# Nombre d'articles récents affichés dans les barres latérales et l'accueil
+RECENT_POSTS_COUNT = 3
+
+_memo = {}
+_lock = threading.Lock()
+
+
+def get_version():
+    return caching.get_version(NAMESPACE)
+
+
+def bump_version(**kwargs):
+    """Invalide les données de navigation (utilisable comme récepteur de signal)."""
+    caching.bump_version(NAMESPACE)
+    with _lock:
+        _memo.clear()
+
+
+def _cached(name, loader):
+    version = get_version()
+    entry = _memo.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    value = loader()
+    with _lock:
+        _memo[name] = (version, value)
+    return value
+
+
+def shop_categories():
+    from Hackerz_E_commerce.models import Category
+
+    return _cached('shop_categories', lambda: list(Category.objects.all()))
+
+
+def blog_categories():
+    from Hackerz_blog.models import Category
+
+    return _cached('blog_categories', lambda: list(Category.objects.all()))
+
+
+def blog_tags():
+    from Hackerz_blog.models import Tag
+
+    return _cached('blog_tags', lambda: list(Tag.objects.all()))
+
+
+def recent_posts():
+    from Hackerz_blog.models import Post
+
+    def load():
+        posts = (
+            Post.objects.filter(status='published')
+            .select_related('author', 'category')
+            .prefetch_related('tags')
+            .order_by('-publish')[:RECENT_POSTS_COUNT]
+        )
+        return list(posts)
+
+    return _cached('recent_posts', load)
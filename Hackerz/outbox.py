@@ -0,0 +1,309 @@
+"""
+Boîte d'envoi des emails.
+
+Les vues n'envoient plus d'email : enqueue() enregistre le message dans la
+table OutboundEmail, et la remise a lieu hors de la requête, par la file de
+tâches (Hackerz/tasks.py, mêmes modes thread / worker / eager) : chaque tâche
+« outbox.deliver » remet un lot d'emails dus puis planifie la suivante tant
+que des emails sont en attente. Une seule tâche de remise attend à la fois.
+
+Les emails sont remis par lots de EMAIL_BATCH_SIZE sur une seule connexion
+SMTP (get_connection, ouverte une fois par lot). Chaque lot est réservé par
+une requête UPDATE conditionnelle : deux tâches concurrentes ne remettent
+jamais le même email. Un envoi en échec est retenté par une tâche suivante,
+avec le délai exponentiel de la file de tâches, sauf si le serveur a refusé
+définitivement le destinataire ou le message.
+
+EMAIL_RATE_LIMITS limite le nombre d'emails remis par minute à chaque
+fournisseur (domaine du destinataire, « * » pour les autres) : les emails
+au-delà du quota restent en attente jusqu'au lot suivant. Le quota est
+partagé avec les campagnes de newsletter (voir campaigns.py).
+
+Pour tester la remise sans envoyer de vrais emails, faire pointer
+EMAIL_HOST / EMAIL_PORT vers un serveur SMTP local (MailHog, aiosmtpd...).
+"""
+import logging
+import smtplib
+import uuid
+from collections import Counter
+from datetime import timedelta
+from email.utils import parseaddr
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from . import tasks
+from .models import BackgroundTask, CampaignDelivery, OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+DELIVER = 'outbox.deliver'
+
+# Nombre d'emails remis par connexion SMTP (et par tâche de remise)
+BATCH_SIZE = getattr(settings, 'EMAIL_BATCH_SIZE', 50)
+# Emails par minute et par domaine destinataire (« * » : autres domaines ; absent : illimité)
+RATE_LIMITS = getattr(settings, 'EMAIL_RATE_LIMITS', {})
+RATE_WINDOW = 60
+
+_attachment_sources = {}
+
+
+class MissingAttachment(Exception):
+    """Pièce jointe introuvable au moment de l'envoi : inutile de réessayer."""
+
+
+def attachment_source(name):
+    """
+    Décorateur enregistrant une fonction ``source(**args)`` qui retourne le
+    contenu d'une pièce jointe ; elle est appelée au moment de l'envoi.
+    """
+    def decorator(func):
+        _attachment_sources[name] = func
+        return func
+    return decorator
+
+
+def domain_of(address):
+    return parseaddr(address)[1].rpartition('@')[2].lower()
+
+
+def enqueue(subject, body, to, html_body='', from_email=None, reply_to=None, attachments=None,
+            reference='', delay=0):
+    """
+    Ajoute un email à la boîte d'envoi et planifie sa remise après la
+    validation de la transaction courante ; retourne l'instance OutboundEmail.
+
+    ``attachments`` : [{"path", "filename", "mimetype"}] pour un fichier de
+    default_storage, ou [{"source", "args", "filename", "mimetype"}] pour un
+    contenu produit à l'envoi par une source (voir attachment_source).
+    """
+    if isinstance(to, str):
+        to = [to]
+    email = OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        reply_to=list(reply_to or []),
+        attachments=list(attachments or []),
+        domain=domain_of(to[0]) if to else '',
+        reference=reference,
+        send_after=timezone.now() + timedelta(seconds=delay),
+    )
+    schedule(delay)
+    return email
+
+
+def rate_limit(domain):
+    return RATE_LIMITS.get(domain, RATE_LIMITS.get('*'))
+
+
+def sent_recently(now=None):
+    """
+    {domaine: emails remis} pendant la dernière fenêtre de quota, par la boîte
+    d'envoi et par les campagnes de newsletter (quota partagé).
+    """
+    since = (now or timezone.now()) - timedelta(seconds=RATE_WINDOW)
+    counts = Counter(dict(
+        OutboundEmail.objects.filter(status='sent', sent_at__gte=since)
+        .values_list('domain').annotate(count=Count('pk')).order_by()
+    ))
+    counts.update(dict(
+        CampaignDelivery.objects.filter(status='sent', sent_at__gte=since)
+        .values_list('domain').annotate(count=Count('pk')).order_by()
+    ))
+    return counts
+
+
+def over_quota(domain, counts):
+    allowed = rate_limit(domain)
+    return allowed is not None and counts[domain] >= allowed
+
+
+def saturated_domains(counts):
+    return [domain for domain in counts if over_quota(domain, counts)]
+
+
+def requeue_stale():
+    """Remet en attente les emails restés « en cours d'envoi » (processus interrompu)."""
+    return tasks.release_stale(OutboundEmail.objects.filter(status='sending'), batch='')
+
+
+def claim(limit=BATCH_SIZE):
+    """Réserve jusqu'à ``limit`` emails dus, dans la limite des quotas ; retourne la liste."""
+    now = timezone.now()
+    counts = sent_recently(now)
+    # Les domaines déjà au quota sont exclus en SQL : leurs emails en attente ne
+    # masquent pas ceux des autres domaines
+    due = (
+        OutboundEmail.objects.filter(status='pending', send_after__lte=now)
+        .exclude(domain__in=saturated_domains(counts))
+        .order_by('send_after', 'id')
+    )
+    picked = []
+    # Quelques candidats de plus que le lot : ceux des domaines qui atteignent leur quota dans ce lot sont sautés
+    for pk, domain in due.values_list('pk', 'domain')[:limit * 4]:
+        if over_quota(domain, counts):
+            continue
+        counts[domain] += 1
+        picked.append(pk)
+        if len(picked) >= limit:
+            break
+    if not picked:
+        return []
+    batch = uuid.uuid4().hex
+    OutboundEmail.objects.filter(pk__in=picked, status='pending').update(
+        status='sending', batch=batch, locked_at=now, attempts=F('attempts') + 1, updated=now,
+    )
+    return list(OutboundEmail.objects.filter(batch=batch, status='sending'))
+
+
+def build_message(email, connection=None):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        reply_to=email.reply_to or None,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    for attachment in email.attachments:
+        message.attach(attachment['filename'], _attachment_content(attachment), attachment.get('mimetype'))
+    return message
+
+
+def _attachment_content(attachment):
+    try:
+        if 'source' in attachment:
+            return _attachment_sources[attachment['source']](**attachment.get('args', {}))
+        with default_storage.open(attachment['path'], 'rb') as f:
+            return f.read()
+    except (KeyError, FileNotFoundError, ObjectDoesNotExist) as exc:
+        raise MissingAttachment(f"{attachment.get('filename')} : {type(exc).__name__}: {exc}") from exc
+
+
+def is_permanent(exc):
+    """
+    Destinataire ou contenu refusé par le serveur (code 5xx), ou pièce jointe
+    introuvable : inutile de réessayer.
+    """
+    if isinstance(exc, (smtplib.SMTPRecipientsRefused, MissingAttachment)):
+        return True
+    return isinstance(exc, smtplib.SMTPDataError) and exc.smtp_code >= 500
+
+
+def _failed(email, exc, permanent=False):
+    now = timezone.now()
+    retry = email.attempts < email.max_attempts and not permanent
+    delay = tasks.retry_delay(email.attempts)
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        status='pending' if retry else 'failed',
+        send_after=now + timedelta(seconds=delay) if retry else email.send_after,
+        batch='',
+        locked_at=None,
+        last_error=f'{type(exc).__name__}: {exc}',
+        updated=now,
+    )
+    logger.warning(
+        "Email #%s à %s en échec (tentative %s/%s) : %s",
+        email.pk, ', '.join(email.to), email.attempts, email.max_attempts, exc,
+    )
+
+
+def deliver(limit=BATCH_SIZE):
+    """Remet un lot d'emails dus sur une seule connexion SMTP ; retourne le nombre d'emails traités."""
+    emails = claim(limit)
+    if not emails:
+        return 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # Serveur injoignable : tout le lot sera retenté
+        for email in emails:
+            _failed(email, exc)
+        return len(emails)
+
+    sent = []
+    try:
+        for email in emails:
+            try:
+                connection.send_messages([build_message(email, connection)])
+            except Exception as exc:
+                permanent = is_permanent(exc)
+                _failed(email, exc, permanent)
+                if not permanent:
+                    # La connexion est peut-être perdue : la rouvrir pour la suite du lot
+                    connection.close()
+                    connection.open()
+            else:
+                sent.append(email.pk)
+    except Exception as exc:
+        # Connexion impossible à rouvrir : les emails non traités seront retentés
+        for email in emails:
+            if email.pk not in sent:
+                OutboundEmail.objects.filter(pk=email.pk, status='sending').update(
+                    status='pending', batch='', locked_at=None, last_error=f'{type(exc).__name__}: {exc}',
+                )
+    finally:
+        connection.close()
+        if sent:
+            now = timezone.now()
+            OutboundEmail.objects.filter(pk__in=sent).update(
+                status='sent', sent_at=now, batch='', locked_at=None, last_error='', updated=now,
+            )
+    logger.info("Lot d'emails remis : %s envoyé(s) sur %s", len(sent), len(emails))
+    return len(emails)
+
+
+def deliver_pending(batch_size=BATCH_SIZE):
+    """Remet les emails dus, lot par lot ; retourne le nombre d'emails traités."""
+    requeue_stale()
+    total = 0
+    while True:
+        processed = deliver(batch_size)
+        if not processed:
+            return total
+        total += processed
+
+
+def seconds_until_due():
+    """Délai avant le prochain email à remettre, ou None si la boîte est vide."""
+    next_due = OutboundEmail.objects.filter(status='pending').aggregate(next_due=Min('send_after'))['next_due']
+    if next_due is None:
+        return None
+    # Email dû mais retenu par un quota : attendre que la fenêtre avance
+    return max((next_due - timezone.now()).total_seconds(), RATE_WINDOW / 4)
+
+
+def schedule(delay=0):
+    """
+    Planifie une tâche de remise dans ``delay`` secondes, sauf si une tâche en
+    attente passe déjà avant (dans la transaction courante s'il y en a une).
+    """
+    run_after = timezone.now() + timedelta(seconds=delay)
+    if BackgroundTask.objects.filter(name=DELIVER, status='pending', run_after__lte=run_after).exists():
+        return None
+    return tasks.enqueue(DELIVER, delay=delay)
+
+
+@tasks.task(DELIVER)
+def deliver_batch():
+    """Tâche : remet un lot d'emails dus puis planifie la remise suivante."""
+    requeue_stale()
+    processed = deliver(BATCH_SIZE)
+    if processed >= BATCH_SIZE:
+        # Lot complet : d'autres emails sont sans doute dus
+        schedule()
+    else:
+        wait = seconds_until_due()
+        if wait is not None:
+            schedule(wait)
+    return {'processed': processed}
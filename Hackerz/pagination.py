@@ -0,0 +1,243 @@
+"""
+Pagination des listes de la boutique et du blog.
+
+Deux modes sont disponibles :
+
+* la pagination classique par numéro de page (OFFSET), dont le nombre total
+  d'éléments est mis en cache quelques instants au lieu d'être recompté à
+  chaque page ;
+* la pagination par curseur (keyset), activée par le paramètre ``cursor`` :
+  la page suivante est filtrée à partir des valeurs de tri du dernier élément
+  affiché (``WHERE (price, id) > (...)``), son coût ne dépend donc pas de la
+  profondeur de la page.
+"""
+import base64
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Durée de mise en cache du nombre total d'éléments d'une liste (secondes)
+COUNT_CACHE_TIMEOUT = getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder tronque les dates et heures à la milliseconde : le
+    curseur garde les microsecondes pour ne sauter aucun élément.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def cached_count(queryset):
+    """COUNT(*) de la requête, mis en cache pendant COUNT_CACHE_TIMEOUT secondes."""
+    if queryset.query.is_empty():
+        return 0
+    if not COUNT_CACHE_TIMEOUT:
+        return queryset.count()
+    try:
+        sql = f'{queryset.db}:{queryset.query}'
+    except EmptyResultSet:
+        # Filtre qui ne peut rien retourner (id__in=[] par exemple)
+        return 0
+    key = 'pagination:count:' + hashlib.md5(sql.encode('utf-8')).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator dont le nombre total d'éléments est lu depuis le cache."""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return cached_count(self.object_list)
+        return super().count
+
+
+def keyset_ordering(queryset):
+    """
+    Retourne l'ordre de tri de la requête sous forme de liste de noms de champs
+    (avec '-' pour un tri décroissant), ou None s'il ne permet pas un curseur
+    (tri sur une expression, par exemple le classement par pertinence).
+    """
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    fields = []
+    for field in ordering:
+        if not isinstance(field, str) or '__' in field or field == '?':
+            return None
+        fields.append(field)
+    # Le tri doit être total : on termine par la clé primaire
+    if not any(field.lstrip('-') in ('pk', 'id') for field in fields):
+        descending = fields[-1].startswith('-') if fields else False
+        fields.append('-pk' if descending else 'pk')
+    return fields
+
+
+class CursorPage:
+    """Page obtenue par curseur, avec la même interface que django.core.paginator.Page."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pagination par curseur sur un tri existant (name, price, -created, -publish...).
+
+    Le curseur est l'encodage base64 des valeurs de tri de l'élément de
+    référence et du sens de lecture ('n' : page suivante, 'p' : page précédente).
+    """
+
+    def __init__(self, queryset, per_page, ordering=None, with_count=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering or keyset_ordering(queryset)
+        if self.ordering is None:
+            raise ValueError("Le tri de cette requête ne permet pas la pagination par curseur")
+        self.with_count = with_count
+
+    def _field(self, name):
+        name = name.lstrip('-')
+        meta = self.queryset.model._meta
+        return meta.pk if name == 'pk' else meta.get_field(name)
+
+    def _values(self, obj):
+        return [getattr(obj, self._field(name).attname) for name in self.ordering]
+
+    def encode_cursor(self, obj, direction):
+        payload = {'v': self._values(obj), 'd': direction}
+        raw = json.dumps(payload, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            values, direction = payload['v'], payload['d']
+            if direction not in ('n', 'p') or len(values) != len(self.ordering):
+                raise InvalidCursor(cursor)
+            return [self._field(name).to_python(value) for name, value in zip(self.ordering, values)], direction
+        except (ValueError, TypeError, KeyError, UnicodeEncodeError) as exc:
+            raise InvalidCursor(cursor) from exc
+
+    def _after(self, values, reverse=False):
+        """Condition « strictement après ces valeurs » dans l'ordre de tri (ou avant si reverse)."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            descending = name.startswith('-') != reverse
+            lookup = f'{field}__lt' if descending else f'{field}__gt'
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        direction = 'n'
+        if cursor:
+            values, direction = self.decode_cursor(cursor)
+            queryset = queryset.filter(self._after(values, reverse=direction == 'p'))
+
+        if direction == 'p':
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+        else:
+            ordering = self.ordering
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'p':
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or direction == 'p':
+                next_cursor = self.encode_cursor(rows[-1], 'n')
+            if cursor and (has_more or direction == 'n'):
+                previous_cursor = self.encode_cursor(rows[0], 'p')
+        count = cached_count(self.queryset) if self.with_count else None
+        return CursorPage(rows, next_cursor, previous_cursor, count)
+
+
+def paginate_listing(request, queryset, per_page):
+    """
+    Pagine une liste pour les vues HTML.
+
+    Avec ``?cursor=...`` la page est obtenue par curseur ; sinon la pagination
+    par numéro est utilisée (avec un nombre total en cache) et la page expose
+    ``next_cursor`` pour continuer en mode curseur quand le tri le permet.
+    """
+    ordering = keyset_ordering(queryset)
+    if ordering is not None:
+        # Même tri total dans les deux modes pour que les curseurs s'enchaînent
+        queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor is not None and ordering is not None:
+        paginator = KeysetPaginator(queryset, per_page, ordering, with_count=True)
+        try:
+            return paginator.page(cursor or None)
+        except InvalidCursor:
+            return paginator.page()
+
+    paginator = CachedCountPaginator(queryset, per_page)
+    try:
+        page = paginator.page(request.GET.get('page'))
+    except PageNotAnInteger:
+        page = paginator.page(1)
+    except EmptyPage:
+        page = paginator.page(paginator.num_pages)
+
+    page.next_cursor = None
+    if ordering is not None and page.has_next() and len(page):
+        page.next_cursor = KeysetPaginator(queryset, per_page, ordering).encode_cursor(page[-1], 'n')
+    return page
+
+
+def pagination_query(request):
+    """Paramètres GET de la liste courante, sans ceux de pagination, prêts à préfixer un lien."""
+    params = request.GET.copy()
+    for name in ('page', 'cursor'):
+        params.pop(name, None)
+    encoded = params.urlencode()
+    return f'{encoded}&' if encoded else ''
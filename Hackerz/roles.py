@@ -0,0 +1,112 @@
+"""
+Rôles des utilisateurs : groupes Administrateurs, Vendeurs et Clients.
+
+Les identifiants de ces groupes sont chargés une fois par processus (les
+groupes sont créés au besoin) et invalidés grâce au numéro de version de
+l'espace de noms « roles » du cache applicatif (voir caching.py), incrémenté
+quand un groupe est modifié ou supprimé et après les migrations ou un flush
+(voir signals.py) : un groupe supprimé puis recréé par un autre processus
+n'y laisse pas un identifiant périmé quand le cache est partagé.
+
+Les noms des groupes d'un utilisateur sont chargés en une requête, à la
+première question sur ses rôles, puis mémorisés sur l'objet utilisateur :
+request.user étant le même objet pendant toute la requête, is_admin,
+is_vendor et is_client ne coûtent qu'une requête par requête HTTP, dans les
+vues comme dans les gabarits (variable ``roles`` du contexte global).
+"""
+import threading
+from functools import cached_property
+
+from django.contrib.auth.models import Group
+from django.db import transaction
+
+from Hackerz import caching
+
+ADMIN_GROUP = 'Administrateurs'
+VENDOR_GROUP = 'Vendeurs'
+CLIENT_GROUP = 'Clients'
+GROUP_NAMES = (ADMIN_GROUP, VENDOR_GROUP, CLIENT_GROUP)
+
+NAMESPACE = 'roles'
+
+# (version, {nom: id}) des groupes des rôles
+_memo = {}
+_lock = threading.Lock()
+
+
+def group_ids():
+    """{nom: id} des groupes des rôles, créés au besoin ; chargé une fois par version."""
+    version = caching.get_version(NAMESPACE)
+    entry = _memo.get('group_ids')
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    ids = dict(Group.objects.filter(name__in=GROUP_NAMES).values_list('name', 'id'))
+    missing = [name for name in GROUP_NAMES if name not in ids]
+    for name in missing:
+        ids[name] = Group.objects.get_or_create(name=name)[0].pk
+    if missing:
+        # Un groupe créé n'est mémorisé qu'une fois la transaction validée
+        transaction.on_commit(lambda: _remember(version, ids))
+    else:
+        _remember(version, ids)
+    return ids
+
+
+def _remember(version, ids):
+    with _lock:
+        _memo['group_ids'] = (version, ids)
+
+
+def group_id(name):
+    return group_ids()[name]
+
+
+def clear(**kwargs):
+    """Invalide les identifiants des groupes dans tous les processus (récepteur de signal)."""
+    caching.bump_version(NAMESPACE)
+    with _lock:
+        _memo.clear()
+
+
+class Roles:
+    """Rôles d'un utilisateur ; ses groupes sont chargés au premier accès."""
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def group_names(self):
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(self.user.groups.values_list('name', flat=True))
+
+    @property
+    def is_admin(self):
+        return self.user.is_superuser or ADMIN_GROUP in self.group_names
+
+    @property
+    def is_vendor(self):
+        if not self.user.is_authenticated:
+            return False
+        return VENDOR_GROUP in self.group_names or self.user.profile.is_vendor
+
+    @property
+    def is_client(self):
+        return CLIENT_GROUP in self.group_names
+
+
+def get_roles(user):
+    """Rôles de ``user``, mémorisés sur l'objet (request.user : une fois par requête)."""
+    try:
+        return user._hackerz_roles
+    except AttributeError:
+        user._hackerz_roles = Roles(user)
+        return user._hackerz_roles
+
+
+def forget(user):
+    """À appeler après avoir modifié les groupes de ``user``."""
+    try:
+        del user._hackerz_roles
+    except AttributeError:
+        pass
@@ -5,6 +5,8 @@ Django settings for Hackerz project.
 from pathlib import Path
 import os
 
+from Hackerz.log import module_levels
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'Hackerz.log.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -211,17 +214,91 @@ JAZZMIN_UI_TWEAKS = {
     }
 }
 
-# Configuration SMTP pour l'envoi d'emails
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
-EMAIL_HOST_USER = 'franckcours99@gmail.com'
-EMAIL_HOST_PASSWORD = 'ialr jrtb slao urik'
-DEFAULT_FROM_EMAIL = 'Hackerz <franckcours99@gmail.com>'
+# Configuration SMTP pour l'envoi d'emails (identifiants fournis par l'environnement)
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '1') == '1'
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '30'))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Hackerz <franckcours99@gmail.com>')
+
+# Boîte d'envoi (voir Hackerz/outbox.py) : remise par la file de tâches,
+# par lots d'EMAIL_BATCH_SIZE sur une connexion SMTP.
+# EMAIL_RATE_LIMITS : emails par minute et par domaine destinataire, ex.
+# « gmail.com=20,*=100 »
+EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', '50'))
+EMAIL_RATE_LIMITS = {
+    domain.strip().lower(): int(limit)
+    for domain, _, limit in (item.partition('=') for item in os.environ.get('EMAIL_RATE_LIMITS', '').split(','))
+    if domain.strip() and limit.strip()
+}
+
+# Campagnes de newsletter (voir Hackerz/campaigns.py) : abonnés par lot
+# (une connexion SMTP et un point de reprise par lot)
+NEWSLETTER_CHUNK_SIZE = int(os.environ.get('NEWSLETTER_CHUNK_SIZE', '200'))
 
 # Configuration pour la réinitialisation de mot de passe
-PASSWORD_RESET_TIMEOUT = 3600  # 1 heure en secondes 
+PASSWORD_RESET_TIMEOUT = 3600  # 1 heure en secondes
+
+# File de tâches d'arrière-plan (factures, emails de confirmation)
+# 'thread' : pool de threads du serveur web ; 'worker' : commande process_tasks ;
+# 'eager' : exécution immédiate
+TASKS_MODE = os.environ.get('TASKS_MODE', 'thread')
+TASKS_THREAD_WORKERS = 2
+
+# Lectures d'articles (voir Hackerz_blog/view_tracking.py) : délai maximal
+# avant leur écriture en base, en secondes (0 : écriture immédiate)
+POST_VIEWS_FLUSH_INTERVAL = int(os.environ.get('POST_VIEWS_FLUSH_INTERVAL', '10'))
+
+# Cache partagé (voir Hackerz/caching.py)
+# 'locmem' : mémoire du processus ; 'file' : répertoire partagé entre les
+# processus d'une machine ; 'redis' : serveur Redis local (paquet redis requis)
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'hackerz'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', '300')),
+        'KEY_PREFIX': 'hackerz',
+    }
+}
+
+# Journalisation (voir Hackerz/log.py)
+# LOG_LEVEL : niveau global ; LOG_LEVELS : « module=NIVEAU,... » pour un module
+# LOG_FORMAT : 'text' ou 'json' ; LOG_SAMPLE_RATE : fraction gardée sous WARNING
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {'()': 'Hackerz.log.RequestIdFilter'},
+        'sampling': {'()': 'Hackerz.log.SamplingFilter', 'rate': os.environ.get('LOG_SAMPLE_RATE', '1')},
+    },
+    'formatters': {
+        'text': {'format': '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'},
+        'json': {'()': 'Hackerz.log.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'filters': ['request_id', 'sampling'],
+            'formatter': os.environ.get('LOG_FORMAT', 'text'),
+        },
+    },
+    'root': {'handlers': ['console'], 'level': LOG_LEVEL},
+    'loggers': {
+        # Remplace les gestionnaires par défaut de Django (sans doublon via la racine)
+        'django': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        **module_levels(os.environ.get('LOG_LEVELS', '')),
+    },
+}
 
 # REST Framework settings
 REST_FRAMEWORK = {
@@ -237,7 +314,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CachedCountPageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
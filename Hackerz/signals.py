@@ -1,50 +1,38 @@
 from django.contrib.auth.models import Group, User, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
 from django.dispatch import receiver
 from django.apps import apps
 
 from Hackerz.models import Profile, Vendor
 from Hackerz_E_commerce.models import Order
 from Hackerz_blog.models import Post
-
-# Déplacer la création des groupes dans une fonction pour éviter l'accès à la base de données à l'import
-def ensure_groups_exist():
-    admin_group, _ = Group.objects.get_or_create(name='Administrateurs')
-    seller_group, _ = Group.objects.get_or_create(name='Vendeurs')
-    client_group, _ = Group.objects.get_or_create(name='Clients')
-    return admin_group, seller_group, client_group
+from Hackerz import caching, navigation, roles, vendors
 
 # Fonction pour ajouter un utilisateur au groupe Admin
 def make_admin(user):
-    admin_group, _, _ = ensure_groups_exist()
     user.is_staff = True
     user.is_superuser = True
     user.save()
-    admin_group.user_set.add(user)
+    # Identifiants des groupes mémorisés par version (voir roles.py)
+    user.groups.add(roles.group_id(roles.ADMIN_GROUP))
+    roles.forget(user)
 
 # Fonction pour ajouter un utilisateur au groupe Vendeur quand sa demande est approuvée
 @receiver(post_save, sender='Hackerz.Vendor')
 def vendor_approval_handler(sender, instance, **kwargs):
     if instance.is_approved:
-        _, seller_group, _ = ensure_groups_exist()
-        user = instance.profile.user
-        seller_group.user_set.add(user)
-        # S'assurer que l'utilisateur a également le flag is_vendor
-        profile = user.profile
-        profile.is_vendor = True
-        profile.save()
+        # Groupe « Vendeurs » et flag is_vendor (comme pour l'approbation par lots)
+        vendors.grant_vendor_role([instance.profile_id])
 
 # Fonction pour ajouter un utilisateur au groupe Client quand il passe une commande
 @receiver(post_save, sender='Hackerz_E_commerce.Order')
 def order_creation_handler(sender, instance, created, **kwargs):
     if created:
-        # Utiliser une fonction pour obtenir le groupe client
-        _, _, client_group = ensure_groups_exist()
         # Supposons que l'ordre a un champ email qui peut être utilisé pour identifier l'utilisateur
         try:
             user = User.objects.get(email=instance.email)
-            client_group.user_set.add(user)
+            user.groups.add(roles.group_id(roles.CLIENT_GROUP))
         except User.DoesNotExist:
             pass
 
@@ -54,4 +42,30 @@ def user_created_handler(sender, instance, created, **kwargs):
     if created:
         # Aucun groupe particulier n'est nécessaire pour être créateur de blog
         # car tout utilisateur peut créer des posts dans la logique actuelle
-        pass 
\ No newline at end of file
+        pass 
+
+# Identifiants des groupes des rôles mémorisés par version du cache
+post_save.connect(roles.clear, sender=Group, dispatch_uid='roles_group_save')
+post_delete.connect(roles.clear, sender=Group, dispatch_uid='roles_group_delete')
+post_migrate.connect(roles.clear, dispatch_uid='roles_post_migrate')
+
+# Invalider le cache de navigation quand les catégories, tags ou articles changent
+for _model in ('Hackerz_E_commerce.Category', 'Hackerz_blog.Category', 'Hackerz_blog.Tag', 'Hackerz_blog.Post'):
+    post_save.connect(navigation.bump_version, sender=_model, dispatch_uid=f'navigation_save_{_model}')
+    post_delete.connect(navigation.bump_version, sender=_model, dispatch_uid=f'navigation_delete_{_model}')
+m2m_changed.connect(navigation.bump_version, sender=Post.tags.through, dispatch_uid='navigation_post_tags')
+
+# Espaces de noms du cache applicatif (voir caching.py) invalidés par chaque modèle
+CACHE_DEPENDENCIES = {
+    'Hackerz_E_commerce.Product': ('shop', 'api'),
+    'Hackerz_E_commerce.Category': ('shop', 'api'),
+    'Hackerz_E_commerce.Review': ('shop', 'api'),
+    'Hackerz_blog.Post': ('blog', 'api'),
+    'Hackerz_blog.Category': ('blog', 'api'),
+    'Hackerz_blog.Tag': ('blog', 'api'),
+}
+for _model, _namespaces in CACHE_DEPENDENCIES.items():
+    _receiver = caching.invalidator(*_namespaces)
+    post_save.connect(_receiver, sender=_model, weak=False, dispatch_uid=f'caching_save_{_model}')
+    post_delete.connect(_receiver, sender=_model, weak=False, dispatch_uid=f'caching_delete_{_model}')
+m2m_changed.connect(caching.invalidator('blog', 'api'), sender=Post.tags.through, weak=False, dispatch_uid='caching_post_tags')
@@ -0,0 +1,203 @@
+"""
+File de tâches locale, sans courtier externe.
+
+Les tâches sont enregistrées dans la table BackgroundTask puis exécutées
+après la validation de la transaction qui les a créées :
+
+* TASKS_MODE = 'thread' (par défaut) : dans un pool de threads du processus
+  web ; les tâches en échec ou interrompues sont reprises par le pool (après
+  le délai de nouvelle tentative) ou par la commande ``process_tasks`` ;
+* TASKS_MODE = 'worker' : uniquement par la commande ``process_tasks``,
+  lancée comme processus séparé ;
+* TASKS_MODE = 'eager' : immédiatement, dans le processus courant (tests) ;
+  une tâche planifiée avec un délai reste en attente de ``process_tasks``
+  (une tâche qui se replanifie ne boucle pas).
+
+Une tâche est « réservée » par une requête UPDATE conditionnelle
+(status='pending' -> 'running'), ce qui évite qu'elle soit exécutée deux fois
+par des threads ou des processus concurrents. En cas d'erreur elle est
+replanifiée avec un délai exponentiel, jusqu'à max_attempts tentatives.
+"""
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+MODE = getattr(settings, 'TASKS_MODE', 'thread')
+THREAD_WORKERS = getattr(settings, 'TASKS_THREAD_WORKERS', 2)
+# Délai de base avant une nouvelle tentative (secondes), doublé à chaque échec
+RETRY_DELAY = getattr(settings, 'TASKS_RETRY_DELAY', 30)
+# Une tâche « en cours » depuis plus longtemps est considérée comme interrompue
+STALE_AFTER = getattr(settings, 'TASKS_STALE_AFTER', 600)
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+@dataclass
+class TaskSpec:
+    name: str
+    func: object
+    max_attempts: int
+
+
+_registry = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def task(name, max_attempts=5):
+    """Décorateur enregistrant une fonction comme tâche ; ses arguments sont le contenu de payload."""
+    def decorator(func):
+        _registry[name] = TaskSpec(name, func, max_attempts)
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(name) from None
+
+
+def enqueue(name, payload=None, reference='', delay=0):
+    """
+    Crée une tâche et la planifie après la validation de la transaction
+    courante ; retourne l'instance BackgroundTask.
+    """
+    spec = get_task(name)
+    background_task = BackgroundTask.objects.create(
+        name=name,
+        payload=payload or {},
+        reference=reference,
+        max_attempts=spec.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    if MODE != 'worker':
+        transaction.on_commit(lambda: _dispatch(background_task.pk, delay))
+    return background_task
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix='hackerz-task')
+        return _executor
+
+
+def _dispatch(pk, delay=0):
+    if MODE == 'eager':
+        if delay <= 0:
+            run_task(pk)
+    elif delay > 0:
+        timer = threading.Timer(delay, _dispatch, args=(pk,))
+        timer.daemon = True
+        timer.start()
+    else:
+        _get_executor().submit(_run_in_thread, pk)
+
+
+def _run_in_thread(pk):
+    close_old_connections()
+    try:
+        run_task(pk)
+    except Exception:
+        logger.exception("Erreur de la file de tâches (tâche #%s)", pk)
+    finally:
+        # La connexion appartient au thread du pool : on la libère
+        connections.close_all()
+
+
+def retry_delay(attempts):
+    """Délai avant une nouvelle tentative après ``attempts`` échecs (secondes)."""
+    return RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def _claim(pk):
+    """Réserve la tâche si elle est en attente et due ; False si un autre exécutant l'a prise."""
+    now = timezone.now()
+    return BackgroundTask.objects.filter(pk=pk, status='pending', run_after__lte=now).update(
+        status='running', locked_at=now, attempts=F('attempts') + 1, updated=now,
+    ) == 1
+
+
+def run_task(pk):
+    """Exécute la tâche si elle peut être réservée ; retourne son statut final ou None."""
+    if not _claim(pk):
+        return None
+    background_task = BackgroundTask.objects.get(pk=pk)
+    now = timezone.now()
+    try:
+        result = get_task(background_task.name).func(**background_task.payload)
+    except Exception as exc:
+        retry = background_task.attempts < background_task.max_attempts and not isinstance(exc, UnknownTask)
+        delay = retry_delay(background_task.attempts)
+        BackgroundTask.objects.filter(pk=pk).update(
+            status='pending' if retry else 'failed',
+            run_after=now + timedelta(seconds=delay) if retry else background_task.run_after,
+            locked_at=None,
+            last_error=traceback.format_exc(),
+            updated=now,
+        )
+        logger.warning(
+            "Tâche %s #%s en échec (tentative %s/%s) : %s",
+            background_task.name, pk, background_task.attempts, background_task.max_attempts, exc,
+        )
+        if retry and MODE == 'thread':
+            _dispatch(pk, delay)
+        return 'pending' if retry else 'failed'
+
+    BackgroundTask.objects.filter(pk=pk).update(
+        status='done', result=result, locked_at=None, last_error='', updated=now,
+    )
+    return 'done'
+
+
+def release_stale(queryset, **fields):
+    """
+    Remet en attente les lignes réservées (``locked_at``) depuis plus de
+    STALE_AFTER secondes, dont l'exécutant a été interrompu ; ``fields`` sont
+    d'autres champs à réinitialiser.
+    """
+    now = timezone.now()
+    return queryset.filter(locked_at__lt=now - timedelta(seconds=STALE_AFTER)).update(
+        status='pending', locked_at=None, updated=now, **fields,
+    )
+
+
+def requeue_stale():
+    """Remet en attente les tâches restées « en cours » (processus interrompu)."""
+    return release_stale(BackgroundTask.objects.filter(status='running'))
+
+
+def run_pending(limit=50):
+    """Exécute les tâches dues, dans l'ordre ; retourne le nombre de tâches traitées."""
+    requeue_stale()
+    pks = list(
+        BackgroundTask.objects.filter(status='pending', run_after__lte=timezone.now())
+        .order_by('run_after', 'id')
+        .values_list('pk', flat=True)[:limit]
+    )
+    return sum(1 for pk in pks if run_task(pk) is not None)
+
+
+def latest_status(reference, name=None):
+    """Statut de la dernière tâche liée à un objet (ex. « order:42 »), ou None."""
+    queryset = BackgroundTask.objects.filter(reference=reference)
+    if name:
+        queryset = queryset.filter(name=name)
+    return queryset.order_by('-id').values('status', 'attempts', 'max_attempts', 'updated').first()
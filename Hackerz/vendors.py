@@ -0,0 +1,85 @@
+"""
+Approbation et rejet des vendeurs par lots (actions de l'admin).
+
+Les vendeurs sont mis à jour par une seule requête UPDATE, sans save() par
+vendeur : le rôle vendeur (groupe « Vendeurs » et Profile.is_vendor) est
+attribué à tous les vendeurs approuvés par une insertion groupée, comme le
+ferait vendor_approval_handler (Hackerz/signals.py) pour un seul vendeur.
+
+Les emails de notification sont rendus et mis dans la boîte d'envoi par une
+tâche d'arrière-plan (voir Hackerz/tasks.py) : la requête de l'admin ne fait
+qu'un nombre fixe de requêtes, quel que soit le nombre de vendeurs.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import emails, roles
+from .models import Profile, Vendor
+from .tasks import enqueue, task
+
+NOTIFY_DECISION = 'vendors.notify_decision'
+
+# Gabarit de l'email (Hackerz/emails.py) envoyé pour chaque décision
+DECISION_EMAILS = {
+    'approved': 'vendor_approved',
+    'rejected': 'vendor_rejected',
+}
+
+
+def grant_vendor_role(profile_ids):
+    """Ajoute les utilisateurs des profils au groupe « Vendeurs » et marque les profils vendeurs."""
+    seller_group_id = roles.group_id(roles.VENDOR_GROUP)
+    user_ids = Profile.objects.filter(pk__in=profile_ids).values_list('user_id', flat=True)
+    Membership = User.groups.through
+    Membership.objects.bulk_create(
+        [Membership(user_id=user_id, group_id=seller_group_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    Profile.objects.filter(pk__in=profile_ids, is_vendor=False).update(is_vendor=True, updated=timezone.now())
+
+
+def _decide(queryset, approved, site_url):
+    # Seuls les vendeurs dont le statut change sont mis à jour et notifiés
+    changed = list(queryset.filter(is_approved=not approved).values_list('pk', 'profile_id'))
+    if not changed:
+        return 0
+    vendor_ids = [pk for pk, _ in changed]
+    with transaction.atomic():
+        Vendor.objects.filter(pk__in=vendor_ids, is_approved=not approved).update(
+            is_approved=approved, updated=timezone.now(),
+        )
+        if approved:
+            grant_vendor_role([profile_id for _, profile_id in changed])
+        enqueue(NOTIFY_DECISION, {
+            'vendor_ids': vendor_ids,
+            'decision': 'approved' if approved else 'rejected',
+            'site_url': site_url,
+        })
+    return len(vendor_ids)
+
+
+def approve(queryset, site_url):
+    """Approuve les vendeurs non approuvés du queryset ; retourne leur nombre."""
+    return _decide(queryset, True, site_url)
+
+
+def reject(queryset, site_url):
+    """Rejette les vendeurs approuvés du queryset ; retourne leur nombre."""
+    return _decide(queryset, False, site_url)
+
+
+@task(NOTIFY_DECISION)
+def notify_decision(vendor_ids, decision, site_url):
+    """Met dans la boîte d'envoi l'email de décision de chaque vendeur (une transaction)."""
+    email_name = DECISION_EMAILS[decision]
+    vendors = list(Vendor.objects.filter(pk__in=vendor_ids).select_related('profile__user'))
+    with transaction.atomic():
+        for vendor in vendors:
+            emails.enqueue(email_name, [vendor.profile.user.email], {
+                'vendor': vendor,
+                'shop_name': vendor.shop_name,
+                'user': vendor.profile.user,
+                'site_url': site_url,
+            }, reference=f'vendor:{vendor.pk}')
+    return {'notified': len(vendors)}
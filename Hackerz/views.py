@@ -1,11 +1,12 @@
+import logging
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import AuthenticationForm
 from .forms import ContactForm, UserRegistrationForm, LoginForm, UserUpdateForm, ProfileUpdateForm, VendorForm
-from Hackerz_E_commerce.models import Product, Category, Order
+from Hackerz_E_commerce.models import Product, Order
 from Hackerz_blog.models import Post, PostView
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.decorators import login_required
@@ -14,16 +15,20 @@ from django.urls import reverse
 from django.views.decorators.http import require_POST
 from .models import Profile, Wishlist, EmailConfirmationToken, NewsletterSubscriber
 from django.contrib.auth.views import PasswordResetView, PasswordResetConfirmView
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.contrib.sites.shortcuts import get_current_site
-from Hackerz_blog.models import Tag
+from . import caching, emails, navigation, outbox, roles
+
+logger = logging.getLogger(__name__)
 
 
 def home_view(request):
-    featured_products = Product.objects.filter(featured=True, available=True)[:4]
-    recent_posts = Post.objects.filter(status='published').select_related('author', 'category').prefetch_related('tags').order_by('-created')[:3]
-    categories = Category.objects.all()
+    # Produits mis en avant partagés par tous les visiteurs (espace « shop » du cache)
+    featured_products = caching.get_or_compute(
+        'shop', 'home:featured',
+        lambda: list(Product.objects.filter(featured=True, available=True).select_related('category')[:4]),
+    )
+    recent_posts = navigation.recent_posts()
+    categories = navigation.shop_categories()
     
     context = {
         'featured_products': featured_products,
@@ -46,8 +51,8 @@ def contact_view(request):
             # Formez le corps du message
             email_message = f"Nom: {name}\nEmail: {email}\nSujet: {subject}\nMessage: {message}"
             
-            # Envoi d'email - Activation de l'envoi d'email
-            send_mail(subject, email_message, settings.DEFAULT_FROM_EMAIL, [settings.DEFAULT_FROM_EMAIL], fail_silently=False)
+            # Email mis dans la boîte d'envoi, remis hors de la requête
+            outbox.enqueue(subject, email_message, [settings.DEFAULT_FROM_EMAIL], reply_to=[email])
             
             # Ajoutez un message de succès
             messages.success(request, 'Votre message a été envoyé avec succès! Nous vous répondrons bientôt.')
@@ -65,11 +70,9 @@ def login_view(request):
     if request.method == 'POST':
         form = LoginForm(request.POST)
         
-        # Log pour déboguer
-        print(f"Données du formulaire: {request.POST}")
-        print(f"Formulaire valide: {form.is_valid()}")
+        # Jamais les données POST : elles contiennent le mot de passe
         if not form.is_valid():
-            print(f"Erreurs: {form.errors}")
+            logger.debug("Connexion refusée : champs en erreur %s", list(form.errors))
         
         if form.is_valid():
             user = form.get_user()
@@ -131,14 +134,9 @@ def register_view(request):
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
     
     if request.method == 'POST':
-        # Ajouter du débogage pour voir les données du formulaire
-        print(f"Données brutes du formulaire d'inscription: {request.POST}")
-        
         form = UserRegistrationForm(request.POST)
-        # Vérifier si le formulaire est valide et afficher les erreurs
-        print(f"Formulaire d'inscription valide: {form.is_valid()}")
         if not form.is_valid():
-            print(f"Erreurs détaillées du formulaire: {form.errors}")
+            logger.debug("Inscription refusée : champs en erreur %s", list(form.errors))
             
         if form.is_valid():
             try:
@@ -154,34 +152,15 @@ def register_view(request):
                 current_site = get_current_site(request)
                 site_domain = current_site.domain
                 
-                # Préparer l'email de confirmation
-                from django.template.loader import render_to_string
-                subject = 'Confirmation de votre inscription sur Hackerz'
-                
                 # Créer l'URL de confirmation avec le token
                 confirm_url = f"http://{site_domain}{reverse('confirm_email', kwargs={'token': token.token})}"
                 
-                # Rendre le template d'email
-                html_message = render_to_string('email/confirm_email.html', {
+                # Email de confirmation (gabarit compilé, voir Hackerz/emails.py)
+                emails.enqueue('confirm_email', [user.email], {
                     'user': user,
                     'site_domain': site_domain,
                     'confirm_url': confirm_url
-                })
-                plain_message = strip_tags(html_message)
-                from_email = settings.DEFAULT_FROM_EMAIL
-                to_email = user.email
-                
-                try:
-                    send_mail(
-                        subject,
-                        plain_message,
-                        from_email,
-                        [to_email],
-                        html_message=html_message,
-                        fail_silently=False,
-                    )
-                except Exception as e:
-                    print(f"Erreur lors de l'envoi de l'email: {str(e)}")
+                }, reference=f'user:{user.pk}')
                 
                 # Ne pas connecter l'utilisateur automatiquement
                 # login(request, user)  # Commenté car l'utilisateur n'est pas encore activé
@@ -197,7 +176,7 @@ def register_view(request):
                     return redirect('registration_success')
             except Exception as e:
                 # Capturer toute autre exception qui pourrait survenir
-                print(f"Erreur lors de l'inscription: {str(e)}")
+                logger.exception("Erreur lors de l'inscription")
                 if is_ajax:
                     return JsonResponse({
                         'success': False,
@@ -211,7 +190,6 @@ def register_view(request):
                 errors = []
                 for field, error_list in form.errors.items():
                     errors.extend(error_list)
-                print(f"Erreurs pour la réponse AJAX: {errors}")
                 return JsonResponse({
                     'success': False,
                     'message': errors[0] if errors else "Formulaire invalide."
@@ -244,16 +222,18 @@ def profile_view(request):
     # Obtenir les groupes de l'utilisateur
     user_groups = user.groups.all()
     
-    is_admin = user.is_superuser or user.groups.filter(name='Administrateurs').exists()
-    is_vendor = user.groups.filter(name='Vendeurs').exists() or profile.is_vendor
-    is_client = user.groups.filter(name='Clients').exists()
+    # Groupes chargés une seule fois pour la requête (voir roles.py)
+    user_roles = roles.get_roles(user)
+    is_admin = user_roles.is_admin
+    is_vendor = user_roles.is_vendor
+    is_client = user_roles.is_client
     
     # Récupérer les articles de blog de l'utilisateur
     user_posts = Post.objects.filter(author=user).order_by('-created')
     
     # Récupérer les catégories pour le formulaire de création d'article
-    categories = Category.objects.all()
-    all_tags = Tag.objects.all()
+    categories = navigation.shop_categories()
+    all_tags = navigation.blog_tags()
     
     # Récupérer l'historique des commandes
     user_orders = Order.objects.filter(user=user).order_by('-created')[:5]  # 5 dernières commandes
@@ -361,53 +341,9 @@ def newsletter_subscribe(request):
                 if created:
                     # Envoyer un e-mail de confirmation
                     try:
-                        subject = "Confirmation d'inscription à la newsletter Hackerz"
-                        message = f"Bonjour,\n\nMerci de vous être inscrit à notre newsletter. Vous recevrez désormais nos dernières actualités et offres spéciales.\n\nL'équipe Hackerz"
-                        html_message = f"""
-                        <html>
-                            <head>
-                                <style>
-                                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                                    .header {{ text-align: center; padding: 20px 0; }}
-                                    .header h1 {{ color: #00ff41; margin: 0; }}
-                                    .content {{ padding: 20px 0; }}
-                                    .footer {{ text-align: center; font-size: 12px; color: #999; }}
-                                </style>
-                            </head>
-                            <body>
-                                <div class="container">
-                                    <div class="header">
-                                        <h1>Hackerz Newsletter</h1>
-                                    </div>
-                                    <div class="content">
-                                        <p>Bonjour,</p>
-                                        <p>Merci de vous être inscrit à notre newsletter. Vous recevrez désormais nos dernières actualités, tutoriels, et offres spéciales.</p>
-                                        <p>Si vous n'avez pas demandé cette inscription, veuillez ignorer ce message.</p>
-                                        <p>Cordialement,<br>L'équipe Hackerz</p>
-                                    </div>
-                                    <div class="footer">
-                                        <p>&copy; 2025 Hackerz. Tous droits réservés.</p>
-                                        <p>Cet email a été envoyé à {email}</p>
-                                    </div>
-                                </div>
-                            </body>
-                        </html>
-                        """
-                        from django.core.mail import send_mail
-                        from django.utils.html import strip_tags
-                        
-                        send_mail(
-                            subject,
-                            strip_tags(html_message),  # Version texte du message
-                            settings.DEFAULT_FROM_EMAIL,
-                            [email],
-                            html_message=html_message,
-                            fail_silently=False,
-                        )
-                        print(f"Email de confirmation envoyé à {email}")
-                    except Exception as e:
-                        print(f"Erreur lors de l'envoi de l'email: {str(e)}")
+                        emails.enqueue('newsletter_welcome', [email], {'email': email})
+                    except Exception:
+                        logger.exception("Échec de la mise en file de l'email de confirmation de la newsletter")
                     
                     message = "Merci de votre inscription à notre newsletter! Un e-mail de confirmation a été envoyé."
                     messages.success(request, message)
@@ -774,30 +710,15 @@ def resend_confirmation(request):
                 current_site = get_current_site(request)
                 site_domain = current_site.domain
                 
-                # Préparer l'email de confirmation
-                subject = 'Confirmation de votre inscription sur Hackerz'
-                
                 # Créer l'URL de confirmation avec le token
                 confirm_url = f"http://{site_domain}{reverse('confirm_email', kwargs={'token': token.token})}"
                 
-                # Rendre le template d'email
-                html_message = render_to_string('email/confirm_email.html', {
+                # Mettre l'email dans la boîte d'envoi
+                emails.enqueue('confirm_email', [email], {
                     'user': user,
                     'site_domain': site_domain,
                     'confirm_url': confirm_url
-                })
-                plain_message = strip_tags(html_message)
-                from_email = settings.DEFAULT_FROM_EMAIL
-                
-                # Envoyer l'email
-                send_mail(
-                    subject,
-                    plain_message,
-                    from_email,
-                    [email],
-                    html_message=html_message,
-                    fail_silently=False,
-                )
+                }, reference=f'user:{user.pk}')
                 
                 messages.success(request, "Un nouvel email de confirmation a été envoyé. Veuillez vérifier votre boîte de réception.")
                 
@@ -819,7 +740,7 @@ def resend_confirmation_email(request):
 def group_users_view(request, group_name):
     """Vue pour afficher les utilisateurs d'un groupe spécifique."""
     # Vérifier si l'utilisateur est administrateur
-    if not request.user.is_superuser and not request.user.groups.filter(name='Administrateurs').exists():
+    if not roles.get_roles(request.user).is_admin:
         messages.error(request, "Vous n'avez pas l'autorisation d'accéder à cette page.")
         return redirect('home')
     
@@ -881,9 +802,6 @@ def toggle_2fa(request):
     """Activer/désactiver la double authentification par email"""
     import secrets
     import base64
-    from django.core.mail import send_mail
-    from django.template.loader import render_to_string
-    from django.utils.html import strip_tags
     
     profile = request.user.profile
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
@@ -902,60 +820,18 @@ def toggle_2fa(request):
             
             # Envoyer le code par email
             try:
-                subject = 'Code de vérification 2FA - Hackerz'
-                html_message = f"""
-                <html>
-                    <head>
-                        <style>
-                            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                            .header {{ text-align: center; padding: 20px 0; background-color: #00ff41; }}
-                            .header h1 {{ color: #000; margin: 0; }}
-                            .content {{ padding: 20px; background-color: #f9f9f9; }}
-                            .code {{ font-size: 24px; font-weight: bold; text-align: center; 
-                                     background-color: #000; color: #00ff41; padding: 15px; 
-                                     border-radius: 5px; letter-spacing: 3px; margin: 20px 0; }}
-                            .footer {{ text-align: center; font-size: 12px; color: #999; padding-top: 20px; }}
-                        </style>
-                    </head>
-                    <body>
-                        <div class="container">
-                            <div class="header">
-                                <h1>🔐 Hackerz 2FA</h1>
-                            </div>
-                            <div class="content">
-                                <p>Bonjour {request.user.username},</p>
-                                <p>Vous avez demandé à activer la double authentification sur votre compte.</p>
-                                <p>Voici votre code de vérification :</p>
-                                <div class="code">{verification_code}</div>
-                                <p>Ce code est valable pour une seule utilisation. Entrez-le dans votre profil pour activer la 2FA.</p>
-                                <p>Si vous n'avez pas demandé cette activation, veuillez ignorer ce message.</p>
-                            </div>
-                            <div class="footer">
-                                <p>&copy; 2025 Hackerz. Tous droits réservés.</p>
-                            </div>
-                        </div>
-                    </body>
-                </html>
-                """
-                plain_message = f"Code de vérification 2FA Hackerz: {verification_code}"
-                
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [request.user.email],
-                    html_message=html_message,
-                    fail_silently=False,
-                )
+                emails.enqueue('two_factor_code', [request.user.email], {
+                    'user': request.user,
+                    'verification_code': verification_code,
+                }, reference=f'user:{request.user.pk}')
                 
                 if is_ajax:
                     return JsonResponse({
                         'success': True,
                         'message': f'Un code de vérification a été envoyé à {request.user.email}'
                     })
-            except Exception as e:
-                print(f"Erreur envoi email: {str(e)}")
+            except Exception:
+                logger.exception("Échec de l'envoi du code de vérification (utilisateur %s)", request.user.pk)
                 if is_ajax:
                     return JsonResponse({
                         'success': False,
@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from Hackerz.exports import ExportActionsMixin
 from .models import Category, Product, Cart, CartItem, Order, OrderItem, Review, Coupon
 
 
@@ -9,12 +11,14 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug', 'price', 'stock', 'available', 'created', 'updated', 'featured']
+class ProductAdmin(ExportActionsMixin, admin.ModelAdmin):
+    list_display = ['name', 'slug', 'price', 'stock', 'available', 'avg_rating', 'review_count', 'created', 'updated', 'featured']
     list_filter = ['available', 'created', 'updated', 'featured', 'category']
     list_editable = ['price', 'stock', 'available', 'featured']
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ['name', 'description']
+    actions = ['export_csv', 'export_jsonl']
+    export_name = 'products'
 
 
 @admin.register(Review)
@@ -23,6 +27,25 @@ class ReviewAdmin(admin.ModelAdmin):
     list_filter = ['active', 'rating', 'created']
     search_fields = ['title', 'comment', 'user__username', 'product__name']
     list_editable = ['active']
+    actions = ['activate_reviews', 'deactivate_reviews']
+    
+    def _set_active(self, queryset, active):
+        # update() n'envoie pas de signaux : recalculer les notes des produits concernés
+        # (Product.update_ratings invalide aussi les pages et l'API en cache)
+        product_ids = set(queryset.values_list('product_id', flat=True))
+        updated = queryset.update(active=active)
+        Product.update_ratings(product_ids)
+        return updated
+    
+    def activate_reviews(self, request, queryset):
+        updated = self._set_active(queryset, True)
+        self.message_user(request, f"{updated} avis ont été activés.")
+    activate_reviews.short_description = "Activer les avis sélectionnés"
+    
+    def deactivate_reviews(self, request, queryset):
+        updated = self._set_active(queryset, False)
+        self.message_user(request, f"{updated} avis ont été désactivés.")
+    deactivate_reviews.short_description = "Désactiver les avis sélectionnés"
 
 
 class OrderItemInline(admin.TabularInline):
@@ -32,12 +55,15 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ExportActionsMixin, admin.ModelAdmin):
     list_display = ['id', 'first_name', 'last_name', 'email', 'paid', 'status', 'created']
     list_filter = ['paid', 'status', 'created', 'updated']
     search_fields = ['first_name', 'last_name', 'email', 'address']
     inlines = [OrderItemInline]
     list_editable = ['paid', 'status']
+    date_hierarchy = 'created'
+    actions = ['export_csv', 'export_jsonl']
+    export_name = 'orders'
 
 
 @admin.register(Coupon)
@@ -4,4 +4,9 @@ from django.apps import AppConfig
 class HackerzECommerceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Hackerz_E_commerce'
-    verbose_name = 'E-commerce Hackerz' 
\ No newline at end of file
+    verbose_name = 'E-commerce Hackerz'
+
+    def ready(self):
+        import Hackerz_E_commerce.signals  # Importer les signaux au démarrage
+        import Hackerz_E_commerce.tasks  # Enregistrer les tâches d'arrière-plan
+        import Hackerz_E_commerce.exports  # Enregistrer les exports
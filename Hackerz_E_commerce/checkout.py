@@ -0,0 +1,123 @@
+"""
+Service de passage de commande.
+
+La commande est créée dans une seule transaction : le stock de tous les
+produits du panier est décrémenté par une seule requête UPDATE conditionnelle
+(``stock >= quantité`` pour chaque produit), les lignes de commande sont
+insérées avec bulk_create, les statistiques de ventes sont mises à jour
+(voir sales.py), puis le panier est vidé. Si un produit n'a plus
+assez de stock, rien n'est écrit et InsufficientStockError est levée.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, When
+
+from Hackerz import caching
+
+from . import listing_cache, sales
+from .models import CartItem, Order, OrderItem, Product
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCartError(CheckoutError):
+    pass
+
+
+@dataclass
+class OversoldLine:
+    product: Product
+    requested: int
+    available: int
+
+
+class InsufficientStockError(CheckoutError):
+    def __init__(self, lines):
+        self.lines = lines
+        super().__init__(self.message)
+
+    @property
+    def message(self):
+        details = ', '.join(
+            f"{line.product.name} ({line.available} disponible(s), {line.requested} demandé(s))"
+            for line in self.lines
+        )
+        return f"Stock insuffisant pour : {details}"
+
+
+class _StockConflict(Exception):
+    """Levée à l'intérieur du point de sauvegarde pour annuler la décrémentation."""
+
+
+def _cart_lines(cart):
+    """Regroupe les articles actifs du panier par produit (quantités cumulées)."""
+    lines = OrderedDict()
+    items = CartItem.objects.filter(cart=cart, active=True).select_related('product').order_by('product_id')
+    for item in items:
+        if item.product_id in lines:
+            lines[item.product_id][1] += item.quantity
+        else:
+            lines[item.product_id] = [item.product, item.quantity]
+    return lines
+
+
+def _reserve_stock(lines):
+    """Décrémente le stock de tous les produits en une requête ; False si un produit manque de stock."""
+    condition = Q()
+    whens = []
+    for product_id, (_, quantity) in lines.items():
+        condition |= Q(pk=product_id, stock__gte=quantity)
+        whens.append(When(pk=product_id, then=F('stock') - quantity))
+    updated = Product.objects.filter(condition).update(
+        stock=Case(*whens, default=F('stock'), output_field=IntegerField())
+    )
+    return updated == len(lines)
+
+
+def _oversold_lines(lines):
+    stocks = dict(Product.objects.filter(pk__in=lines.keys()).values_list('pk', 'stock'))
+    return [
+        OversoldLine(product, quantity, stocks.get(product_id, 0))
+        for product_id, (product, quantity) in lines.items()
+        if stocks.get(product_id, 0) < quantity
+    ]
+
+
+def place_order(cart, **order_fields):
+    """
+    Crée la commande correspondant au panier et retourne (commande, sous-total).
+
+    ``order_fields`` sont les champs de Order (user, nom, adresse, paid, status...).
+    """
+    with transaction.atomic():
+        lines = _cart_lines(cart)
+        if not lines:
+            raise EmptyCartError("Votre panier est vide.")
+
+        try:
+            with transaction.atomic():
+                if not _reserve_stock(lines):
+                    raise _StockConflict
+        except _StockConflict:
+            raise InsufficientStockError(_oversold_lines(lines)) from None
+        # Le stock exact n'est affiché que par la fiche des produits commandés
+        caching.bump_on_commit(*[listing_cache.product_namespace(product.slug) for product, _ in lines.values()])
+        # Un produit épuisé change aussi les listes et l'API en cache (« Rupture de stock »)
+        if Product.objects.filter(pk__in=lines.keys(), stock__lte=0).exists():
+            caching.bump_on_commit('shop', 'api')
+
+        order = Order.objects.create(**order_fields)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, price=product.price)
+            for product, quantity in lines.values()
+        ])
+        subtotal = sum(product.price * quantity for product, quantity in lines.values())
+        sales.record_order_placed(order)
+
+        CartItem.objects.filter(cart=cart, active=True).delete()
+        cart.update_summary()
+    return order, subtotal
@@ -0,0 +1,52 @@
+"""
+Exports de la boutique (voir Hackerz/exports.py) : produits et commandes.
+
+L'export des commandes produit une ligne par article commandé, précédée des
+colonnes de la commande (une ligne sans article pour une commande vide). Les
+articles sont préchargés par lot de CHUNK_SIZE commandes (une requête par
+lot), jamais commande par commande.
+"""
+from django.db.models import Prefetch
+
+from Hackerz.exports import CHUNK_SIZE, exporter
+
+from .models import Order, OrderItem, Product
+
+PRODUCT_FIELDS = (
+    'id', 'name', 'slug', 'category__name', 'vendor__shop_name', 'regular_price', 'price',
+    'stock', 'available', 'featured', 'avg_rating', 'review_count', 'created',
+)
+PRODUCT_COLUMNS = (
+    'id', 'name', 'slug', 'category', 'vendor', 'regular_price', 'price',
+    'stock', 'available', 'featured', 'avg_rating', 'review_count', 'created',
+)
+
+ORDER_COLUMNS = (
+    'order_id', 'created', 'first_name', 'last_name', 'email', 'address', 'postal_code', 'city',
+    'paid', 'status', 'order_total',
+)
+ITEM_COLUMNS = ('product_id', 'product_name', 'price', 'quantity', 'cost')
+
+
+@exporter('products', Product, columns=PRODUCT_COLUMNS)
+def product_rows(products):
+    return products.values_list(*PRODUCT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+
+
+@exporter('orders', Order, columns=ORDER_COLUMNS + ITEM_COLUMNS)
+def order_rows(orders):
+    items = OrderItem.objects.select_related('product').only(
+        'order_id', 'product_id', 'product__name', 'price', 'quantity',
+    ).order_by('pk')
+    orders = orders.prefetch_related(Prefetch('items', queryset=items))
+    for order in orders.iterator(chunk_size=CHUNK_SIZE):
+        order_items = order.items.all()
+        total = sum(item.get_cost() for item in order_items)
+        columns = (
+            order.pk, order.created, order.first_name, order.last_name, order.email, order.address,
+            order.postal_code, order.city, order.paid, order.status, total,
+        )
+        if not order_items:
+            yield columns + (None,) * len(ITEM_COLUMNS)
+        for item in order_items:
+            yield columns + (item.product_id, item.product.name, item.price, item.quantity, item.get_cost())
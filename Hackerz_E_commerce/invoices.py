@@ -0,0 +1,164 @@
+"""
+Moteur unique de génération des factures PDF.
+
+Chaque facture est rendue une seule fois par version de la commande : le
+fichier est stocké (stockage par défaut, dossier ``invoices/<id commande>/``)
+sous un nom dérivé de ``Order.updated``. Les téléchargements suivants lisent
+le fichier existant ; une modification de la commande change le nom attendu,
+la facture est alors régénérée et l'ancienne version supprimée.
+
+Le gabarit ``shop/invoice_pdf.html`` est compilé une seule fois par processus.
+Pour générer un grand nombre de factures, ``render_invoices`` répartit le
+travail dans un pool de processus (commande ``render_invoices``).
+"""
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from functools import lru_cache
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connections
+from django.template.loader import get_template
+from xhtml2pdf import pisa
+
+from Hackerz import outbox
+
+from .models import Order
+
+INVOICE_TEMPLATE = 'shop/invoice_pdf.html'
+INVOICE_DIR = 'invoices'
+TAX_RATE = Decimal('0.2')  # TVA à 20%
+SHIPPING = Decimal('5.99')  # Frais de livraison fixes
+# Source de pièce jointe de la boîte d'envoi (voir Hackerz/outbox.py)
+INVOICE_ATTACHMENT = 'shop.invoice'
+
+
+class InvoiceError(Exception):
+    pass
+
+
+def order_totals(order_items):
+    """Sous-total, TVA, frais de livraison et total d'une commande."""
+    subtotal = sum((item.price * item.quantity for item in order_items), Decimal('0'))
+    tax = subtotal * TAX_RATE
+    return subtotal, tax, SHIPPING, subtotal + tax + SHIPPING
+
+
+@lru_cache(maxsize=None)
+def _template():
+    return get_template(INVOICE_TEMPLATE)
+
+
+def version(order):
+    """Identifiant de la version de la commande (sert de nom de fichier et d'ETag)."""
+    return order.updated.strftime('%Y%m%d%H%M%S%f')
+
+
+def etag(order):
+    return f'"invoice-{order.id}-{version(order)}"'
+
+
+def invoice_filename(order):
+    """Nom du fichier proposé au téléchargement."""
+    return f"facture_{order.id}.pdf"
+
+
+def storage_name(order):
+    return posixpath.join(INVOICE_DIR, str(order.id), f'{version(order)}.pdf')
+
+
+def render_pdf(order):
+    """Rend la facture de la commande et retourne le contenu du PDF."""
+    order_items = list(order.items.select_related('product'))
+    subtotal, tax, shipping, total = order_totals(order_items)
+    context = {
+        'order': order,
+        'order_items': order_items,
+        # Numéro et date dérivés de la commande : la facture est stable d'un rendu à l'autre
+        'invoice_number': f"INV-{order.id}-{order.created.strftime('%Y%m%d')}",
+        'invoice_date': order.created.strftime('%d/%m/%Y'),
+        'subtotal': f"{subtotal:.2f}",
+        'tax': f"{tax:.2f}",
+        'shipping': f"{shipping:.2f}",
+        'total': f"{total:.2f}",
+    }
+    html = _template().render(context)
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html.encode('UTF-8')), result)
+    if pdf.err:
+        raise InvoiceError(f"Erreur lors de la génération de la facture de la commande #{order.id}")
+    return result.getvalue()
+
+
+def _remove_old_versions(order, current):
+    directory = posixpath.join(INVOICE_DIR, str(order.id))
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        path = posixpath.join(directory, name)
+        if path != current:
+            default_storage.delete(path)
+
+
+def get_invoice(order, force=False):
+    """
+    Retourne le nom, dans le stockage, de la facture à jour de la commande ;
+    la facture n'est rendue que si cette version n'existe pas encore.
+    """
+    name = storage_name(order)
+    if not force and default_storage.exists(name):
+        return name
+    content = render_pdf(order)
+    if force:
+        default_storage.delete(name)
+    saved = default_storage.save(name, ContentFile(content))
+    if saved != name:
+        # Rendu concurrent de la même version : garder le premier fichier
+        default_storage.delete(saved)
+    _remove_old_versions(order, name)
+    return name
+
+
+def open_invoice(order):
+    """Fichier de la facture à jour, ouvert en lecture binaire."""
+    return default_storage.open(get_invoice(order), 'rb')
+
+
+def read_invoice(order):
+    with open_invoice(order) as f:
+        return f.read()
+
+
+@outbox.attachment_source(INVOICE_ATTACHMENT)
+def invoice_attachment(order_id):
+    """Pièce jointe d'email : facture à jour de la commande, lue au moment de l'envoi."""
+    return read_invoice(Order.objects.get(pk=order_id))
+
+
+def _render_in_worker(order_id, force):
+    close_old_connections()
+    try:
+        order = Order.objects.get(pk=order_id)
+        return order_id, get_invoice(order, force=force), None
+    except Exception as exc:
+        return order_id, None, str(exc)
+
+
+def render_invoices(order_ids, workers=None, force=False):
+    """
+    Génère les factures des commandes données dans un pool de processus ;
+    produit un tuple (id commande, nom du fichier, erreur) par commande.
+    """
+    order_ids = list(order_ids)
+    if workers == 1:
+        for order_id in order_ids:
+            yield _render_in_worker(order_id, force)
+        return
+    # Les processus fils ne doivent pas hériter des connexions ouvertes
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_render_in_worker, order_ids, [force] * len(order_ids), chunksize=8)
@@ -0,0 +1,79 @@
+"""
+Cache de la grille de produits des listes de la boutique (shop, category_view).
+
+Pour les visiteurs anonymes, le fragment HTML (grille et pagination) est mis
+en cache dans l'espace de noms « shop » du cache applicatif (Hackerz/caching.py)
+sous une clé formée du chemin de la liste (boutique ou catégorie) et des
+paramètres qui déterminent la grille (LISTING_PARAMS : q, sort, page,
+cursor) ; les autres paramètres (suivi de campagne, cache-busting...) ne
+créent pas de nouvelle entrée et ne sont pas repris dans les liens de la
+grille. Sur un succès, ni la recherche, ni la requête paginée, ni le rendu ne
+sont exécutés.
+
+La version de l'espace « shop » est incrémentée par les signaux des produits,
+des catégories et des avis (voir Hackerz/signals.py) et quand une commande
+épuise le stock d'un produit, ce qui invalide d'un coup toutes les pages en
+cache. La fiche d'un produit, qui affiche son stock exact, a en plus sa
+propre version (product_version), incrémentée par chaque commande du produit. Les utilisateurs connectés voient des boutons qui leur sont propres
+(« Votre produit ») : leur grille est toujours rendue.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from Hackerz import caching
+from Hackerz.pagination import paginate_listing
+
+GRID_TEMPLATE = 'shop/includes/product_grid.html'
+# Durée de vie d'un fragment (secondes) ; l'invalidation se fait par la version
+TIMEOUT = getattr(settings, 'LISTING_CACHE_TIMEOUT', 300)
+# Paramètres GET lus par la liste (_product_listing, paginate_listing)
+LISTING_PARAMS = ('q', 'sort', 'page', 'cursor')
+
+
+def product_namespace(slug):
+    """Espace de noms de la fiche d'un produit (version propre au produit)."""
+    return f'shop:product:{slug}'
+
+
+def product_version(slug):
+    return caching.get_version(product_namespace(slug))
+
+
+def listing_params(request):
+    """[(nom, valeur)] des paramètres LISTING_PARAMS présents (dernière valeur, comme request.GET.get)."""
+    return [(name, request.GET[name]) for name in LISTING_PARAMS if name in request.GET]
+
+
+def fragment_key(request):
+    # Le chemin identifie la liste (boutique, catégorie) ; les paramètres le filtre, le tri et la page
+    return ('grid', hashlib.md5(repr((request.path, listing_params(request))).encode('utf-8')).hexdigest())
+
+
+def _pagination_query(request):
+    # Liens de pagination : mêmes paramètres que la clé, sans ceux de pagination
+    encoded = urlencode([(name, value) for name, value in listing_params(request) if name not in ('page', 'cursor')])
+    return f'{encoded}&' if encoded else ''
+
+
+def product_grid(request, build_queryset, per_page):
+    """
+    Retourne le HTML de la grille de produits de la page demandée.
+
+    ``build_queryset`` construit la requête filtrée et triée ; elle n'est
+    appelée que si le fragment doit être rendu.
+    """
+    def render():
+        products = paginate_listing(request, build_queryset(), per_page)
+        return render_to_string(GRID_TEMPLATE, {
+            'products': products,
+            'pagination_query': _pagination_query(request),
+            'user': request.user,
+        })
+
+    if request.user.is_authenticated or not TIMEOUT:
+        return mark_safe(render())
+    return mark_safe(caching.get_or_compute('shop', fragment_key(request), render, TIMEOUT))
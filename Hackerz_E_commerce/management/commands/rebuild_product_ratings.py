@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from Hackerz_E_commerce.models import Product
+
+
+class Command(BaseCommand):
+    help = "Recalcule la note moyenne et le nombre d'avis de chaque produit à partir des avis actifs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Produits à recalculer (tous par défaut)')
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options['slugs']:
+            products = products.filter(slug__in=options['slugs'])
+        updated = Product.update_ratings(products)
+        self.stdout.write(self.style.SUCCESS(f"Notes recalculées pour {updated} produit(s)."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from Hackerz_E_commerce import search
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des produits"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Base de données à utiliser')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        backend = search.get_backend(using)
+        self.stdout.write(f"Reconstruction de l'index ({type(backend).__name__})...")
+        search.rebuild_index(using)
+        self.stdout.write(self.style.SUCCESS("Index de recherche reconstruit avec succès."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from Hackerz_E_commerce import sales
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques de ventes (produits, vendeurs, jours) à partir des commandes et corrige les écarts"
+
+    def handle(self, *args, **options):
+        fixed = sales.reconcile()
+        for table, count in fixed.items():
+            self.stdout.write(f"{table} : {count} ligne(s) corrigée(s)")
+        self.stdout.write(self.style.SUCCESS("Statistiques de ventes réconciliées."))
@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from Hackerz_E_commerce import invoices
+from Hackerz_E_commerce.models import Order
+
+
+class Command(BaseCommand):
+    help = "Génère à l'avance les factures PDF des commandes, dans un pool de processus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('order_ids', nargs='*', type=int, help='Commandes à traiter (toutes les commandes payées par défaut)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Nombre de processus de rendu')
+        parser.add_argument('--force', action='store_true', help='Refaire le rendu même si la facture existe déjà')
+
+    def handle(self, *args, **options):
+        order_ids = options['order_ids']
+        if not order_ids:
+            order_ids = list(Order.objects.filter(paid=True).order_by('pk').values_list('pk', flat=True))
+
+        rendered = failed = 0
+        for order_id, name, error in invoices.render_invoices(order_ids, options['workers'], options['force']):
+            if error:
+                failed += 1
+                self.stderr.write(f"Commande #{order_id} : {error}")
+            else:
+                rendered += 1
+        self.stdout.write(self.style.SUCCESS(f"{rendered} facture(s) à jour, {failed} erreur(s)."))
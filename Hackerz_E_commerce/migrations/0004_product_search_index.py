@@ -0,0 +1,48 @@
+from django.db import migrations
+
+FTS_TABLE = "shop_product_fts"
+
+
+def fts5_supported(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        options = {row[0] for row in cursor.fetchall()}
+    return "ENABLE_FTS5" in options
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if not fts5_supported(connection):
+        # Les autres moteurs utilisent l'index en mémoire (voir search.py)
+        return
+    Product = apps.get_model("Hackerz_E_commerce", "Product")
+    Category = apps.get_model("Hackerz_E_commerce", "Category")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, description, category, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) "
+            f"SELECT p.id, p.name, p.description, c.name "
+            f"FROM {Product._meta.db_table} p JOIN {Category._meta.db_table} c ON c.id = p.category_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("Hackerz_E_commerce", "0003_alter_product_image"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
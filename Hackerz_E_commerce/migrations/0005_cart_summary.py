@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:08
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_cart_summaries(apps, schema_editor):
+    """Calcule le résumé des paniers existants."""
+    Cart = apps.get_model('Hackerz_E_commerce', 'Cart')
+    CartItem = apps.get_model('Hackerz_E_commerce', 'CartItem')
+    db_alias = schema_editor.connection.alias
+    money = DecimalField(max_digits=12, decimal_places=2)
+    items = CartItem.objects.using(db_alias).filter(cart=OuterRef('pk'), active=True).order_by().values('cart')
+    Cart.objects.using(db_alias).update(
+        item_count=Coalesce(Subquery(items.annotate(value=Sum('quantity')).values('value')), 0),
+        total=Coalesce(
+            Subquery(items.annotate(value=Sum(F('quantity') * F('product__price'), output_field=money)).values('value')),
+            Value(0),
+            output_field=money,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hackerz_E_commerce', '0004_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(fill_cart_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hackerz_E_commerce', '0005_cart_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='description_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
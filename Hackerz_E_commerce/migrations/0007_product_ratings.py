@@ -0,0 +1,48 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:24
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_product_ratings(apps, schema_editor):
+    """Calcule les notes des produits existants à partir des avis actifs."""
+    Product = apps.get_model('Hackerz_E_commerce', 'Product')
+    Review = apps.get_model('Hackerz_E_commerce', 'Review')
+    db_alias = schema_editor.connection.alias
+    reviews = Review.objects.using(db_alias).filter(product=OuterRef('pk'), active=True).order_by().values('product')
+    Product.objects.using(db_alias).update(
+        review_count=Coalesce(Subquery(reviews.annotate(value=Count('pk')).values('value')), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(value=Sum('rating')).values('value')), 0),
+        avg_rating=Coalesce(
+            Subquery(reviews.annotate(value=Avg('rating')).values('value')),
+            Value(0.0),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hackerz_E_commerce', '0006_product_description_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='avg_rating',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_product_ratings, migrations.RunPython.noop),
+    ]
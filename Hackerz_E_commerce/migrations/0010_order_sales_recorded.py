@@ -0,0 +1,73 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:21
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Sum
+from django.utils import timezone
+
+# Statuts exclus des statistiques (sales.EXCLUDED_STATUSES au moment de la migration)
+EXCLUDED_STATUSES = ('cancelled',)
+
+
+def fill_sales_stats(apps, schema_editor):
+    """
+    Point de départ des statistiques de ventes : les tables sont recalculées à
+    partir des lignes des commandes non annulées (y compris celles passées
+    avant la migration 0008, ou créées depuis l'admin et l'API), qui sont
+    marquées comme comptées.
+    """
+    Order = apps.get_model('Hackerz_E_commerce', 'Order')
+    OrderItem = apps.get_model('Hackerz_E_commerce', 'OrderItem')
+    ProductSales = apps.get_model('Hackerz_E_commerce', 'ProductSales')
+    VendorSales = apps.get_model('Hackerz_E_commerce', 'VendorSales')
+    DailyProductSales = apps.get_model('Hackerz_E_commerce', 'DailyProductSales')
+    db_alias = schema_editor.connection.alias
+
+    items = OrderItem.objects.using(db_alias).exclude(order__status__in=EXCLUDED_STATUSES).order_by()
+    totals = {
+        'units': Sum('quantity'),
+        'revenue_total': Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        'orders': Count('order', distinct=True),
+    }
+    for model in (ProductSales, VendorSales, DailyProductSales):
+        model.objects.using(db_alias).all().delete()
+
+    ProductSales.objects.using(db_alias).bulk_create([
+        ProductSales(product_id=row['product_id'], units_sold=row['units'], revenue=row['revenue_total'], order_count=row['orders'])
+        for row in items.values('product_id').annotate(**totals)
+    ], batch_size=500)
+    VendorSales.objects.using(db_alias).bulk_create([
+        VendorSales(vendor_id=row['product__vendor_id'], units_sold=row['units'], revenue=row['revenue_total'], order_count=row['orders'])
+        for row in items.filter(product__vendor__isnull=False).values('product__vendor_id').annotate(**totals)
+    ], batch_size=500)
+
+    # Le jour dépend du fuseau local : regroupement en Python sur (produit, date de commande)
+    daily = defaultdict(lambda: [0, Decimal('0')])
+    for product_id, created, quantity, price in items.values_list('product_id', 'order__created', 'quantity', 'price').iterator():
+        day_totals = daily[(product_id, timezone.localdate(created))]
+        day_totals[0] += quantity
+        day_totals[1] += price * quantity
+    DailyProductSales.objects.using(db_alias).bulk_create([
+        DailyProductSales(product_id=product_id, day=day, units_sold=units, revenue=revenue)
+        for (product_id, day), (units, revenue) in daily.items()
+    ], batch_size=500)
+
+    Order.objects.using(db_alias).exclude(status__in=EXCLUDED_STATUSES).update(sales_recorded=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hackerz_E_commerce', '0009_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='sales_recorded',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(fill_sales_stats, migrations.RunPython.noop),
+    ]
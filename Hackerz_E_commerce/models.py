@@ -1,12 +1,15 @@
 from django.db import models
+from django.db.models.functions import Cast, Coalesce
 from django.urls import reverse
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
-import markdown
 import re
 
+from Hackerz import caching, markdown_render
+from Hackerz.model_mixins import CounterFieldsMixin
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -29,13 +32,16 @@ class Category(models.Model):
         super().save(*args, **kwargs)
 
 
-class Product(models.Model):
+class Product(CounterFieldsMixin, models.Model):
     vendor = models.ForeignKey('Hackerz.Vendor', on_delete=models.CASCADE, related_name='products', null=True, blank=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     name = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     image = models.ImageField(upload_to='products/%Y/%m/%d/', blank=True, null=True)
     description = models.TextField(blank=True)
+    # Rendu HTML de la description, recalculé quand son empreinte change
+    description_html = models.TextField(blank=True, editable=False)
+    description_hash = models.CharField(max_length=64, blank=True, editable=False)
     regular_price = models.DecimalField(max_digits=10, decimal_places=2)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.IntegerField(default=0)
@@ -43,9 +49,26 @@ class Product(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     featured = models.BooleanField(default=False)
+    # Notes des avis actifs, dénormalisées et tenues à jour par les signaux de Review
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False)
+    
+    # Champs modifiés uniquement par requête UPDATE (voir apply_rating_delta)
+    COUNTER_FIELDS = ('review_count', 'rating_sum', 'avg_rating')
     
     class Meta:
         ordering = ('name',)
+        # Index partiels : un filtre booléen est compilé en « WHERE available »,
+        # que SQLite ne sait pas utiliser comme préfixe d'un index composite
+        indexes = [
+            # Catalogue (shop) : produits disponibles triés par nom
+            models.Index(fields=['name'], condition=models.Q(available=True), name='shop_product_avail_name_idx'),
+            # Page d'une catégorie
+            models.Index(fields=['category', 'name'], condition=models.Q(available=True), name='shop_product_cat_avail_idx'),
+            # Produits mis en avant (accueil, boutique)
+            models.Index(fields=['name'], condition=models.Q(featured=True, available=True), name='shop_product_featured_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -56,8 +79,58 @@ class Product(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        update_fields = kwargs.get('update_fields')
+        # Ne refaire le rendu Markdown que si la description a changé
+        if update_fields is None or 'description' in update_fields:
+            if self.render_description() and update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'description_html', 'description_hash'}
         super().save(*args, **kwargs)
     
+    @classmethod
+    def apply_rating_delta(cls, product_id, count, total):
+        """
+        Ajoute ``count`` avis et ``total`` points (négatifs pour un retrait)
+        aux notes du produit, en une seule requête UPDATE.
+        """
+        new_count = models.F('review_count') + count
+        new_sum = models.F('rating_sum') + total
+        return cls.objects.filter(pk=product_id).update(
+            review_count=new_count,
+            rating_sum=new_sum,
+            avg_rating=models.Case(
+                models.When(review_count__gt=-count, then=models.ExpressionWrapper(
+                    Cast(new_sum, models.FloatField()) / new_count, output_field=models.FloatField()
+                )),
+                default=models.Value(0.0),
+                output_field=models.DecimalField(max_digits=3, decimal_places=2),
+            ),
+        )
+    
+    @classmethod
+    def update_ratings(cls, products=None):
+        """
+        Recalcule les notes des produits donnés (queryset, liste d'ids ou
+        d'objets ; tous par défaut) à partir des avis actifs, en une requête UPDATE.
+        """
+        if products is None:
+            products = cls.objects.all()
+        elif not isinstance(products, models.QuerySet):
+            products = cls.objects.filter(pk__in=[getattr(product, 'pk', product) for product in products])
+        reviews = Review.objects.filter(product=models.OuterRef('pk'), active=True).order_by().values('product')
+        review_count = reviews.annotate(value=models.Count('pk')).values('value')
+        rating_sum = reviews.annotate(value=models.Sum('rating')).values('value')
+        avg_rating = reviews.annotate(value=models.Avg('rating')).values('value')
+        # update() n'envoie pas de signaux : invalider les pages et l'API en cache
+        caching.bump_on_commit('shop', 'api')
+        return products.update(
+            review_count=Coalesce(models.Subquery(review_count), 0),
+            rating_sum=Coalesce(models.Subquery(rating_sum), 0),
+            avg_rating=Coalesce(
+                models.Subquery(avg_rating), models.Value(0.0),
+                output_field=models.DecimalField(max_digits=3, decimal_places=2)
+            ),
+        )
+    
     def formatted_description(self):
         """
         Retourne la description formatée en HTML à partir du Markdown
@@ -66,17 +139,28 @@ class Product(models.Model):
         if not self.description:
             return ''
         
-        # Configuration du parser Markdown avec les extensions
-        md = markdown.Markdown(extensions=[
-            'markdown.extensions.fenced_code',  # Pour les blocs de code avec ```
-            'markdown.extensions.codehilite',   # Pour la coloration syntaxique
-            'markdown.extensions.tables',       # Pour les tableaux
-            'markdown.extensions.nl2br',        # Convertir les retours à la ligne en <br>
-            'markdown.extensions.extra',        # Fonctionnalités supplémentaires
-        ])
+        # HTML pré-rendu à jour : rien à recalculer
+        description_hash = markdown_render.content_hash(self.description)
+        if self.description_hash == description_hash:
+            return self.description_html
+        
+        # Produit antérieur au cache : rendre puis enregistrer le résultat
+        self.render_description()
+        if self.pk:
+            Product.objects.filter(pk=self.pk).update(
+                description_html=self.description_html,
+                description_hash=self.description_hash,
+            )
+        return self.description_html
+    
+    def render_description(self):
+        """Recalcule description_html si la description a changé depuis le dernier rendu."""
+        description_hash = markdown_render.content_hash(self.description)
+        if self.description_hash == description_hash:
+            return False
         
         # Amélioration du formatage pour les titres
-        content = self.description
+        content = self.description or ''
         
         # Structurer le contenu avec des espaces autour des titres
         content = content.replace("\n##", "\n\n##")
@@ -89,19 +173,10 @@ class Product(models.Model):
         # Améliorer les blocs de code
         content = re.sub(r'```\n', r'```text\n', content)
         
-        # Convertir Markdown en HTML
-        html = md.convert(content)
-        
-        # Améliorer le style des blocs de code
-        html = re.sub(r'<pre><code>(.*?)</code></pre>', r'<pre class="code-block"><code>\1</code></pre>', html, flags=re.DOTALL)
-        
-        # Améliorer les listes à puces
-        html = re.sub(r'<ul>\s*<li>', r'<ul class="styled-list">\n<li>', html)
-        
-        # Améliorer les listes numérotées
-        html = re.sub(r'<ol>\s*<li>', r'<ol class="styled-list">\n<li>', html)
-        
-        return html
+        # Convertir Markdown en HTML et appliquer le style du site
+        self.description_html = markdown_render.style_html(markdown_render.to_html(content)) if content else ''
+        self.description_hash = description_hash
+        return True
 
 
 class Review(models.Model):
@@ -119,17 +194,54 @@ class Review(models.Model):
     
     def __str__(self):
         return f'Avis de {self.user.username} sur {self.product.name}'
+    
+    def rating_contribution(self):
+        """(produit, note) pris en compte dans les notes du produit, ou None si l'avis est inactif."""
+        if not self.active:
+            return None
+        return self.product_id, self.rating
 
 
 class Cart(models.Model):
-    cart_id = models.CharField(max_length=250, blank=True)
+    # Recherché à chaque requête (panier de la session)
+    cart_id = models.CharField(max_length=250, blank=True, db_index=True)
     date_added = models.DateTimeField(auto_now_add=True)
+    # Résumé dénormalisé du panier (badge de navigation), voir update_summary()
+    item_count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     
     class Meta:
         ordering = ['date_added']
     
     def __str__(self):
         return self.cart_id
+    
+    @classmethod
+    def update_summaries(cls, carts):
+        """
+        Recalcule le nombre d'articles et le total des paniers donnés
+        (queryset, liste d'ids ou d'objets) en une seule requête UPDATE.
+        """
+        if not isinstance(carts, models.QuerySet):
+            carts = cls.objects.filter(pk__in=[getattr(cart, 'pk', cart) for cart in carts])
+        items = CartItem.objects.filter(cart=models.OuterRef('pk'), active=True).order_by().values('cart')
+        item_count = items.annotate(value=models.Sum('quantity')).values('value')
+        total = items.annotate(
+            value=models.Sum(models.F('quantity') * models.F('product__price'),
+                             output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        ).values('value')
+        return carts.update(
+            item_count=Coalesce(models.Subquery(item_count), 0),
+            total=Coalesce(
+                models.Subquery(total), models.Value(0),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            ),
+        )
+    
+    def update_summary(self):
+        """Met à jour item_count et total après une modification des articles."""
+        self.update_summaries(Cart.objects.filter(pk=self.pk))
+        self.item_count, self.total = Cart.objects.filter(pk=self.pk).values_list('item_count', 'total').get()
 
 
 class CartItem(models.Model):
@@ -138,6 +250,12 @@ class CartItem(models.Model):
     quantity = models.IntegerField()
     active = models.BooleanField(default=True)
     
+    class Meta:
+        indexes = [
+            # Articles actifs d'un panier
+            models.Index(fields=['cart'], condition=models.Q(active=True), name='shop_cartitem_cart_active_idx'),
+        ]
+    
     def sub_total(self):
         return self.product.price * self.quantity
     
@@ -145,7 +263,7 @@ class CartItem(models.Model):
         return self.product.name
 
 
-class Order(models.Model):
+class Order(CounterFieldsMixin, models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
         ('processing', 'Processing'),
@@ -165,9 +283,19 @@ class Order(models.Model):
     updated = models.DateTimeField(auto_now=True)
     paid = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Lignes de la commande comptées dans les statistiques de ventes (voir sales.py)
+    sales_recorded = models.BooleanField(default=False, editable=False)
+    
+    # Champs modifiés uniquement par requête UPDATE (voir sales.record_order)
+    COUNTER_FIELDS = ('sales_recorded',)
     
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            # Historique des commandes d'un client (profil, tableau de bord)
+            models.Index(fields=['user', '-created'], name='shop_order_user_created_idx'),
+            models.Index(fields=['email', '-created'], name='shop_order_email_created_idx'),
+        ]
     
     def __str__(self):
         return f'Order {self.id}'
@@ -240,4 +368,54 @@ class Coupon(models.Model):
     def apply_discount(self, total):
         """Applique la réduction et retourne le nouveau total"""
         discount = self.calculate_discount(total)
-        return total - discount, discount
\ No newline at end of file
+        return total - discount, discount
+
+class ProductSales(models.Model):
+    """Ventes cumulées d'un produit (commandes non annulées), voir sales.py."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='sales')
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Ventes du produit'
+        verbose_name_plural = 'Ventes des produits'
+    
+    def __str__(self):
+        return f'Ventes de {self.product_id}'
+
+
+class VendorSales(models.Model):
+    """Ventes cumulées de tous les produits d'un vendeur, voir sales.py."""
+    vendor = models.OneToOneField('Hackerz.Vendor', on_delete=models.CASCADE, primary_key=True, related_name='sales')
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Ventes du vendeur'
+        verbose_name_plural = 'Ventes des vendeurs'
+    
+    def __str__(self):
+        return f'Ventes du vendeur {self.vendor_id}'
+
+
+class DailyProductSales(models.Model):
+    """Ventes d'un produit pour un jour donné (date de la commande), voir sales.py."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    day = models.DateField()
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ('-day',)
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='unique_daily_product_sales'),
+        ]
+        verbose_name = 'Ventes journalières du produit'
+        verbose_name_plural = 'Ventes journalières des produits'
+    
+    def __str__(self):
+        return f'Ventes de {self.product_id} le {self.day}'
@@ -0,0 +1,181 @@
+"""
+Statistiques de ventes matérialisées pour les tableaux de bord vendeurs.
+
+Trois tables sont tenues à jour au fil des commandes :
+
+* ProductSales : unités vendues, chiffre d'affaires et nombre de commandes
+  par produit ;
+* VendorSales : les mêmes totaux par vendeur ;
+* DailyProductSales : unités et chiffre d'affaires par produit et par jour
+  (date de la commande).
+
+Une commande est comptée tant qu'elle n'est pas annulée : ses lignes sont
+ajoutées quand elle est passée (checkout.place_order) et retirées quand elle
+est annulée ou supprimée (signaux de Order). Order.sales_recorded indique si
+ses lignes sont comptées : une commande n'est jamais ajoutée deux fois, ni
+retirée sans avoir été ajoutée (commandes créées depuis l'admin ou l'API). Chaque mise à jour se fait en
+un nombre constant de requêtes (insertion des lignes manquantes puis un
+UPDATE avec CASE par table), quelle que soit la taille de la commande.
+
+La commande ``reconcile_sales_stats`` recalcule les tables depuis les lignes
+de commande et corrige les écarts.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Q, Sum, Count, When
+from django.utils import timezone
+
+from .models import DailyProductSales, Order, OrderItem, ProductSales, VendorSales
+
+# Statuts de commande exclus des statistiques
+EXCLUDED_STATUSES = ('cancelled',)
+# Nombre maximum de lignes modifiées par requête UPDATE
+BATCH_SIZE = 200
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+FIELD_TYPES = {
+    'units_sold': IntegerField(),
+    'order_count': IntegerField(),
+    'revenue': MONEY,
+}
+
+
+def is_counted(order):
+    return order.status not in EXCLUDED_STATUSES
+
+
+def _increment(model, rows):
+    """
+    Ajoute des valeurs aux compteurs de plusieurs lignes de ``model``.
+
+    ``rows`` associe à chaque clé (tuple de paires (champ, valeur) identifiant la
+    ligne) un dictionnaire {compteur: valeur à ajouter}.
+    """
+    rows = {key: deltas for key, deltas in rows.items() if any(deltas.values())}
+    if len(rows) > BATCH_SIZE:
+        # La condition OR de l'UPDATE doit rester de taille raisonnable (SQLite limite sa profondeur)
+        keys = list(rows)
+        for start in range(0, len(keys), BATCH_SIZE):
+            _increment(model, {key: rows[key] for key in keys[start:start + BATCH_SIZE]})
+        return
+    if not rows:
+        return
+    # Créer les lignes manquantes (compteurs à zéro), sans toucher aux autres
+    model.objects.bulk_create([model(**dict(key)) for key in rows], ignore_conflicts=True)
+
+    condition = Q()
+    for key in rows:
+        condition |= Q(**dict(key))
+    fields = {field for deltas in rows.values() for field in deltas}
+    updates = {
+        field: Case(
+            *[When(Q(**dict(key)), then=F(field) + deltas[field]) for key, deltas in rows.items() if deltas.get(field)],
+            default=F(field),
+            output_field=FIELD_TYPES[field],
+        )
+        for field in fields
+    }
+    model.objects.filter(condition).update(**updates)
+
+
+def _order_lines(order):
+    return OrderItem.objects.filter(order=order).values_list('product_id', 'product__vendor_id', 'quantity', 'price')
+
+
+def record_order(order, sign=1):
+    """Ajoute (sign=1) ou retire (sign=-1) les lignes de la commande des statistiques."""
+    day = timezone.localdate(order.created) if order.created else timezone.localdate()
+    products = defaultdict(lambda: {'units_sold': 0, 'revenue': Decimal('0'), 'order_count': 0})
+    vendors = defaultdict(lambda: {'units_sold': 0, 'revenue': Decimal('0'), 'order_count': 0})
+    for product_id, vendor_id, quantity, price in _order_lines(order):
+        revenue = price * quantity
+        for totals in [products[product_id]] + ([vendors[vendor_id]] if vendor_id else []):
+            totals['units_sold'] += sign * quantity
+            totals['revenue'] += sign * revenue
+    # Une commande compte une fois par produit et par vendeur, même sur plusieurs lignes
+    for totals in [*products.values(), *vendors.values()]:
+        totals['order_count'] = sign
+
+    with transaction.atomic():
+        # Marquer la commande d'abord : un seul ajout, et un retrait seulement après un ajout
+        if not Order.objects.filter(pk=order.pk, sales_recorded=sign < 0).update(sales_recorded=sign > 0):
+            return
+        order.sales_recorded = sign > 0
+        _increment(ProductSales, {(('product_id', pk),): totals for pk, totals in products.items()})
+        _increment(VendorSales, {(('vendor_id', pk),): totals for pk, totals in vendors.items()})
+        _increment(DailyProductSales, {
+            (('product_id', pk), ('day', day)): {'units_sold': totals['units_sold'], 'revenue': totals['revenue']}
+            for pk, totals in products.items()
+        })
+
+
+def record_order_placed(order):
+    record_order(order, 1)
+
+
+def record_order_cancelled(order):
+    record_order(order, -1)
+
+
+def expected_stats():
+    """Statistiques recalculées à partir des lignes de commande (pour la réconciliation)."""
+    items = OrderItem.objects.exclude(order__status__in=EXCLUDED_STATUSES).order_by()
+    revenue = Sum(F('price') * F('quantity'), output_field=MONEY)
+
+    products = {
+        row['product_id']: {'units_sold': row['units'], 'revenue': row['revenue'], 'order_count': row['orders']}
+        for row in items.values('product_id').annotate(units=Sum('quantity'), revenue=revenue, orders=Count('order', distinct=True))
+    }
+    vendors = {
+        row['product__vendor_id']: {'units_sold': row['units'], 'revenue': row['revenue'], 'order_count': row['orders']}
+        for row in items.filter(product__vendor__isnull=False).values('product__vendor_id')
+        .annotate(units=Sum('quantity'), revenue=revenue, orders=Count('order', distinct=True))
+    }
+    daily = defaultdict(lambda: {'units_sold': 0, 'revenue': Decimal('0')})
+    # Le jour dépend du fuseau local : regroupement en Python sur (produit, date de commande)
+    for product_id, created, quantity, price in items.values_list('product_id', 'order__created', 'quantity', 'price').iterator():
+        totals = daily[(product_id, timezone.localdate(created))]
+        totals['units_sold'] += quantity
+        totals['revenue'] += price * quantity
+    return products, vendors, dict(daily)
+
+
+def _reconcile_table(model, key_fields, expected, fields):
+    """Aligne la table sur les valeurs attendues ; retourne le nombre de lignes corrigées."""
+    stored = {
+        tuple(row[:len(key_fields)]): dict(zip(fields, row[len(key_fields):]))
+        for row in model.objects.values_list(*key_fields, *fields)
+    }
+    zero = dict.fromkeys(fields, 0)
+    fixes = {}
+    for key in stored.keys() | expected.keys():
+        wanted = expected.get(key, zero)
+        current = stored.get(key, zero)
+        deltas = {field: wanted[field] - current[field] for field in fields if wanted[field] != current[field]}
+        if deltas:
+            fixes[tuple(zip(key_fields, key))] = deltas
+    _increment(model, fixes)
+    return len(fixes)
+
+
+def reconcile():
+    """
+    Recalcule les trois tables et corrige les écarts ; retourne le nombre de
+    lignes corrigées par table. Toutes les commandes non annulées sont
+    ensuite considérées comme comptées.
+    """
+    fields = ('units_sold', 'revenue', 'order_count')
+    with transaction.atomic():
+        marked = (
+            Order.objects.exclude(status__in=EXCLUDED_STATUSES).filter(sales_recorded=False).update(sales_recorded=True)
+            + Order.objects.filter(status__in=EXCLUDED_STATUSES, sales_recorded=True).update(sales_recorded=False)
+        )
+        products, vendors, daily = expected_stats()
+        return {
+            'commandes': marked,
+            'produits': _reconcile_table(ProductSales, ('product_id',), {(k,): v for k, v in products.items()}, fields),
+            'vendeurs': _reconcile_table(VendorSales, ('vendor_id',), {(k,): v for k, v in vendors.items()}, fields),
+            'jours': _reconcile_table(DailyProductSales, ('product_id', 'day'), daily, ('units_sold', 'revenue')),
+        }
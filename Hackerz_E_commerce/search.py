@@ -0,0 +1,297 @@
+"""
+Index de recherche plein texte des produits de la boutique.
+
+Sur SQLite (avec FTS5), l'index est la table virtuelle ``shop_product_fts``
+créée par la migration 0004 : le rowid est l'id du produit et les colonnes
+sont le nom, la description et le nom de la catégorie. Sur les autres
+moteurs, un index inversé en mémoire (par processus) prend le relais.
+
+Dans les deux cas l'index est mis à jour de façon incrémentale par les
+signaux de Product et Category (voir signals.py). filter_products()
+restreint une liste de produits à tous ceux qui correspondent à la
+recherche ; search_product_ids() donne les MAX_RESULTS plus pertinents, pour
+le classement.
+"""
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'shop_product_fts'
+
+# Poids des colonnes pour le classement : nom, description, catégorie
+FIELD_WEIGHTS = (('name', 10.0), ('description', 2.0), ('category', 5.0))
+
+# Nombre maximum de résultats classés par pertinence (les suivants restent
+# dans la liste filtrée par filter_products, après eux)
+MAX_RESULTS = 400
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    """Met le texte en minuscules et retire les accents."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def _match(tokens):
+    # Chaque terme devient une recherche par préfixe, combinée en ET implicite
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _document(product):
+    """Retourne les champs indexés d'un produit."""
+    return {
+        'name': product.name or '',
+        'description': product.description or '',
+        'category': product.category.name if product.category_id else '',
+    }
+
+
+class SQLiteFTSBackend:
+    """Index FTS5 : les écritures se font dans la transaction courante."""
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def index(self, products):
+        rows = [(p.pk, *_document(p).values()) for p in products]
+        if not rows:
+            return
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, category) VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, product_ids):
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in product_ids])
+
+    def filter(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset.none()
+        # Sous-requête sur l'index : pas de limite, la pagination s'applique à la liste
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_match(tokens)],
+        ))
+
+    def search(self, query, limit=MAX_RESULTS):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        match = _match(tokens)
+        weights = ', '.join(str(weight) for _, weight in FIELD_WEIGHTS)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s',
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self):
+        from .models import Product
+
+        with transaction.atomic(using=self.using):
+            with connections[self.using].cursor() as cursor:
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            batch = []
+            for product in Product.objects.using(self.using).select_related('category').iterator(chunk_size=500):
+                batch.append(product)
+                if len(batch) >= 500:
+                    self.index(batch)
+                    batch = []
+            self.index(batch)
+
+
+class InMemoryBackend:
+    """
+    Index inversé en pur Python, chargé paresseusement à la première recherche.
+
+    Chaque terme pointe vers {product_id: poids}, le poids cumulant les poids
+    des colonnes où le terme apparaît. Le classement est de type TF-IDF et la
+    recherche se fait par préfixe grâce au vocabulaire trié.
+    """
+
+    def __init__(self, using='default'):
+        self.using = using
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._vocabulary = []
+        self._loaded = False
+
+    def _add(self, product_id, document):
+        self._discard(product_id)
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(document[field]):
+                weights[token] += weight
+        for token, weight in weights.items():
+            if token not in self._postings:
+                insort(self._vocabulary, token)
+            self._postings[token][product_id] = weight
+        self._documents[product_id] = tuple(weights)
+
+    def _discard(self, product_id):
+        for token in self._documents.pop(product_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                index = bisect_left(self._vocabulary, token)
+                if index < len(self._vocabulary) and self._vocabulary[index] == token:
+                    del self._vocabulary[index]
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        from .models import Product
+
+        with self._lock:
+            if self._loaded:
+                return
+            queryset = Product.objects.using(self.using).select_related('category')
+            for product in queryset.iterator(chunk_size=500):
+                self._add(product.pk, _document(product))
+            self._loaded = True
+
+    def index(self, products):
+        documents = [(p.pk, _document(p)) for p in products]
+
+        def apply():
+            with self._lock:
+                if self._loaded:
+                    for product_id, document in documents:
+                        self._add(product_id, document)
+
+        transaction.on_commit(apply, using=self.using)
+
+    def remove(self, product_ids):
+        product_ids = list(product_ids)
+
+        def apply():
+            with self._lock:
+                for product_id in product_ids:
+                    self._discard(product_id)
+
+        transaction.on_commit(apply, using=self.using)
+
+    def _expand(self, prefix):
+        """Retourne les termes du vocabulaire qui commencent par le préfixe."""
+        index = bisect_left(self._vocabulary, prefix)
+        terms = []
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(prefix):
+            terms.append(self._vocabulary[index])
+            index += 1
+        return terms
+
+    def filter(self, queryset, query):
+        return queryset.filter(pk__in=self.search(query, limit=None))
+
+    def search(self, query, limit=MAX_RESULTS):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self._ensure_loaded()
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for term in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    for product_id, weight in postings.items():
+                        token_scores[product_id] += weight * idf
+                if scores is None:
+                    scores = token_scores
+                else:
+                    # Tous les termes de la requête doivent correspondre
+                    scores = {pk: score + token_scores[pk] for pk, score in scores.items() if pk in token_scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [product_id for product_id, _ in ranked[:limit]]
+
+    def rebuild(self):
+        with self._lock:
+            self._reset()
+        self._ensure_loaded()
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def fts_available(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def get_backend(using='default'):
+    """Retourne le backend de l'index pour la base donnée (mis en cache par base)."""
+    connection = connections[using]
+    key = (using, str(connection.settings_dict['NAME']))
+    backend = _backends.get(key)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(key)
+            if backend is None:
+                backend_class = SQLiteFTSBackend if fts_available(using) else InMemoryBackend
+                backend = _backends[key] = backend_class(using)
+    return backend
+
+
+def index_products(products, using='default'):
+    get_backend(using).index(products)
+
+
+def remove_products(product_ids, using='default'):
+    get_backend(using).remove(product_ids)
+
+
+def reindex_category(category, using='default'):
+    """Réindexe les produits d'une catégorie (après un changement de nom)."""
+    products = category.products.using(using).select_related('category')
+    batch = []
+    for product in products.iterator(chunk_size=500):
+        batch.append(product)
+        if len(batch) >= 500:
+            index_products(batch, using)
+            batch = []
+    index_products(batch, using)
+
+
+def filter_products(queryset, query):
+    """Restreint le queryset de produits à tous ceux qui correspondent à la recherche."""
+    return get_backend(queryset.db).filter(queryset, query)
+
+
+def search_product_ids(query, limit=MAX_RESULTS, using='default'):
+    """Retourne les ids des produits correspondant à la requête, du plus pertinent au moins pertinent."""
+    return get_backend(using).search(query, limit)
+
+
+def rebuild_index(using='default'):
+    get_backend(using).rebuild()
@@ -0,0 +1,140 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Cart, CartItem, Category, Order, Product, Review
+from . import sales, search
+
+# Champs dont dépend l'index de recherche
+SEARCH_FIELDS = {'name', 'description', 'category', 'category_id'}
+
+# Champs dont dépend le résumé des paniers (Cart.total)
+CART_FIELDS = {'price'}
+
+
+# Mettre à jour l'index de recherche quand un produit est créé ou modifié
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, update_fields=None, using='default', **kwargs):
+    if raw:
+        return
+    # Inutile de réindexer quand seuls le stock, le prix, etc. changent
+    if update_fields and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    search.index_products([instance], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, using='default', **kwargs):
+    search.remove_products([instance.pk], using=using)
+
+
+# Le nom de la catégorie fait partie de l'index des produits : on mémorise
+# l'ancien nom avant l'enregistrement, pour ne réindexer que s'il a changé
+@receiver(pre_save, sender=Category)
+def remember_category_name(sender, instance, raw=False, update_fields=None, using='default', **kwargs):
+    if raw:
+        return
+    instance._previous_name = None
+    if instance.pk and not instance._state.adding and (update_fields is None or 'name' in update_fields):
+        instance._previous_name = Category.objects.using(using).filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, raw=False, using='default', **kwargs):
+    previous = getattr(instance, '_previous_name', None)
+    if created or raw or previous is None or previous == instance.name:
+        return
+    search.reindex_category(instance, using=using)
+
+
+# Garder le total des paniers à jour quand le prix d'un produit change
+@receiver(post_save, sender=Product)
+def update_carts_on_price_change(sender, instance, created, raw=False, update_fields=None, using='default', **kwargs):
+    if created or raw:
+        return
+    if update_fields and not CART_FIELDS.intersection(update_fields):
+        return
+    carts = Cart.objects.using(using).filter(pk__in=CartItem.objects.using(using).filter(product=instance).values('cart'))
+    Cart.update_summaries(carts)
+
+
+# Les articles du panier sont supprimés en cascade avec le produit
+@receiver(pre_delete, sender=Product)
+def remember_product_carts(sender, instance, using='default', **kwargs):
+    instance._cart_ids = list(
+        Cart.objects.using(using).filter(cartitem__product=instance).values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def update_carts_on_product_delete(sender, instance, using='default', **kwargs):
+    cart_ids = getattr(instance, '_cart_ids', None)
+    if cart_ids:
+        Cart.update_summaries(Cart.objects.using(using).filter(pk__in=cart_ids))
+
+
+# Notes dénormalisées des produits : on mémorise la contribution de l'avis
+# avant l'enregistrement, puis on applique la différence
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    instance._previous_rating = None
+    if instance.pk and not instance._state.adding:
+        previous = Review.objects.using(using).filter(pk=instance.pk).values_list('product_id', 'rating', 'active').first()
+        if previous and previous[2]:
+            instance._previous_rating = previous[:2]
+
+
+def _apply_rating_change(previous, current):
+    if previous == current:
+        return
+    deltas = {}
+    if previous:
+        count, total = deltas.get(previous[0], (0, 0))
+        deltas[previous[0]] = (count - 1, total - previous[1])
+    if current:
+        count, total = deltas.get(current[0], (0, 0))
+        deltas[current[0]] = (count + 1, total + current[1])
+    for product_id, (count, total) in deltas.items():
+        if count or total:
+            Product.apply_rating_delta(product_id, count, total)
+
+
+@receiver(post_save, sender=Review)
+def update_product_rating(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _apply_rating_change(getattr(instance, '_previous_rating', None), instance.rating_contribution())
+
+
+@receiver(post_delete, sender=Review)
+def update_product_rating_on_delete(sender, instance, **kwargs):
+    _apply_rating_change(instance.rating_contribution(), None)
+
+
+# Statistiques de ventes : une commande annulée (ou rétablie) est retirée
+# (ou réintégrée) ; la création est comptée par checkout.place_order
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    instance._previous_status = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_status = Order.objects.using(using).filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def update_sales_on_status_change(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_status', None)
+    if created or raw or previous is None:
+        return
+    was_counted = previous not in sales.EXCLUDED_STATUSES
+    if was_counted != sales.is_counted(instance):
+        sales.record_order(instance, 1 if sales.is_counted(instance) else -1)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_deleted_order_sales(sender, instance, **kwargs):
+    # Les lignes de commande existent encore avant la suppression en cascade
+    if sales.is_counted(instance):
+        sales.record_order_cancelled(instance)
@@ -0,0 +1,57 @@
+"""
+Tâches d'arrière-plan de la boutique (voir Hackerz/tasks.py).
+"""
+from datetime import datetime
+
+from django.conf import settings
+
+from Hackerz import emails
+from Hackerz.tasks import task
+
+from . import invoices
+from .models import Order
+
+SEND_ORDER_CONFIRMATION = 'shop.send_order_confirmation'
+
+
+@task(SEND_ORDER_CONFIRMATION)
+def send_order_confirmation(order_id, site_url):
+    """Génère la facture PDF de la commande et met l'email de confirmation dans la boîte d'envoi."""
+    order = Order.objects.get(pk=order_id)
+    order_items = list(order.items.select_related('product'))
+
+    # Générer la facture PDF (ou relire celle déjà stockée)
+    invoice_path = invoices.get_invoice(order)
+
+    subtotal, tax, shipping, total = invoices.order_totals(order_items)
+    context = {
+        'order': order,
+        'order_items': order_items,
+        'subtotal': f"{subtotal:.2f}",
+        'tax': f"{tax:.2f}",
+        'shipping': f"{shipping:.2f}",
+        'total': f"{total:.2f}",
+        'site_url': site_url,
+        'current_year': datetime.now().year,
+        'company_name': getattr(settings, 'COMPANY_NAME', 'Hackerz E-Commerce'),
+        'company_address': getattr(settings, 'COMPANY_ADDRESS', 'Abidjan, Côte d\'Ivoire'),
+        'company_phone': getattr(settings, 'COMPANY_PHONE', '+225 07 50 23 77 10'),
+        'company_email': getattr(settings, 'COMPANY_EMAIL', 'contact@hackerz-ecommerce.com'),
+    }
+
+    # Email avec les deux versions (HTML et texte). La facture est lue au moment
+    # de l'envoi, dans sa version à jour : une modification de la commande
+    # entre-temps supprime le fichier généré ici (voir invoices.get_invoice)
+    email = emails.enqueue(
+        'order_confirmation',
+        [order.email],
+        context,
+        attachments=[{
+            'source': invoices.INVOICE_ATTACHMENT,
+            'args': {'order_id': order.id},
+            'filename': invoices.invoice_filename(order),
+            'mimetype': 'application/pdf',
+        }],
+        reference=f'order:{order.id}',
+    )
+    return {'invoice': invoice_path, 'email': order.email, 'outbox_id': email.pk}
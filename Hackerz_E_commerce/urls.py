@@ -25,6 +25,7 @@ urlpatterns = [
     path('buy_now/<int:product_id>/', views.buy_now, name='buy_now'),
     path('process_payment/', views.process_payment, name='process_payment'),
     path('payment/success/', views.payment_success, name='payment_success'),
+    path('order/<int:order_id>/status/', views.order_status, name='order_status'),
     path('vendor/products/', views.vendor_products, name='vendor_products'),
     path('vendor/product/add/', views.add_product, name='add_product'),
     path('vendor/product/<int:product_id>/', views.vendor_product_detail, name='vendor_product_detail'),
@@ -1,34 +1,33 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
-from .models import Category, Product, Cart, CartItem, Order, OrderItem, Review
+from django.db.models import Case, When, IntegerField
+from .models import Category, Product, Cart, CartItem, Order, Review, ProductSales, VendorSales, DailyProductSales
 from django.core.exceptions import ObjectDoesNotExist
+import logging
 import uuid
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.utils.crypto import get_random_string
 from .forms import ReviewForm, ProductForm
 import json
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Sum, Avg
 from django.utils import timezone
 from datetime import timedelta
 from Hackerz_blog.models import Post, Comment as BlogComment
-from decimal import Decimal
 from django.urls import reverse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from django.http import HttpResponse
-from io import BytesIO
-from django.conf import settings
-import datetime
-import os
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.utils.html import strip_tags
-from django.template.loader import render_to_string
 from django.contrib.sites.shortcuts import get_current_site
-from .utils import save_invoice_pdf
+from . import invoices
+from .checkout import place_order, EmptyCartError, InsufficientStockError
+from .tasks import SEND_ORDER_CONFIRMATION
+from . import listing_cache, search
+from Hackerz import caching, navigation
+from Hackerz.tasks import enqueue, latest_status
+
+logger = logging.getLogger(__name__)
 
 
 def _cart_id(request):
@@ -36,9 +35,7 @@ def _cart_id(request):
     if not cart_id:
         cart_id = get_random_string(length=32)
         request.session['cart_id'] = cart_id
-        print(f"Nouveau cart_id généré: {cart_id}")
-    else:
-        print(f"Cart_id existant trouvé: {cart_id}")
+        logger.debug("Nouvel identifiant de panier pour la session")
     
     # S'assurer que le cart_id est associé à un objet Cart
     try:
@@ -46,56 +43,63 @@ def _cart_id(request):
     except Cart.DoesNotExist:
         # Si le panier n'existe pas dans la base de données, le créer
         Cart.objects.create(cart_id=cart_id)
-        print(f"Nouveau Cart créé en base de données pour cart_id: {cart_id}")
+        logger.debug("Panier créé en base pour la session")
     
     return cart_id
 
 
-def shop(request, category_slug=None):
-    category = None
-    products = Product.objects.filter(available=True)
+def _product_listing(request, category=None):
+    """Produits disponibles filtrés (catégorie, recherche) et triés selon la requête."""
+    products = Product.objects.filter(available=True).select_related('category', 'vendor')
     
-    if category_slug:
-        category = get_object_or_404(Category, slug=category_slug)
+    if category is not None:
         products = products.filter(category=category)
     
-    # Filtering
-    if 'q' in request.GET:
-        query = request.GET.get('q')
-        products = products.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query) |
-            Q(category__name__icontains=query)
-        )
+    # Filtering (index plein texte, voir search.py)
+    ranked_ids = None
+    query = request.GET.get('q', '').strip()
+    if query:
+        products = search.filter_products(products, query)
+        ranked_ids = search.search_product_ids(query)
     
     # Sorting
-    if 'sort' in request.GET:
-        sort_by = request.GET.get('sort')
-        if sort_by == 'price_asc':
-            products = products.order_by('price')
-        elif sort_by == 'price_desc':
-            products = products.order_by('-price')
-        elif sort_by == 'newest':
-            products = products.order_by('-created')
-    
-    # Pagination
-    paginator = Paginator(products, 4)  # 4 products per page
+    sort_by = request.GET.get('sort')
+    if sort_by == 'price_asc':
+        products = products.order_by('price')
+    elif sort_by == 'price_desc':
+        products = products.order_by('-price')
+    elif sort_by == 'newest':
+        products = products.order_by('-created')
+    elif sort_by == 'rating':
+        products = products.order_by('-avg_rating', '-review_count')
+    elif ranked_ids:
+        # Sans tri explicite, les résultats d'une recherche sont classés par pertinence
+        # (au-delà des MAX_RESULTS plus pertinents, du plus récent au plus ancien)
+        products = products.order_by(
+            Case(
+                *[When(id=pk, then=rank) for rank, pk in enumerate(ranked_ids)],
+                default=len(ranked_ids), output_field=IntegerField(),
+            ),
+            '-created', '-id',
+        )
+    return products
+
+
+def shop(request, category_slug=None):
+    category = None
+    if category_slug:
+        category = get_object_or_404(Category, slug=category_slug)
+    
+    # Grille paginée (par numéro de page ou par curseur, voir Hackerz/pagination.py),
+    # servie depuis le cache pour les visiteurs anonymes (voir listing_cache.py)
     page = request.GET.get('page')
+    product_grid = listing_cache.product_grid(request, lambda: _product_listing(request, category), 4)  # 4 products per page
     
-    try:
-        products = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page
-        products = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range, deliver last page
-        products = paginator.page(paginator.num_pages)
-    
-    categories = Category.objects.all()
+    categories = navigation.shop_categories()
     featured_products = Product.objects.filter(featured=True, available=True)[:4]
     
     context = {
-        'products': products,
+        'product_grid': product_grid,
         'category': category,
         'categories': categories,
         'featured_products': featured_products,
@@ -105,15 +109,36 @@ def shop(request, category_slug=None):
     return render(request, 'shop/shop.html', context)
 
 
+def _product_page(product_slug):
+    """Produit, produits similaires et avis actifs, mis en cache ensemble."""
+    product = Product.objects.filter(slug=product_slug, available=True).select_related('category', 'vendor').first()
+    if product is None:
+        # Levée pendant le calcul : rien n'est mis en cache pour une adresse quelconque
+        raise Http404("Aucun produit ne correspond à cette adresse.")
+    return {
+        'product': product,
+        'related_products': list(
+            Product.objects.filter(category=product.category).exclude(id=product.id).select_related('category')[:4]
+        ),
+        'reviews': list(product.reviews.filter(active=True).select_related('user')),
+    }
+
+
 def product_detail(request, product_slug):
-    product = get_object_or_404(Product, slug=product_slug, available=True)
-    categories = Category.objects.all()
+    # Données communes à tous les visiteurs, servies depuis l'espace « shop » du cache
+    # Version propre au produit : une commande n'invalide que sa fiche (stock)
+    page = caching.get_or_compute(
+        'shop', ('product', product_slug, listing_cache.product_version(product_slug)),
+        lambda: _product_page(product_slug),
+    )
+    product = page['product']
+    categories = navigation.shop_categories()
     
     # Get related products
-    related_products = Product.objects.filter(category=product.category).exclude(id=product.id)[:4]
+    related_products = page['related_products']
     
     # Get reviews
-    reviews = product.reviews.filter(active=True)
+    reviews = page['reviews']
     
     # Review form handling
     if request.method == 'POST' and request.user.is_authenticated:
@@ -128,10 +153,6 @@ def product_detail(request, product_slug):
     else:
         review_form = ReviewForm()
     
-    # Calculate average rating using Avg aggregate
-    reviews_stats = reviews.aggregate(avg_rating=Avg('rating'), count=Count('id'))
-    avg_rating = reviews_stats['avg_rating'] or 0
-    review_count = reviews_stats['count']
     
     # Vérifier si l'utilisateur a acheté le produit
     has_purchased = False
@@ -148,8 +169,9 @@ def product_detail(request, product_slug):
         'related_products': related_products,
         'reviews': reviews,
         'review_form': review_form,
-        'avg_rating': round(avg_rating, 1),
-        'review_count': review_count,
+        # Notes dénormalisées, tenues à jour à chaque écriture d'avis
+        'avg_rating': round(product.avg_rating, 1),
+        'review_count': product.review_count,
         'has_purchased': has_purchased,
     }
     
@@ -268,6 +290,7 @@ def remove_from_cart(request, product_id):
         cart_item.save()
     else:
         cart_item.delete()
+    cart.update_summary()
         
     return redirect('shop:cart_detail')
 
@@ -277,6 +300,7 @@ def delete_from_cart(request, product_id):
     product = get_object_or_404(Product, id=product_id)
     cart_item = CartItem.objects.get(product=product, cart=cart)
     cart_item.delete()
+    cart.update_summary()
     
     return redirect('shop:cart_detail')
 
@@ -333,9 +357,9 @@ def checkout(request, total=0, counter=0, cart_items=None):
                 'country': session_address.get('country', 'france')
             }
     
-    except (Cart.DoesNotExist, Exception) as e:
+    except (Cart.DoesNotExist, Exception):
         # En cas d'erreur, afficher une page vide avec les informations par défaut
-        print(f"Erreur lors du chargement du checkout: {str(e)}")
+        logger.exception("Erreur lors du chargement du checkout")
         cart_items = None
     
     context = {
@@ -345,8 +369,7 @@ def checkout(request, total=0, counter=0, cart_items=None):
         'shipping_info': shipping_info
     }
     
-    # Debug pour voir ce qui est passé au template
-    print(f"Checkout context: cart_items={cart_items is not None}, total={total}, counter={counter}")
+    logger.debug("Checkout : panier chargé=%s, total=%s, articles=%s", cart_items is not None, total, counter)
     
     return render(request, 'shop/checkout.html', context)
 
@@ -435,10 +458,10 @@ def cart_add(request, product_id):
             quantity=quantity
         )
     
-    # Calculer le total du panier
-    cart_items = CartItem.objects.filter(cart=cart)
-    total_items = sum(item.quantity for item in cart_items)
-    total_price = sum(item.product.price * item.quantity for item in cart_items)
+    # Mettre à jour le résumé du panier (nombre d'articles et total)
+    cart.update_summary()
+    total_items = cart.item_count
+    total_price = cart.total
     
     # Préparer la réponse
     if is_ajax:
@@ -465,12 +488,13 @@ def cart_remove(request, product_id):
         cart_item.save()
     else:
         cart_item.delete()
+    cart.update_summary()
     
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         return JsonResponse({
             'status': 'success',
             'message': 'Quantité mise à jour',
-            'cart_items_count': sum(item.quantity for item in CartItem.objects.filter(cart=cart, active=True))
+            'cart_items_count': cart.item_count
         })
     
     return redirect('shop:cart_detail')
@@ -485,12 +509,13 @@ def cart_update(request, product_id):
     if quantity > 0 and quantity <= product.stock:
         cart_item.quantity = quantity
         cart_item.save()
+        cart.update_summary()
     
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         return JsonResponse({
             'status': 'success',
             'message': 'Quantité mise à jour',
-            'cart_items_count': sum(item.quantity for item in CartItem.objects.filter(cart=cart, active=True))
+            'cart_items_count': cart.item_count
         })
     
     return redirect('shop:cart_detail')
@@ -498,23 +523,18 @@ def cart_update(request, product_id):
 
 def category_view(request, category_slug):
     category = get_object_or_404(Category, slug=category_slug)
-    products = Product.objects.filter(category=category, available=True)
     
-    # Pagination
-    paginator = Paginator(products, 4)  # 4 products per page
-    page = request.GET.get('page')
-    
-    try:
-        products = paginator.page(page)
-    except PageNotAnInteger:
-        products = paginator.page(1)
-    except EmptyPage:
-        products = paginator.page(paginator.num_pages)
+    # Pagination (grille mise en cache pour les visiteurs anonymes)
+    product_grid = listing_cache.product_grid(
+        request,
+        lambda: Product.objects.filter(category=category, available=True).select_related('category', 'vendor'),
+        4,  # 4 products per page
+    )
     
     context = {
         'category': category,
-        'products': products,
-        'categories': Category.objects.all(),
+        'product_grid': product_grid,
+        'categories': navigation.shop_categories(),
     }
     
     return render(request, 'shop/shop.html', context)
@@ -620,14 +640,14 @@ def add_review(request, product_id):
             
             if is_ajax:
                     # Calculer la note moyenne
-                avg_rating = product.reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+                review_count, avg_rating = Product.objects.filter(pk=product.pk).values_list('review_count', 'avg_rating').get()
                 
                 return JsonResponse({
                     'status': 'success',
                     'success': True,
                     'message': 'Votre avis a été mis à jour avec succès',
                     'user': request.user.username,
-                    'count': product.reviews.count(),
+                    'count': review_count,
                     'avg_rating': round(avg_rating, 1),
                     'review': {
                         'id': existing_review.id,
@@ -654,14 +674,14 @@ def add_review(request, product_id):
             
             if is_ajax:
                 # Calculer la note moyenne
-                avg_rating = product.reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+                review_count, avg_rating = Product.objects.filter(pk=product.pk).values_list('review_count', 'avg_rating').get()
                 
                 return JsonResponse({
                     'status': 'success',
                     'success': True,
                     'message': 'Votre avis a été ajouté avec succès',
                     'user': request.user.username,
-                    'count': product.reviews.count(),
+                    'count': review_count,
                     'avg_rating': round(avg_rating, 1),
                     'review': {
                         'id': new_review.id,
@@ -695,9 +715,7 @@ def buy_now(request, product_id):
     
     if request.method == 'POST':
         quantity = int(request.POST.get('quantity', 1))
-        
-        # Debug
-        print(f"buy_now: POST request received for product {product_id} with quantity {quantity}")
+        logger.debug("buy_now : produit %s, quantité %s", product_id, quantity)
         
         # S'assurer que la quantité est valide
         if quantity <= 0 or quantity > product.stock:
@@ -719,16 +737,11 @@ def buy_now(request, product_id):
             quantity=quantity,
             cart=cart
         )
-        
-        # Debug
-        print(f"buy_now: Product added to cart, redirecting to checkout")
+        cart.update_summary()
         
         # Rediriger vers la page de checkout
         return redirect('shop:checkout')
     
-    # Debug
-    print(f"buy_now: Request method was {request.method}, not POST")
-    
     # Si la méthode n'est pas POST, rediriger vers la page de détail du produit
     return redirect('shop:product_detail', product_slug=product.slug)
 
@@ -761,129 +774,54 @@ def process_payment(request):
             profile.postal_code = shipping_data['postal_code']
             profile.country = shipping_data['country']
             profile.save()
-            print(f"Profil utilisateur mis à jour avec adresse: {shipping_data}")
-        except Exception as e:
-            print(f"Erreur lors de la mise à jour du profil: {str(e)}")
+            logger.debug("Adresse de livraison enregistrée dans le profil de l'utilisateur %s", request.user.pk)
+        except Exception:
+            logger.exception("Erreur lors de la mise à jour du profil de l'utilisateur %s", request.user.pk)
         
         # Simuler le traitement du paiement
         
         try:
-            # Récupérer les articles du panier
+            # Récupérer le panier
             cart_id = _cart_id(request)
             cart = Cart.objects.get(cart_id=cart_id)
-            cart_items = CartItem.objects.filter(cart=cart, active=True)
             
-            if not cart_items.exists():
+            # Créer la commande en une transaction (stock, lignes de commande, panier)
+            try:
+                order, total = place_order(
+                    cart,
+                    user=request.user,
+                    first_name=request.POST.get('first_name', ''),
+                    last_name=request.POST.get('last_name', ''),
+                    email=request.POST.get('email', ''),
+                    address=shipping_data['address'],
+                    postal_code=shipping_data['postal_code'],
+                    city=shipping_data['city'],
+                    paid=True,  # Puisque nous simulons un paiement réussi
+                    status='processing'
+                )
+            except EmptyCartError:
                 messages.error(request, "Votre panier est vide. Impossible de finaliser la commande.")
                 return redirect('shop:checkout')
+            except InsufficientStockError as e:
+                if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                    return JsonResponse({
+                        'success': False,
+                        'message': e.message,
+                        'redirect_url': reverse('shop:cart_detail')
+                    }, status=409)
+                messages.error(request, e.message)
+                return redirect('shop:cart_detail')
             
-            # Calculer le total
-            total = 0
-            for cart_item in cart_items:
-                total += (cart_item.product.price * cart_item.quantity)
-            
-            # Ajouter la TVA
-            total_with_tax = total * Decimal('1.2')
-            
-            # Créer une commande avec les champs corrects selon le modèle
-            order = Order.objects.create(
-                user=request.user,
-                first_name=request.POST.get('first_name', ''),
-                last_name=request.POST.get('last_name', ''),
-                email=request.POST.get('email', ''),
-                address=shipping_data['address'],
-                postal_code=shipping_data['postal_code'],
-                city=shipping_data['city'],
-                paid=True,  # Puisque nous simulons un paiement réussi
-                status='processing'
+            # Facture PDF et email de confirmation : générés en arrière-plan
+            current_site = get_current_site(request)
+            site_url = f"{'https' if request.is_secure() else 'http'}://{current_site.domain}"
+            enqueue(
+                SEND_ORDER_CONFIRMATION,
+                {'order_id': order.id, 'site_url': site_url},
+                reference=f'order:{order.id}',
             )
-            
-            # Créer les articles de la commande
-            for cart_item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.price
-                )
-                
-                # Mettre à jour le stock du produit
-                product = cart_item.product
-                product.stock -= cart_item.quantity
-                product.save()
-            
-            # Vider le panier
-            cart_items.delete()
-            
-            # Générer et sauvegarder la facture PDF
-            invoice_path = save_invoice_pdf(order)
-            
-            # Envoyer un email de confirmation avec la facture
-            try:
-                # Récupérer les articles de la commande
-                order_items = order.items.all()
-                
-                # Calculer les totaux pour l'email
-                subtotal = sum(item.price * item.quantity for item in order_items)
-                tax = subtotal * Decimal('0.2')  # TVA à 20%
-                shipping = Decimal('5.99')  # Frais de livraison fixes
-                total = subtotal + tax + shipping
-                
-                # Créer le contexte pour le template
-                from datetime import datetime
-                current_site = get_current_site(request)
-                site_url = f"{'https' if request.is_secure() else 'http'}://{current_site.domain}"
-                
-                context = {
-                    'order': order,
-                    'order_items': order_items,
-                    'subtotal': f"{subtotal:.2f}",
-                    'tax': f"{tax:.2f}",
-                    'shipping': f"{shipping:.2f}",
-                    'total': f"{total:.2f}",
-                    'site_url': site_url,
-                    'current_year': datetime.now().year,
-                    'company_name': settings.COMPANY_NAME if hasattr(settings, 'COMPANY_NAME') else 'Hackerz E-Commerce',
-                    'company_address': settings.COMPANY_ADDRESS if hasattr(settings, 'COMPANY_ADDRESS') else 'Abidjan, Côte d\'Ivoire',
-                    'company_phone': settings.COMPANY_PHONE if hasattr(settings, 'COMPANY_PHONE') else '+225 07 50 23 77 10',
-                    'company_email': settings.COMPANY_EMAIL if hasattr(settings, 'COMPANY_EMAIL') else 'contact@hackerz-ecommerce.com',
-                }
-                
-                # Rendre les templates d'email
-                html_message = render_to_string('email/order_confirmation.html', context)
-                plain_message = render_to_string('email/order_confirmation_text.txt', context)
-                
-                # Préparer l'email
-                subject = f'Confirmation de votre commande #{order.id}'
-                from_email = settings.DEFAULT_FROM_EMAIL
-                to_email = order.email
-                
-                # Créer l'email avec les deux versions (HTML et texte)
-                email = EmailMultiAlternatives(
-                    subject=subject,
-                    body=plain_message,
-                    from_email=from_email,
-                    to=[to_email]
-                )
-                email.attach_alternative(html_message, "text/html")
-                
-                # Joindre la facture PDF si elle a été générée
-                if invoice_path:
-                    invoice_file_path = os.path.join(settings.MEDIA_ROOT, invoice_path)
-                    if os.path.exists(invoice_file_path):
-                        with open(invoice_file_path, 'rb') as f:
-                            email.attach(f"facture_{order.id}.pdf", f.read(), 'application/pdf')
-                
-                # Envoyer l'email
-                email.send(fail_silently=False)
-                
-                print(f"Email de confirmation envoyé à {to_email} pour la commande #{order.id}")
-            
-            except Exception as e:
-                print(f"Erreur lors de l'envoi de l'email de confirmation: {str(e)}")
-            
-            # Debug log pour la commande
-            print(f"Commande #{order.id} créée avec succès: {order.first_name} {order.last_name}, {order.email}, {order.status}")
+            total = total + total * invoices.TAX_RATE + invoices.SHIPPING
+            logger.info("Commande #%s créée (statut %s)", order.id, order.status, extra={'order_id': order.id})
             
             # Stockage des informations de commande dans la session pour la page de succès
             request.session['order_complete'] = {
@@ -898,7 +836,7 @@ def process_payment(request):
                 return JsonResponse({
                     'success': True,
                     'order_id': order.id,
-                    'message': 'Votre commande a été passée avec succès! Un email de confirmation a été envoyé à votre adresse email.',
+                    'message': 'Votre commande a été passée avec succès! Un email de confirmation va vous être envoyé.',
                     'redirect_url': reverse('shop:payment_success')
                 })
             else:
@@ -906,7 +844,7 @@ def process_payment(request):
                 return redirect('shop:payment_success')
         
         except Exception as e:
-            print(f"Erreur lors du traitement du paiement: {str(e)}")
+            logger.exception("Erreur lors du traitement du paiement")
             return JsonResponse({
                 'success': False,
                 'message': f"Une erreur est survenue lors du traitement de votre commande: {str(e)}"
@@ -931,10 +869,7 @@ def payment_success(request):
         
         # Calculer les totaux pour l'affichage
         order_items = order.items.all()
-        subtotal = sum(item.price * item.quantity for item in order_items)
-        tax = subtotal * Decimal('0.2')  # TVA à 20%
-        shipping = Decimal('5.99')  # Frais de livraison fixes
-        total = subtotal + tax + shipping
+        subtotal, tax, shipping, total = invoices.order_totals(order_items)
         
         # Préparer le contexte
         context = {
@@ -943,7 +878,8 @@ def payment_success(request):
             'subtotal': f"{subtotal:.2f}",
             'tax': f"{tax:.2f}",
             'shipping': f"{shipping:.2f}",
-            'total': f"{total:.2f}"
+            'total': f"{total:.2f}",
+            'confirmation_status': latest_status(f'order:{order.id}', SEND_ORDER_CONFIRMATION),
         }
         
         # Effacer les données de commande de la session
@@ -957,14 +893,25 @@ def payment_success(request):
         return redirect('shop:shop')
 
 
+@login_required
+def order_status(request, order_id):
+    """Statut de la facture et de l'email de confirmation d'une commande, au format JSON."""
+    order = get_object_or_404(Order, id=order_id, user=request.user)
+    task = latest_status(f'order:{order.id}', SEND_ORDER_CONFIRMATION)
+    return JsonResponse({
+        'order_id': order.id,
+        'status': task['status'] if task else None,
+        'attempts': task['attempts'] if task else 0,
+        'max_attempts': task['max_attempts'] if task else 0,
+    })
+
+
 def cart_count(request):
     """Retourne le nombre d'articles dans le panier au format JSON"""
-    try:
-        cart = Cart.objects.get(cart_id=_cart_id(request))
-        cart_items = CartItem.objects.filter(cart=cart, active=True)
-        count = sum(item.quantity for item in cart_items)
-    except (Cart.DoesNotExist, ObjectDoesNotExist):
-        count = 0
+    cart_id = request.session.get('cart_id')
+    count = 0
+    if cart_id:
+        count = Cart.objects.filter(cart_id=cart_id).values_list('item_count', flat=True).first() or 0
     
     return JsonResponse({
         'count': count
@@ -982,8 +929,8 @@ def profile_view(request):
     try:
         if hasattr(request.user, 'wishlist'):
             wishlist_count = request.user.wishlist.products.count()
-    except Exception as e:
-        print(f"Erreur lors de la récupération de la liste de souhaits: {str(e)}")
+    except Exception:
+        logger.exception("Erreur lors de la récupération de la liste de souhaits")
     
     # Récupérer le nombre de posts lus (via commentaires ou autre interaction)
     blog_interactions = BlogComment.objects.filter(name=request.user.username).values('post').distinct().count()
@@ -1021,10 +968,7 @@ def profile_view(request):
     # Récupérer les commandes pour l'onglet "Mes commandes"
     orders = Order.objects.filter(email=request.user.email).order_by('-created')
     
-    # Debug
-    print(f"Profile view: orders_count={orders_count}, recent_activities={len(recent_activities)}")
-    for activity in recent_activities:
-        print(f"Activity: {activity['type']} - {activity['description']} - {activity['date']}")
+    logger.debug("Profil : %s commande(s), %s activité(s) récente(s)", orders_count, len(recent_activities))
     
     # Contexte
     context = {
@@ -1124,20 +1068,23 @@ def vendor_products(request):
         messages.error(request, "Vous devez être un vendeur approuvé pour accéder à cette page.")
         return redirect('profile')
     
-    # Récupérer les produits du vendeur
-    products = Product.objects.filter(vendor=request.user.profile.vendor)
+    # Récupérer les produits du vendeur, avec leurs ventes pré-calculées (voir sales.py)
+    vendor = request.user.profile.vendor
+    products = Product.objects.filter(vendor=vendor).select_related('category', 'sales')
     
     # Calculer les statistiques
     products_in_stock = products.filter(stock__gt=0).count()
     products_out_of_stock = products.filter(stock=0).count()
+    vendor_sales = VendorSales.objects.filter(vendor=vendor).first()
     
     # Récupérer toutes les catégories pour le filtre
-    categories = Category.objects.all()
+    categories = navigation.shop_categories()
     
     context = {
         'products': products,
         'products_in_stock': products_in_stock,
         'products_out_of_stock': products_out_of_stock,
+        'vendor_sales': vendor_sales,
         'categories': categories,
     }
     
@@ -1202,7 +1149,7 @@ def add_product(request):
                 })
     
     # GET request
-    categories = Category.objects.all()
+    categories = navigation.shop_categories()
     return render(request, 'shop/add_product.html', {
         'categories': categories
     })
@@ -1266,19 +1213,17 @@ def vendor_product_detail(request, product_id):
     
     product = get_object_or_404(Product, id=product_id, vendor=request.user.profile.vendor)
     
-    # Calculer les statistiques
-    total_sales = OrderItem.objects.filter(product=product).aggregate(
-        total=Sum('quantity')
-    )['total'] or 0
-    
-    average_rating = Review.objects.filter(product=product).aggregate(
-        avg=Avg('rating')
-    )['avg'] or 0
+    # Statistiques de ventes pré-calculées (voir sales.py)
+    stats = ProductSales.objects.filter(product=product).first()
+    recent_days = DailyProductSales.objects.filter(product=product)[:30]
     
     context = {
         'product': product,
-        'total_sales': total_sales,
-        'average_rating': round(average_rating, 1)
+        'total_sales': stats.units_sold if stats else 0,
+        'revenue': stats.revenue if stats else 0,
+        'order_count': stats.order_count if stats else 0,
+        'daily_sales': recent_days,
+        'average_rating': round(product.avg_rating, 1)
     }
     
     return render(request, 'shop/vendor_product_detail.html', context)
@@ -1286,46 +1231,25 @@ def vendor_product_detail(request, product_id):
 
 @login_required
 def generate_invoice_pdf(request, order_id):
-    # Récupérer la commande
+    """Télécharge la facture d'une commande (rendue une seule fois, puis servie depuis le stockage)."""
     order = get_object_or_404(Order, id=order_id, user=request.user)
-    order_items = order.items.all()
-    
-    # Calculer les totaux
-    subtotal = sum(item.price * item.quantity for item in order_items)
-    tax = subtotal * 0.2  # TVA à 20%
-    shipping = 5.99  # Frais de livraison fixes
-    total = subtotal + tax + shipping
     
-    # Générer un numéro de facture
-    invoice_number = f"INV-{order.id}-{datetime.datetime.now().strftime('%Y%m%d')}"
-    
-    # Préparer le contexte
-    context = {
-        'order': order,
-        'order_items': order_items,
-        'invoice_number': invoice_number,
-        'invoice_date': datetime.datetime.now().strftime('%d/%m/%Y'),
-        'subtotal': f"{subtotal:.2f}",
-        'tax': f"{tax:.2f}",
-        'shipping': f"{shipping:.2f}",
-        'total': f"{total:.2f}"
-    }
-    
-    # Charger le template
-    template = get_template('shop/invoice_pdf.html')
-    html = template.render(context)
-    
-    # Créer le PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="facture_{order.id}.pdf"'
-    
-    # Générer le PDF avec xhtml2pdf
-    pdf_file = BytesIO()
-    pisa_status = pisa.CreatePDF(html, dest=pdf_file)
-    
-    if pisa_status.err:
-        return HttpResponse('Erreur lors de la génération du PDF', status=500)
-    
-    pdf_file.seek(0)
-    response.write(pdf_file.read())
-    return response 
\ No newline at end of file
+    # Le navigateur a déjà cette version de la facture : 304 sans relire le fichier
+    etag = invoices.etag(order)
+    last_modified = int(order.updated.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        try:
+            invoice = invoices.open_invoice(order)
+        except invoices.InvoiceError:
+            return HttpResponse('Erreur lors de la génération du PDF', status=500)
+        response = FileResponse(
+            invoice,
+            as_attachment=True,
+            filename=invoices.invoice_filename(order),
+            content_type='application/pdf',
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
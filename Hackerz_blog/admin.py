@@ -47,7 +47,7 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'slug', 'author', 'publish', 'status']
+    list_display = ['title', 'slug', 'author', 'publish', 'status', 'views_count']
     list_filter = ['status', 'created', 'publish', 'author']
     search_fields = ['title', 'content']
     prepopulated_fields = {'slug': ('title',)}
@@ -0,0 +1,84 @@
+"""
+Chargement de l'arbre des commentaires d'un article.
+
+Seuls les fils de discussion de la page demandée sont lus : une requête
+sélectionne les identifiants des commentaires de premier niveau de la page
+(du plus récent au plus ancien), une seconde charge ces commentaires et
+toutes leurs réponses actives, quelle que soit la profondeur (requête
+récursive WITH RECURSIVE), avec (pour un utilisateur connecté) l'indicateur
+« déjà aimé » en annotation SQL ; le nombre de « j'aime » est le compteur
+Comment.likes_count. L'arbre est assemblé en Python : chaque commentaire
+reçoit la liste ``children`` de ses réponses (ordre chronologique).
+
+Une réponse dont le parent n'est plus actif n'est pas affichée, comme son
+parent : la récursion ne traverse que les commentaires actifs.
+"""
+from dataclasses import dataclass
+
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connection
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, CommentLike
+
+# Nombre de fils de discussion par page
+THREADS_PER_PAGE = 20
+
+
+@dataclass
+class CommentTree:
+    threads: object  # Page des commentaires de premier niveau
+    total: int  # Nombre de commentaires actifs affichés, réponses comprises
+
+
+def load_comment_tree(post, user=None, page=None, per_page=THREADS_PER_PAGE):
+    roots = Comment.objects.filter(post=post, active=True, parent=None)
+    paginator = Paginator(roots.order_by('-created', '-pk').values_list('pk', flat=True), per_page)
+    try:
+        threads = paginator.page(page)
+    except PageNotAnInteger:
+        threads = paginator.page(1)
+    except EmptyPage:
+        threads = paginator.page(paginator.num_pages)
+
+    root_ids = list(threads.object_list)
+    comments = []
+    if root_ids:
+        comments = Comment.objects.filter(pk__in=_visible_ids(roots.filter(pk__in=root_ids)))
+        if user is not None and user.is_authenticated:
+            comments = comments.annotate(
+                liked=Exists(CommentLike.objects.filter(comment=OuterRef('pk'), user=user)),
+            )
+        else:
+            comments = comments.annotate(liked=Value(False, output_field=BooleanField()))
+        comments = list(comments.order_by('created', 'pk'))
+
+    by_id = {comment.pk: comment for comment in comments}
+    for comment in comments:
+        comment.children = []
+    for comment in comments:
+        if comment.parent_id is not None:
+            # Le parent est déjà chargé : le relier sans requête
+            parent = by_id[comment.parent_id]
+            comment.parent = parent
+            parent.children.append(comment)
+    threads.object_list = [by_id[pk] for pk in root_ids]
+
+    total = Comment.objects.filter(pk__in=_visible_ids(roots)).count()
+    return CommentTree(threads=threads, total=total)
+
+
+def _visible_ids(roots):
+    """
+    Sous-requête : identifiants des commentaires ``roots`` (queryset) et de
+    leurs réponses actives, à toutes les profondeurs.
+    """
+    sql, params = roots.order_by().values('pk').query.sql_with_params()
+    table = connection.ops.quote_name(Comment._meta.db_table)
+    return RawSQL(
+        f'WITH RECURSIVE thread(id) AS ({sql} '
+        f'UNION ALL SELECT reply.id FROM {table} reply JOIN thread ON reply.parent_id = thread.id '
+        f'WHERE reply.active = %s) SELECT id FROM thread',
+        (*params, True),
+    )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from Hackerz_blog.models import Comment
+
+
+class Command(BaseCommand):
+    help = "Recalcule le nombre de « j'aime » de chaque commentaire à partir des likes enregistrés et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', help="Slug de l'article dont recalculer les commentaires (tous par défaut)")
+
+    def handle(self, *args, **options):
+        comments = Comment.objects.all()
+        if options['post']:
+            comments = comments.filter(post__slug=options['post'])
+        fixed = Comment.update_likes(comments)
+        self.stdout.write(self.style.SUCCESS(f"Compteurs de « j'aime » corrigés pour {fixed} commentaire(s)."))
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:41
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_views_count(apps, schema_editor):
+    """Point de départ des compteurs : le nombre de lecteurs déjà enregistrés."""
+    Post = apps.get_model('Hackerz_blog', 'Post')
+    PostView = apps.get_model('Hackerz_blog', 'PostView')
+    db_alias = schema_editor.connection.alias
+    readers = PostView.objects.using(db_alias).filter(post=OuterRef('pk')).order_by().values('post')
+    Post.objects.using(db_alias).update(
+        views_count=Coalesce(Subquery(readers.annotate(value=Count('pk')).values('value')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hackerz_blog', '0003_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lectures'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-views_count', '-publish'], name='blog_post_status_views_idx'),
+        ),
+        migrations.RunPython(fill_views_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_likes_count(apps, schema_editor):
+    """Point de départ des compteurs : les « j'aime » déjà enregistrés."""
+    Comment = apps.get_model('Hackerz_blog', 'Comment')
+    CommentLike = apps.get_model('Hackerz_blog', 'CommentLike')
+    db_alias = schema_editor.connection.alias
+    likes = CommentLike.objects.using(db_alias).filter(comment=OuterRef('pk')).order_by().values('comment')
+    Comment.objects.using(db_alias).update(
+        likes_count=Coalesce(Subquery(likes.annotate(value=Count('pk')).values('value')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hackerz_blog', '0004_post_views_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="J'aime"),
+        ),
+        migrations.RunPython(fill_likes_count, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,15 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
 from django.utils.text import slugify
-import markdown
+
+from Hackerz import markdown_render
+from Hackerz.model_mixins import CounterFieldsMixin
+
+# Nombre maximum d'articles modifiés par requête UPDATE (taille du CASE)
+VIEWS_BATCH_SIZE = 200
 
 
 class Tag(models.Model):
@@ -31,7 +37,7 @@ class Category(models.Model):
         return reverse('blog:category_view', args=[self.slug])
 
 
-class Post(models.Model):
+class Post(CounterFieldsMixin, models.Model):
     STATUS_CHOICES = (
         ('draft', 'Brouillon'),
         ('published', 'Publié'),
@@ -41,6 +47,9 @@ class Post(models.Model):
     slug = models.SlugField(max_length=250, unique_for_date='publish', verbose_name='Slug')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_posts', verbose_name='Auteur')
     content = models.TextField(verbose_name='Contenu')
+    # Rendu HTML du contenu, recalculé quand son empreinte change
+    content_html = models.TextField(blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
     image = models.ImageField(upload_to='blog/%Y/%m/%d/', blank=True, null=True, verbose_name='Image')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='posts', verbose_name='Catégorie')
     tags = models.ManyToManyField(Tag, blank=True, related_name='posts', verbose_name='Tags')
@@ -48,9 +57,22 @@ class Post(models.Model):
     created = models.DateTimeField(auto_now_add=True, verbose_name='Date de création')
     updated = models.DateTimeField(auto_now=True, verbose_name='Date de modification')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft', verbose_name='Statut')
+    # Nombre de lectures, incrémenté par lots (voir view_tracking.py)
+    views_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Lectures')
+    
+    # Champs tenus à jour par des requêtes UPDATE, jamais réécrits par save()
+    COUNTER_FIELDS = ('views_count',)
     
     class Meta:
         ordering = ('-publish',)
+        indexes = [
+            # Liste des articles publiés, par date de publication
+            models.Index(fields=['status', '-publish'], name='blog_post_status_publish_idx'),
+            # Articles publiés d'une catégorie (page catégorie, articles similaires)
+            models.Index(fields=['category', 'status', '-publish'], name='blog_post_cat_status_idx'),
+            # Articles publiés les plus lus (tri « popular »)
+            models.Index(fields=['status', '-views_count', '-publish'], name='blog_post_status_views_idx'),
+        ]
         verbose_name = 'Article'
         verbose_name_plural = 'Articles'
     
@@ -60,31 +82,63 @@ class Post(models.Model):
     def get_absolute_url(self):
         return reverse('blog:post_detail', args=[self.slug])
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Ne refaire le rendu Markdown que si le contenu a changé
+        if update_fields is None or 'content' in update_fields:
+            if self.render_content() and update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'content_html', 'content_hash'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def add_views(cls, counts):
+        """
+        Ajoute des lectures aux compteurs des articles ({post_id: nombre}), en
+        une requête UPDATE par lot d'articles.
+        """
+        post_ids = [pk for pk, count in counts.items() if count]
+        for start in range(0, len(post_ids), VIEWS_BATCH_SIZE):
+            batch = post_ids[start:start + VIEWS_BATCH_SIZE]
+            cls.objects.filter(pk__in=batch).update(views_count=models.Case(
+                *[models.When(pk=pk, then=models.F('views_count') + counts[pk]) for pk in batch],
+                default=models.F('views_count'),
+                output_field=models.PositiveIntegerField(),
+            ))
+    
     def formatted_content(self):
         """
         Retourne le contenu formaté en HTML à partir du Markdown
         """
-        # Configuration du parser Markdown avec les extensions
-        md = markdown.Markdown(extensions=[
-            'markdown.extensions.fenced_code',  # Pour les blocs de code avec ```
-            'markdown.extensions.codehilite',   # Pour la coloration syntaxique
-            'markdown.extensions.tables',       # Pour les tableaux
-            'markdown.extensions.nl2br',        # Convertir les retours à la ligne en <br>
-            'markdown.extensions.extra',        # Fonctionnalités supplémentaires
-        ])
+        # HTML pré-rendu à jour : rien à recalculer
+        if self.content_hash == markdown_render.content_hash(self.content):
+            return self.content_html
+        
+        # Article antérieur au cache : rendre puis enregistrer le résultat
+        self.render_content()
+        if self.pk:
+            Post.objects.filter(pk=self.pk).update(content_html=self.content_html, content_hash=self.content_hash)
+        return self.content_html
+    
+    def render_content(self):
+        """Recalcule content_html si le contenu a changé depuis le dernier rendu."""
+        content_hash = markdown_render.content_hash(self.content)
+        if self.content_hash == content_hash:
+            return False
         
         # Amélioration du formatage pour les titres
-        content = self.content
+        content = self.content or ''
         
         # Structurer le contenu avec des espaces autour des titres
         content = content.replace("\n##", "\n\n##")
         content = content.replace("\n#", "\n\n#")
         
         # Convertir Markdown en HTML
-        return md.convert(content)
+        self.content_html = markdown_render.to_html(content)
+        self.content_hash = content_hash
+        return True
 
 
-class Comment(models.Model):
+class Comment(CounterFieldsMixin, models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     name = models.CharField(max_length=80)
     email = models.EmailField()
@@ -93,15 +147,55 @@ class Comment(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=True)
+    # Dénormalisé : tenu à jour par set_liked(), recalculé par update_likes() (voir reconcile_comment_likes)
+    likes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="J'aime")
+    
+    # Compteur modifié par UPDATE atomique, jamais réécrit par save()
+    COUNTER_FIELDS = ('likes_count',)
     
     class Meta:
         ordering = ('created',)
+        indexes = [
+            # Commentaires actifs de premier niveau d'un article
+            # (index partiel : voir Product.Meta.indexes pour le filtre booléen)
+            models.Index(fields=['post', 'parent', 'created'], condition=models.Q(active=True), name='blog_comment_post_active_idx'),
+        ]
     
     def __str__(self):
         return f'Comment by {self.name} on {self.post}'
     
-    def likes_count(self):
-        return self.likes.count()
+    def set_liked(self, user, liked):
+        """
+        Ajoute (liked=True) ou retire le « j'aime » de l'utilisateur, dans la même
+        transaction que la mise à jour du compteur. Idempotent : le compteur ne
+        bouge que si une ligne CommentLike a réellement été créée ou supprimée.
+        Retourne True si l'état a changé ; self.likes_count est mis à jour.
+        """
+        with transaction.atomic():
+            if liked:
+                _, changed = CommentLike.objects.get_or_create(user=user, comment=self)
+                delta = 1 if changed else 0
+            else:
+                changed = CommentLike.objects.filter(user=user, comment=self).delete()[0] > 0
+                delta = -1 if changed else 0
+            if delta:
+                Comment.objects.filter(pk=self.pk).update(likes_count=models.F('likes_count') + delta)
+            self.likes_count = Comment.objects.values_list('likes_count', flat=True).get(pk=self.pk)
+        return changed
+    
+    @classmethod
+    def update_likes(cls, comments=None):
+        """
+        Recalcule les compteurs de « j'aime » des commentaires donnés (queryset ;
+        tous par défaut) à partir des lignes CommentLike, en une requête UPDATE.
+        Retourne le nombre de compteurs corrigés.
+        """
+        if comments is None:
+            comments = cls.objects.all()
+        likes = CommentLike.objects.filter(comment=models.OuterRef('pk')).order_by().values('comment')
+        actual = Coalesce(models.Subquery(likes.annotate(value=models.Count('pk')).values('value')), 0)
+        # Ne réécrire que les compteurs qui ont dérivé
+        return comments.alias(actual=actual).exclude(likes_count=models.F('actual')).update(likes_count=actual)
 
 
 class CommentLike(models.Model):
@@ -124,6 +218,10 @@ class PostView(models.Model):
     class Meta:
         unique_together = ('user', 'post')
         ordering = ['-timestamp']
+        indexes = [
+            # Derniers articles lus (profil)
+            models.Index(fields=['user', '-timestamp'], name='blog_postview_user_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} a lu {self.post.title}" 
\ No newline at end of file
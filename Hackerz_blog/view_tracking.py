@@ -0,0 +1,130 @@
+"""
+Enregistrement différé des lectures d'articles.
+
+post_detail n'écrit plus en base à chaque lecture : record_view() ajoute la
+lecture à un tampon en mémoire (lecteurs connectés et nombre de lectures par
+article), vidé par un thread au plus tard POST_VIEWS_FLUSH_INTERVAL secondes
+après la première lecture en attente, ou dès que le tampon atteint
+MAX_BUFFER entrées. Chaque vidage écrit, dans une seule transaction :
+
+* les lignes PostView des lecteurs connectés, avec bulk_create
+  (ignore_conflicts : un article déjà lu par l'utilisateur est ignoré) ;
+* les compteurs Post.views_count, par des UPDATE groupés (Post.add_views).
+
+Les lectures d'un article ou d'un lecteur supprimés entre-temps sont
+ignorées. Le tampon est propre au processus : il est aussi vidé à l'arrêt de
+celui-ci.
+Avec POST_VIEWS_FLUSH_INTERVAL = 0, les lectures sont écrites immédiatement.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connections, transaction
+
+from .models import Post, PostView
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'entrées en attente déclenchant un vidage immédiat
+MAX_BUFFER = getattr(settings, 'POST_VIEWS_MAX_BUFFER', 500)
+# Nombre de lignes PostView par requête INSERT
+BATCH_SIZE = 200
+
+_readers = set()
+_counts = Counter()
+_lock = threading.Lock()
+_timer = None
+# Vidage déclenché par un tampon plein (un seul à la fois)
+_flush_thread = None
+
+
+def flush_interval():
+    """Délai maximal avant l'écriture d'une lecture (secondes, settings.POST_VIEWS_FLUSH_INTERVAL)."""
+    return getattr(settings, 'POST_VIEWS_FLUSH_INTERVAL', 10)
+
+
+def record_view(post, user=None):
+    """Compte une lecture de l'article (et son lecteur s'il est connecté)."""
+    global _timer, _flush_thread
+    interval = flush_interval()
+    timer = thread = None
+    with _lock:
+        _counts[post.pk] += 1
+        if user is not None and user.is_authenticated:
+            _readers.add((user.pk, post.pk))
+        full = len(_counts) + len(_readers) >= MAX_BUFFER
+        if interval and not full and _timer is None:
+            timer = _timer = threading.Timer(interval, _flush_in_thread)
+            timer.daemon = True
+        elif interval and full and (_flush_thread is None or not _flush_thread.is_alive()):
+            thread = _flush_thread = threading.Thread(target=_flush_in_thread, daemon=True)
+    if not interval:
+        flush()
+    elif timer is not None:
+        timer.start()
+    elif thread is not None:
+        thread.start()
+
+
+def pending():
+    """Nombre de lectures en attente d'écriture."""
+    with _lock:
+        return sum(_counts.values())
+
+
+def flush():
+    """Écrit les lectures en attente ; retourne le nombre de lectures écrites."""
+    global _timer
+    with _lock:
+        readers, counts = set(_readers), dict(_counts)
+        _readers.clear()
+        _counts.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not counts:
+        return 0
+    try:
+        with transaction.atomic():
+            # Article ou lecteur supprimé depuis la lecture : lectures abandonnées
+            # (les garder ferait échouer ce vidage et tous les suivants)
+            posts = set(Post.objects.filter(pk__in=counts).values_list('pk', flat=True))
+            users = set(User.objects.filter(pk__in={user_id for user_id, _ in readers}).values_list('pk', flat=True))
+            counts = {post_id: count for post_id, count in counts.items() if post_id in posts}
+            readers = {(user_id, post_id) for user_id, post_id in readers if post_id in posts and user_id in users}
+            PostView.objects.bulk_create(
+                [PostView(user_id=user_id, post_id=post_id) for user_id, post_id in readers],
+                ignore_conflicts=True,
+                batch_size=BATCH_SIZE,
+            )
+            Post.add_views(counts)
+    except Exception:
+        # Remettre les lectures dans le tampon pour le prochain vidage
+        with _lock:
+            _readers.update(readers)
+            _counts.update(counts)
+        raise
+    return sum(counts.values())
+
+
+def _flush_in_thread():
+    close_old_connections()
+    try:
+        flush()
+    except Exception:
+        logger.exception("Échec de l'écriture des lectures d'articles")
+    finally:
+        # La connexion appartient au thread de vidage : on la libère
+        connections.close_all()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception("Lectures d'articles perdues à l'arrêt du processus")
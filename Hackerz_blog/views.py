@@ -1,86 +1,28 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.urls import reverse
-from .models import Post, Category, Tag, Comment, PostView, CommentLike
+from .models import Post, Category, Tag, Comment, CommentLike
+from Hackerz import caching, navigation
+from Hackerz.pagination import paginate_listing, pagination_query
+from . import view_tracking
+from .comment_tree import load_comment_tree
 from django import forms
-import markdown
-import re
 import json
 import html
 import bleach
-import traceback
+import logging
 
-
-def convert_markdown(content):
-    """
-    Convertit le contenu Markdown en HTML avec un formatage amélioré pour les titres, les listes, les blocs de code, etc.
-    """
-    # Ajuster le contenu pour améliorer la mise en page
-    content = preprocess_markdown(content)
-    
-    # Configuration du parser Markdown avec les extensions
-    md = markdown.Markdown(extensions=[
-        'markdown.extensions.fenced_code',  # Pour les blocs de code avec ```
-        'markdown.extensions.codehilite',   # Pour la coloration syntaxique
-        'markdown.extensions.tables',       # Pour les tableaux
-        'markdown.extensions.nl2br',        # Convertir les retours à la ligne en <br>
-        'markdown.extensions.extra',        # Fonctionnalités supplémentaires comme les footnotes
-    ])
-    
-    # Convertir Markdown en HTML
-    html = md.convert(content)
-    
-    # Améliorer le style des blocs de code
-    html = re.sub(r'<pre><code>(.*?)</code></pre>', r'<pre class="code-block"><code>\1</code></pre>', html, flags=re.DOTALL)
-    
-    # Améliorer les listes à puces
-    html = re.sub(r'<ul>\s*<li>', r'<ul class="styled-list">\n<li>', html)
-    
-    # Améliorer les listes numérotées
-    html = re.sub(r'<ol>\s*<li>', r'<ol class="styled-list">\n<li>', html)
-    
-    return html
+logger = logging.getLogger(__name__)
 
 
-def preprocess_markdown(content):
-    """
-    Prétraite le contenu Markdown pour améliorer le formatage
-    """
-    # Vérifier s'il commence par un titre, sinon ajouter un titre h1 ou h2 basé sur le premier paragraphe
-    if not content.startswith('# ') and not content.startswith('## '):
-        # Trouver le premier paragraphe substantiel pour en faire un titre
-        paragraphs = content.split('\n\n')
-        if paragraphs and len(paragraphs[0]) > 10:
-            # Extraire le premier paragraphe comme introduction
-            intro = paragraphs[0]
-            
-            # Essayer de trouver une phrase complète pour le titre
-            sentences = re.split(r'(?<=[.!?])\s+', intro)
-            if sentences and len(sentences[0]) > 5:
-                # Utiliser la première phrase comme titre si elle est assez longue
-                title = sentences[0].strip()
-                if len(title) > 80:
-                    # Si trop long, prendre seulement le début
-                    title = title[:80] + '...'
-                
-                # Insérer un titre h1 au début
-                content = f"# {title}\n\n{content}"
-    
-    # Ajouter un espacement cohérent avant chaque titre
-    content = re.sub(r'([^\n])\n(#{1,4}\s)', r'\1\n\n\2', content)
-    
-    # Améliorer les listes en ajoutant des espaces entre les éléments si nécessaire
-    content = re.sub(r'(\n- [^\n]+)(\n- )', r'\1\n\2', content)
-    content = re.sub(r'(\n\d+\. [^\n]+)(\n\d+\. )', r'\1\n\2', content)
-    
-    # Améliorer les blocs de code en s'assurant qu'ils ont un langage spécifié
-    content = re.sub(r'```\n', r'```text\n', content)
-    
-    return content
+def _sort_posts(request, posts):
+    """Tri demandé par ?sort= : les plus lus (popular) ou les plus récents (par défaut)."""
+    if request.GET.get('sort') == 'popular':
+        return posts.order_by('-views_count', '-publish')
+    return posts
 
 
 def post_list(request, category_slug=None):
@@ -90,23 +32,15 @@ def post_list(request, category_slug=None):
     if category_slug:
         category = get_object_or_404(Category, slug=category_slug)
         posts = posts.filter(category=category)
+    posts = _sort_posts(request, posts)
     
-    # Pagination
-    paginator = Paginator(posts, 4)  # 4 posts per page
+    # Pagination (par numéro de page ou par curseur, voir Hackerz/pagination.py)
     page = request.GET.get('page')
+    posts = paginate_listing(request, posts, 4)  # 4 posts per page
     
-    try:
-        posts = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page
-        posts = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range, deliver last page
-        posts = paginator.page(paginator.num_pages)
-    
-    categories = Category.objects.all()
-    recent_posts = Post.objects.filter(status='published').order_by('-publish')[:3]
-    tags = Tag.objects.all()
+    categories = navigation.blog_categories()
+    recent_posts = navigation.recent_posts()
+    tags = navigation.blog_tags()
     
     context = {
         'posts': posts,
@@ -115,93 +49,66 @@ def post_list(request, category_slug=None):
         'recent_posts': recent_posts,
         'tags': tags,
         'page': page,
+        'pagination_query': pagination_query(request),
     }
     
     return render(request, 'blog/blog.html', context)
 
 
+def _post_page(post_slug):
+    """Article (avec son HTML pré-rendu) et articles similaires, mis en cache ensemble (None si introuvable)."""
+    post = Post.objects.filter(slug=post_slug).select_related('author', 'category').prefetch_related('tags').first()
+    if post is None:
+        return None
+    return {
+        'post': post,
+        'post_content_html': post.formatted_content(),
+        'similar_posts': list(Post.objects.filter(status='published', category=post.category).exclude(id=post.id)[:3]),
+    }
+
+
 def post_detail(request, post_slug):
     """Vue pour afficher le détail d'un post de blog et gérer les commentaires"""
     
-    # Récupérer l'article
-    post = get_object_or_404(Post, slug=post_slug)
-    
-    # Enregistrer la vue si l'utilisateur est connecté
-    if request.user.is_authenticated:
-        PostView.objects.get_or_create(user=request.user, post=post)
+    # Récupérer l'article (données communes servies depuis l'espace « blog » du cache)
+    page = caching.get_or_compute('blog', ('post', post_slug), lambda: _post_page(post_slug))
+    if page is None:
+        raise Http404("Aucun article ne correspond à cette adresse.")
+    post = page['post']
     
-    # Récupérer les commentaires actifs (commentaires parents uniquement)
-    comments = post.comments.filter(active=True, parent=None).order_by('-created')
+    # Compter la lecture (et le lecteur s'il est connecté) ; écrite en base par lots
+    if request.method == 'GET':
+        view_tracking.record_view(post, request.user)
     
     # Vérifier si c'est une requête AJAX
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
     
-    # Débogage détaillé
-    print(f"\n{'='*50}")
-    print(f"DÉTAIL DE LA REQUÊTE - {timezone.now()}")
-    print(f"{'='*50}")
-    print(f"Méthode: {request.method}")
-    print(f"Est AJAX: {is_ajax}")
-    print(f"URL: {request.path}")
-    print(f"Utilisateur: {request.user.username if request.user.is_authenticated else 'Anonyme'}")
-    
-    # Afficher les en-têtes
-    print("\nEN-TÊTES:")
-    for header, value in request.headers.items():
-        print(f"  {header}: {value}")
-    
-    # Afficher les cookies
-    print("\nCOOKIES:")
-    for key, value in request.COOKIES.items():
-        print(f"  {key}: {value}")
-    
-    # Afficher les données POST si applicable
-    if request.method == 'POST':
-        print("\nDONNÉES POST:")
-        for key, value in request.POST.items():
-            print(f"  {key}: {value}")
-        
-        # Afficher les fichiers si présents
-        if request.FILES:
-            print("\nFICHIERS:")
-            for key, value in request.FILES.items():
-                print(f"  {key}: {value}")
-    
     # Gérer la soumission de commentaire
     if request.method == 'POST':
         action = request.POST.get('action', '')
-        print(f"\nAction demandée: {action}")
+        logger.debug("post_detail : action %r (AJAX : %s)", action, is_ajax)
         
         # Traitement AJAX
         if is_ajax:
-            print("Traitement AJAX du commentaire")
             # Code existant pour AJAX...
             pass
         
         # Traitement standard de formulaire (non-AJAX)
         elif action == 'add_comment':
-            print("Traitement standard du commentaire")
-            
             try:
                 # Récupérer les données du formulaire
                 if request.user.is_authenticated:
                     name = request.user.username
                     email = request.user.email
-                    print(f"Utilisateur authentifié: {name} ({email})")
                 else:
                     name = request.POST.get('name', 'Anonyme').strip()
                     email = request.POST.get('email', 'anonyme@example.com').strip()
-                    print(f"Utilisateur anonyme: {name} ({email})")
                 
                 body = request.POST.get('body', '').strip()
                 parent_id = request.POST.get('parent_id')
-                print(f"Contenu du commentaire: {body}")
-                if parent_id:
-                    print(f"En réponse au commentaire: {parent_id}")
                 
                 # Vérifier que le corps du message n'est pas vide
                 if not body:
-                    print("ERREUR: Corps du commentaire vide")
                     messages.error(request, "Le commentaire ne peut pas être vide")
                     return redirect('blog:post_detail', post_slug=post_slug)
                 
@@ -224,7 +131,7 @@ def post_detail(request, post_slug):
                     active=True
                 )
                 
-                print(f"SUCCÈS: Commentaire créé avec ID {comment.id}")
+                logger.info("Commentaire #%s ajouté à l'article %s", comment.id, post.pk)
                 messages.success(request, "Votre commentaire a été ajouté avec succès!")
                 
                 # Réserver le traitement AJAX pour la version future et rediriger 
@@ -232,46 +139,40 @@ def post_detail(request, post_slug):
                 return redirect('blog:post_detail', post_slug=post_slug)
                 
             except Exception as e:
-                print(f"EXCEPTION: {str(e)}")
-                print("Traceback complet:")
-                traceback.print_exc()
+                logger.exception("Erreur lors de l'ajout d'un commentaire à l'article %s", post.pk)
                 
                 messages.error(request, f"Erreur lors de l'ajout du commentaire: {str(e)}")
                 return redirect('blog:post_detail', post_slug=post_slug)
     
-    # Convertir le contenu Markdown en HTML
-    post_content_html = convert_markdown(post.content)
+    # HTML pré-rendu du contenu et articles similaires, calculés par _post_page()
+    post_content_html = page['post_content_html']
+    similar_posts = page['similar_posts']
     
-    # Trouver des articles similaires
-    similar_posts = Post.objects.filter(status='published', category=post.category).exclude(id=post.id)[:3]
+    # Fils de commentaires de la page seulement, réponses et « j'aime » compris
+    comment_tree = load_comment_tree(post, request.user, request.GET.get('comments_page'))
     
     # Rendu de la page
     return render(request,
                 'blog/post_detail.html',
                 {'post': post,
                 'post_content_html': post_content_html,
-                'comments': comments,
+                'comments': comment_tree.threads,
+                'comment_tree': comment_tree,
                 'similar_posts': similar_posts})
 
 
 def tag_view(request, tag_slug):
     tag = get_object_or_404(Tag, slug=tag_slug)
     posts = Post.objects.filter(tags=tag, status='published')
+    posts = _sort_posts(request, posts)
     
-    # Pagination
-    paginator = Paginator(posts, 4)  # 4 posts per page
+    # Pagination (par numéro de page ou par curseur, voir Hackerz/pagination.py)
     page = request.GET.get('page')
+    posts = paginate_listing(request, posts, 4)  # 4 posts per page
     
-    try:
-        posts = paginator.page(page)
-    except PageNotAnInteger:
-        posts = paginator.page(1)
-    except EmptyPage:
-        posts = paginator.page(paginator.num_pages)
-    
-    categories = Category.objects.all()
-    recent_posts = Post.objects.filter(status='published').order_by('-publish')[:3]
-    tags = Tag.objects.all()
+    categories = navigation.blog_categories()
+    recent_posts = navigation.recent_posts()
+    tags = navigation.blog_tags()
     
     context = {
         'tag': tag,
@@ -280,6 +181,7 @@ def tag_view(request, tag_slug):
         'recent_posts': recent_posts,
         'tags': tags,
         'page': page,
+        'pagination_query': pagination_query(request),
     }
     
     return render(request, 'blog/blog.html', context)
@@ -288,21 +190,15 @@ def tag_view(request, tag_slug):
 def category_view(request, category_slug):
     category = get_object_or_404(Category, slug=category_slug)
     posts = Post.objects.filter(category=category, status='published')
+    posts = _sort_posts(request, posts)
     
-    # Pagination
-    paginator = Paginator(posts, 4)  # 4 posts per page
+    # Pagination (par numéro de page ou par curseur, voir Hackerz/pagination.py)
     page = request.GET.get('page')
+    posts = paginate_listing(request, posts, 4)  # 4 posts per page
     
-    try:
-        posts = paginator.page(page)
-    except PageNotAnInteger:
-        posts = paginator.page(1)
-    except EmptyPage:
-        posts = paginator.page(paginator.num_pages)
-    
-    categories = Category.objects.all()
-    recent_posts = Post.objects.filter(status='published').order_by('-publish')[:3]
-    tags = Tag.objects.all()
+    categories = navigation.blog_categories()
+    recent_posts = navigation.recent_posts()
+    tags = navigation.blog_tags()
     
     context = {
         'category': category,
@@ -311,6 +207,7 @@ def category_view(request, category_slug):
         'recent_posts': recent_posts,
         'tags': tags,
         'page': page,
+        'pagination_query': pagination_query(request),
     }
     
     return render(request, 'blog/blog.html', context)
@@ -491,25 +388,11 @@ def create_post(request):
     """
     Permet à un utilisateur authentifié de créer un nouvel article de blog
     """
-    # Ajouter du logging pour diagnotiquer les problèmes
-    print("=" * 80)
-    print(f"Fonction create_post appelée")
-    print(f"Méthode: {request.method}")
-    print(f"Authentifié: {request.user.is_authenticated}")
-    print(f"Headers: {request.headers}")
-    
     # Vérifier si c'est une requête AJAX
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
-    print(f"Est AJAX: {is_ajax}")
+    logger.debug("create_post : %s (AJAX : %s)", request.method, is_ajax)
     
     if request.method == 'POST':
-        print("Données POST reçues:")
-        for key, value in request.POST.items():
-            if key != 'content':  # Pour éviter d'imprimer tout le contenu
-                print(f"  {key}: {value}")
-            else:
-                print(f"  {key}: {value[:100]}...")  # Imprimer seulement le début du contenu
-        
         title = request.POST.get('title')
         content = request.POST.get('content')
         category_id = request.POST.get('category')
@@ -518,7 +401,10 @@ def create_post(request):
         
         # Validation de base
         if not title or not content or not category_id:
-            print(f"Validation échouée: title={bool(title)}, content={bool(content)}, category_id={bool(category_id)}")
+            logger.debug(
+                "create_post : champs manquants (titre=%s, contenu=%s, catégorie=%s)",
+                bool(title), bool(content), bool(category_id),
+            )
             if is_ajax:
                 return JsonResponse({
                     'status': 'error',
@@ -531,9 +417,8 @@ def create_post(request):
         # Récupération de la catégorie
         try:
             category = Category.objects.get(id=category_id)
-            print(f"Catégorie trouvée: {category.name}")
         except Category.DoesNotExist:
-            print(f"Catégorie non trouvée pour l'ID: {category_id}")
+            logger.debug("create_post : catégorie %r introuvable", category_id)
             if is_ajax:
                 return JsonResponse({
                     'status': 'error',
@@ -564,13 +449,12 @@ def create_post(request):
                 status=status
             )
             
-            print(f"Article créé avec succès: id={post.id}, slug={post.slug}")
+            logger.info("Article #%s créé (%s)", post.id, post.slug)
             
             # Ajout de l'image si présente
             if 'image' in request.FILES:
                 post.image = request.FILES['image']
                 post.save()
-                print("Image ajoutée à l'article")
             
             # Traitement des tags
             if tags_input:
@@ -588,8 +472,6 @@ def create_post(request):
                         
                         # Association du tag à l'article
                         post.tags.add(tag)
-                
-                print(f"Tags ajoutés: {tags_input}")
             
             # Réponse différente selon le type de requête
             if is_ajax:
@@ -610,7 +492,7 @@ def create_post(request):
                     return redirect(reverse('profile') + '#blog-posts')
                     
         except Exception as e:
-            print(f"Erreur lors de la création de l'article: {str(e)}")
+            logger.exception("Erreur lors de la création d'un article")
             if is_ajax:
                 return JsonResponse({
                     'status': 'error',
@@ -621,7 +503,6 @@ def create_post(request):
                 return redirect('profile')
     
     # Si ce n'est pas une requête POST
-    print("Requête non-POST reçue")
     if is_ajax:
         return JsonResponse({
             'status': 'error',
@@ -644,8 +525,8 @@ def edit_post(request, post_slug):
         return redirect('blog:post_detail', post_slug=post_slug)
     
     # Récupérer toutes les catégories et tous les tags pour le formulaire
-    categories = Category.objects.all()
-    all_tags = Tag.objects.all()
+    categories = navigation.blog_categories()
+    all_tags = navigation.blog_tags()
     
     # Vérifier si c'est une requête AJAX
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
@@ -801,7 +682,7 @@ def profile_view(request):
     user_posts = Post.objects.filter(author=request.user).order_by('-publish')
     
     # Récupérer les catégories pour le formulaire de création d'article
-    categories = Category.objects.all()
+    categories = navigation.blog_categories()
     
     # Ajouter ces éléments au contexte
     context = {
@@ -1041,23 +922,14 @@ def comment_action(request):
             # Récupérer le commentaire
             comment = get_object_or_404(Comment, id=comment_id)
             
-            # Vérifier si l'utilisateur a déjà liké ce commentaire
-            like, created = CommentLike.objects.get_or_create(
-                user=request.user,
-                comment=comment
-            )
-            
-            # Si le like existait déjà, on le supprime (unlike)
-            if not created:
-                like.delete()
-                liked = False
-                message = 'Like retiré avec succès'
-            else:
-                liked = True
-                message = 'Commentaire liké avec succès'
-            
-            # Récupérer le nombre total de likes
-            likes_count = comment.likes_count()
+            # État souhaité envoyé par le client (rejouer la requête ne change rien) ;
+            # à défaut, inverser l'état actuel
+            liked = data.get('liked')
+            if not isinstance(liked, bool):
+                liked = not CommentLike.objects.filter(user=request.user, comment=comment).exists()
+            comment.set_liked(request.user, liked)
+            likes_count = comment.likes_count
+            message = 'Commentaire liké avec succès' if liked else 'Like retiré avec succès'
             
             # Retourner les informations sur le like
             return JsonResponse({
@@ -1072,6 +944,5 @@ def comment_action(request):
             return JsonResponse({'success': False, 'message': 'Action inconnue'}, status=400)
     
     except Exception as e:
-        print(f"Erreur dans comment_action: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Erreur dans comment_action")
         return JsonResponse({'success': False, 'message': f'Erreur serveur: {str(e)}'}, status=500)
\ No newline at end of file
@@ -0,0 +1,67 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from Hackerz.pagination import CachedCountPaginator, cached_count
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    """Pagination par numéro de page dont le COUNT(*) est mis en cache."""
+    django_paginator_class = CachedCountPaginator
+
+
+class CountedCursorPagination(CursorPagination):
+    """
+    Pagination par curseur (keyset) : le coût d'une page ne dépend pas de sa
+    profondeur. Le nombre total renvoyé est une valeur mise en cache.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = cached_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
+
+
+class ProductCursorPagination(CountedCursorPagination):
+    ordering = 'name'
+
+
+class PostCursorPagination(CountedCursorPagination):
+    ordering = '-publish'
+
+
+class CursorPaginationMixin:
+    """
+    Permet à un viewset de passer en pagination par curseur avec
+    ``?cursor=...`` ou ``?pagination=cursor`` ; la pagination par numéro de
+    page reste celle par défaut.
+    """
+    cursor_pagination_class = None
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return 'cursor' in params or params.get('pagination') == 'cursor'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.cursor_pagination_class is not None and self.use_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -29,7 +29,7 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'slug', 'image', 'description', 'regular_price', 'price',
             'stock', 'available', 'created', 'updated', 'featured', 'category', 'category_id',
-            'vendor_id', 'vendor_name'
+            'vendor_id', 'vendor_name', 'avg_rating', 'review_count'
         ]
         extra_kwargs = {
             'image': {'required': False}
@@ -73,6 +73,10 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
     
     def get_total_cost(self, obj):
+        # Annotation SQL posée par OrderViewSet, sinon calcul en Python
+        total_cost = getattr(obj, 'total_cost', None)
+        if total_cost is not None:
+            return total_cost
         return obj.get_total_cost()
 
 
@@ -114,8 +118,12 @@ class PostSerializer(serializers.ModelSerializer):
         model = Post
         fields = [
             'id', 'title', 'slug', 'author', 'content', 'image', 'category', 'category_id',
-            'tags', 'tag_ids', 'publish', 'created', 'updated', 'status', 'comments_count'
+            'tags', 'tag_ids', 'publish', 'created', 'updated', 'status', 'comments_count', 'views_count'
         ]
     
     def get_comments_count(self, obj):
+        # Annotation SQL posée par PostViewSet, sinon une requête COUNT
+        comments_count = getattr(obj, 'comments_count', None)
+        if comments_count is not None:
+            return comments_count
         return obj.comments.filter(active=True).count() 
\ No newline at end of file
@@ -3,17 +3,68 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
 
+from Hackerz import caching
+
+from .pagination import CursorPaginationMixin, ProductCursorPagination, PostCursorPagination
 from .serializers import (
     UserSerializer, ProductSerializer, ShopCategorySerializer, ReviewSerializer,
     OrderSerializer, PostSerializer, BlogCategorySerializer, CommentSerializer,
     TagSerializer
 )
 
-from Hackerz_E_commerce.models import Product, Category as ShopCategory, Review, Order
+from Hackerz_E_commerce.models import Product, Category as ShopCategory, Review, Order, OrderItem
 from Hackerz_blog.models import Post, Category as BlogCategory, Comment, Tag
 
 
+class QueryPlanMixin:
+    """
+    Déclare le plan de chargement (select_related, prefetch_related, annotate)
+    correspondant au sérialiseur du viewset, pour que les listes s'exécutent
+    en un nombre constant de requêtes quelle que soit la taille de la page.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    annotations = {}
+
+    def apply_query_plan(self, queryset):
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset
+
+    def get_queryset(self):
+        return self.apply_query_plan(super().get_queryset())
+
+
+class CachedListMixin:
+    """
+    Sert depuis l'espace « api » du cache applicatif (Hackerz/caching.py) les
+    listes demandées par les clients anonymes. L'espace est invalidé par les
+    signaux des modèles du catalogue et du blog (Hackerz/signals.py).
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        data = caching.get_or_compute(
+            'api', (self.basename, 'list', request.get_full_path()),
+            lambda: super(CachedListMixin, self).list(request, *args, **kwargs).data,
+        )
+        return Response(data)
+
+
+def _subquery_sum(queryset, group_by, expression, output_field):
+    """Somme calculée par sous-requête corrélée (insensible aux jointures des filtres)."""
+    total = queryset.order_by().values(group_by).annotate(value=Sum(expression, output_field=output_field)).values('value')
+    return Coalesce(Subquery(total, output_field=output_field), 0, output_field=output_field)
+
+
 # Vues pour les utilisateurs
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
@@ -22,7 +73,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 # Vues pour l'e-commerce
-class ShopCategoryViewSet(viewsets.ModelViewSet):
+class ShopCategoryViewSet(CachedListMixin, viewsets.ModelViewSet):
     queryset = ShopCategory.objects.all()
     serializer_class = ShopCategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -31,7 +82,7 @@ class ShopCategoryViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CursorPaginationMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Product.objects.filter(available=True)
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -39,18 +90,21 @@ class ProductViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category__slug', 'featured', 'price']
     search_fields = ['name', 'description']
-    ordering_fields = ['name', 'price', 'created']
+    ordering_fields = ['name', 'price', 'created', 'avg_rating', 'review_count']
+    cursor_pagination_class = ProductCursorPagination
+    select_related_fields = ('category', 'vendor')
 
     @action(detail=True, methods=['get'])
     def reviews(self, request, slug=None):
         product = self.get_object()
-        reviews = Review.objects.filter(product=product, active=True)
+        reviews = Review.objects.filter(product=product, active=True).select_related('user')
         serializer = ReviewSerializer(reviews, many=True)
         return Response(serializer.data)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Review.objects.filter(active=True)
+    select_related_fields = ('user', 'product')
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -61,52 +115,74 @@ class ReviewViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created', 'status']
     http_method_names = ['get', 'post', 'patch', 'head', 'options']  # Exclude DELETE
+    select_related_fields = ('user',)
+    prefetch_related_fields = (
+        Prefetch('items', queryset=OrderItem.objects.select_related('product__category', 'product__vendor')),
+    )
+    annotations = {
+        'total_cost': _subquery_sum(
+            OrderItem.objects.filter(order=OuterRef('pk')),
+            'order',
+            F('price') * F('quantity'),
+            DecimalField(max_digits=12, decimal_places=2),
+        ),
+    }
     
     def get_queryset(self):
         user = self.request.user
         if user.is_staff:
-            return Order.objects.all()
-        return Order.objects.filter(user=user)
+            return self.apply_query_plan(Order.objects.all())
+        return self.apply_query_plan(Order.objects.filter(user=user))
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
 # Vues pour le blog
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(CachedListMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
 
 
-class BlogCategoryViewSet(viewsets.ModelViewSet):
+class BlogCategoryViewSet(CachedListMixin, viewsets.ModelViewSet):
     queryset = BlogCategory.objects.all()
     serializer_class = BlogCategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(CursorPaginationMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category__slug', 'status', 'tags__slug']
     search_fields = ['title', 'content']
-    ordering_fields = ['publish', 'created']
+    ordering_fields = ['publish', 'created', 'views_count']
+    cursor_pagination_class = PostCursorPagination
+    select_related_fields = ('author', 'category')
+    prefetch_related_fields = ('tags',)
+    annotations = {
+        'comments_count': Coalesce(Subquery(
+            Comment.objects.filter(post=OuterRef('pk'), active=True)
+            .order_by().values('post').annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField(),
+        ), 0),
+    }
     
     def get_queryset(self):
         user = self.request.user
         if user.is_staff or user.is_superuser:
-            return Post.objects.all()
-        return Post.objects.filter(status='published')
+            return self.apply_query_plan(Post.objects.all())
+        return self.apply_query_plan(Post.objects.filter(status='published'))
     
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -119,8 +195,9 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.filter(active=True)
+    select_related_fields = ('post',)
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
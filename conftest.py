@@ -10,7 +10,7 @@ django.setup()
 
 import pytest
 from django.contrib.auth.models import User
-from django.test import Client
+from django.test import Client, override_settings
 from decimal import Decimal
 
 from Hackerz_E_commerce.models import (
@@ -246,6 +246,13 @@ def wishlist(db, user):
     return Wishlist.objects.create(user=user)
 
 
+@pytest.fixture(autouse=True, scope='session')
+def write_post_views_immediately():
+    """Lectures d'articles écrites pendant la requête : pas de thread de vidage pendant les tests."""
+    with override_settings(POST_VIEWS_FLUSH_INTERVAL=0):
+        yield
+
+
 @pytest.fixture(autouse=True)
 def enable_db_access_for_all_tests(db):
     """Permet l'accès à la DB pour tous les tests."""
@@ -0,0 +1,70 @@
+"""
+Fixtures communes des tests.
+
+Les tests de comportement utilisent la base de test de pytest-django ; les
+fichiers générés (factures...) vont dans un répertoire temporaire.
+"""
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def media_root(tmp_path_factory):
+    # Les fichiers générés (factures...) ne doivent pas aller dans media/
+    with override_settings(MEDIA_ROOT=str(tmp_path_factory.mktemp('media'))):
+        yield
+
+
+@pytest.fixture
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def product(db):
+    from Hackerz_E_commerce.models import Category, Product
+
+    category = Category.objects.create(name='Tests', slug='tests-category')
+    return Product.objects.create(
+        category=category, name='Clé USB', slug='tests-cle-usb', description='Clé USB de test',
+        regular_price='20.00', price='15.00', stock=10,
+    )
+
+
+@pytest.fixture
+def make_order(db):
+    from Hackerz_E_commerce.models import Order, OrderItem
+
+    def make(product, quantity=1, **fields):
+        order = Order.objects.create(
+            first_name='Ada', last_name='Lovelace', email=fields.pop('email', 'ada@example.com'),
+            address='1 rue du Test', postal_code='75001', city='Paris', **fields,
+        )
+        OrderItem.objects.create(order=order, product=product, price=product.price, quantity=quantity)
+        return order
+    return make
+
+
+@pytest.fixture
+def user(db):
+    from django.contrib.auth.models import User
+
+    return User.objects.create_user('lecteur', 'lecteur@example.com', 'motdepasse')
+
+
+@pytest.fixture
+def make_post(db):
+    from django.contrib.auth.models import User
+    from Hackerz_blog.models import Category, Post
+
+    def make(title='Article de test', **fields):
+        author, _ = User.objects.get_or_create(username='auteur-tests', defaults={'email': 'auteur@example.com'})
+        category, _ = Category.objects.get_or_create(slug='tests-blog', defaults={'name': 'Tests'})
+        return Post.objects.create(
+            title=title, slug=fields.pop('slug', title.lower().replace(' ', '-')), author=author,
+            content='Contenu', category=category, status='published', **fields,
+        )
+    return make
@@ -0,0 +1,61 @@
+"""
+Fixtures des tests de performance.
+
+Le jeu de données est inséré une seule fois pour la session ; chaque test
+s'exécute ensuite dans une transaction annulée à la fin du test.
+
+Variables d'environnement :
+
+* PERF_SCALE : multiplicateur des volumes du jeu de données ;
+* PERF_UPDATE_BASELINE=1 : réécrit baseline.json avec les mesures au lieu de
+  les comparer.
+
+Les fichiers générés vont dans le MEDIA_ROOT temporaire de tests/conftest.py.
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from . import dataset
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+UPDATE_BASELINE = os.environ.get('PERF_UPDATE_BASELINE') == '1'
+
+_measurements = {}
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        dataset.seed()
+
+
+@pytest.fixture
+def perf_data(db):
+    return dataset.load()
+
+
+@pytest.fixture(scope='session')
+def baseline():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text(encoding='utf-8'))
+    return {}
+
+
+@pytest.fixture(scope='session')
+def record_measurement():
+    def record(route_id, measurement):
+        _measurements[route_id] = measurement
+    return record
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not (UPDATE_BASELINE and _measurements):
+        return
+    data = {}
+    if BASELINE_PATH.exists():
+        data = json.loads(BASELINE_PATH.read_text(encoding='utf-8'))
+    data.update(_measurements)
+    BASELINE_PATH.write_text(json.dumps(dict(sorted(data.items())), indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
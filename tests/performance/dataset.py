@@ -0,0 +1,258 @@
+"""
+Jeu de données réaliste pour les tests de performance.
+
+Les volumes sont multipliés par la variable d'environnement PERF_SCALE
+(1 par défaut : quelques milliers de produits, d'avis, de commentaires et de
+commandes). Les lignes sont insérées avec bulk_create ; les index et caches
+normalement maintenus par les signaux sont reconstruits à la fin.
+"""
+import os
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.utils import timezone
+
+from Hackerz.models import EmailConfirmationToken, Profile, Vendor, Wishlist
+from Hackerz_E_commerce.models import Cart, CartItem, Category, Order, OrderItem, Product, Review
+from Hackerz_blog.models import Category as BlogCategory, Comment, CommentLike, Post, PostView, Tag
+
+PERF_SCALE = float(os.environ.get('PERF_SCALE', '1'))
+
+VOLUMES = {
+    'users': 200,
+    'vendors': 40,
+    'categories': 20,
+    'products': 2000,
+    'reviews': 4000,
+    'blog_categories': 10,
+    'tags': 30,
+    'posts': 500,
+    'comments': 5000,
+    'orders': 1000,
+}
+
+PASSWORD = 'perf-pass-123'
+
+DESCRIPTION = """## {name}
+
+Outil de test d'intrusion n°{index}.
+
+- Compatible Linux et Windows
+- Livré avec sa documentation
+
+```python
+print("hello {index}")
+```
+"""
+
+CONTENT = """# {title}
+
+Introduction de l'article {index} sur la sécurité offensive.
+
+## Mise en place
+
+1. Installer les outils
+2. Lancer le scan
+
+```bash
+nmap -sV 10.0.0.{index}
+```
+"""
+
+
+@dataclass
+class PerfData:
+    """Objets de référence utilisés pour construire les URLs testées."""
+    user: User
+    staff: User
+    category: Category
+    product: Product
+    cart_product: Product
+    vendor_product: Product
+    blog_category: BlogCategory
+    tag: Tag
+    post: Post
+    own_post: Post
+    comment: Comment
+    order: Order
+    review: Review
+    email_token: EmailConfirmationToken
+    cart: Cart
+
+
+def volume(name):
+    return max(1, int(VOLUMES[name] * PERF_SCALE))
+
+
+def seed():
+    rng = random.Random(42)
+    now = timezone.now()
+
+    for name in ('Administrateurs', 'Vendeurs', 'Clients'):
+        Group.objects.get_or_create(name=name)
+
+    # Utilisateurs de référence, créés normalement (signaux du profil compris)
+    user = User.objects.create_user('perf_user', 'perf_user@example.com', PASSWORD, first_name='Perf', last_name='User')
+    staff = User.objects.create_user('perf_staff', 'perf_staff@example.com', PASSWORD, is_staff=True, is_superuser=True)
+    user.profile.address = '1 rue du Test'
+    user.profile.city = 'Paris'
+    user.profile.postal_code = '75001'
+    user.profile.is_vendor = True
+    user.profile.save()
+    user.groups.add(Group.objects.get(name='Clients'), Group.objects.get(name='Vendeurs'))
+    own_vendor = Vendor.objects.create(profile=user.profile, shop_name='Perf Shop', is_approved=True)
+    email_token = EmailConfirmationToken.objects.create(user=user)
+
+    # Utilisateurs en masse
+    User.objects.bulk_create([
+        User(username=f'user{i}', email=f'user{i}@example.com', password='!')
+        for i in range(volume('users'))
+    ], batch_size=500)
+    users = list(User.objects.filter(username__startswith='user').order_by('pk'))
+    Profile.objects.bulk_create([Profile(user=u) for u in users], batch_size=500, ignore_conflicts=True)
+    profiles = list(Profile.objects.filter(user__in=users).order_by('pk'))
+    Vendor.objects.bulk_create([
+        Vendor(profile=p, shop_name=f'Boutique {i}', is_approved=i % 4 != 0)
+        for i, p in enumerate(profiles[:volume('vendors')])
+    ], batch_size=500)
+    vendors = list(Vendor.objects.exclude(pk=own_vendor.pk).order_by('pk'))
+
+    # Boutique
+    Category.objects.bulk_create([
+        Category(name=f'Catégorie {i}', slug=f'categorie-{i}', description=f'Catégorie numéro {i}')
+        for i in range(volume('categories'))
+    ])
+    categories = list(Category.objects.order_by('pk'))
+    products = []
+    for i in range(volume('products')):
+        price = Decimal(rng.randint(500, 50000)) / 100
+        products.append(Product(
+            vendor=own_vendor if i % 50 == 0 else rng.choice(vendors),
+            category=categories[i % len(categories)],
+            name=f'Produit {i:05d}',
+            slug=f'produit-{i:05d}',
+            image=f'products/perf/produit-{i % 10}.jpg',
+            description=DESCRIPTION.format(name=f'Produit {i}', index=i),
+            regular_price=price + 10,
+            price=price,
+            stock=rng.randint(0, 100),
+            available=i % 20 != 0,
+            featured=i % 25 == 0,
+        ))
+    Product.objects.bulk_create(products, batch_size=500)
+    products = list(Product.objects.order_by('pk'))
+    available = [p for p in products if p.available]
+
+    reviewers = users[:100]
+    Review.objects.bulk_create([
+        Review(
+            product=available[i % len(available)],
+            user=reviewers[i % len(reviewers)],
+            rating=rng.randint(1, 5),
+            title=f'Avis {i}',
+            comment='Très bon produit, livraison rapide.',
+        )
+        for i in range(volume('reviews'))
+    ], batch_size=500)
+
+    orders = []
+    for i in range(volume('orders')):
+        owner = user if i % 50 == 0 else users[i % len(users)]
+        orders.append(Order(
+            user=owner, first_name='Client', last_name=str(i), email=owner.email,
+            address='1 rue du Test', postal_code='75001', city='Paris',
+            paid=True, status=rng.choice(['pending', 'processing', 'shipped', 'delivered']),
+        ))
+    Order.objects.bulk_create(orders, batch_size=500)
+    orders = list(Order.objects.order_by('pk'))
+    order_items = []
+    for order in orders:
+        for product in rng.sample(available, 3):
+            order_items.append(OrderItem(order=order, product=product, price=product.price, quantity=rng.randint(1, 3)))
+    OrderItem.objects.bulk_create(order_items, batch_size=1000)
+
+    wishlist = Wishlist.objects.create(user=user)
+    wishlist.products.add(*available[:20])
+    cart = Cart.objects.create(cart_id='perf-cart')
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=p, quantity=2) for p in available[1:6]])
+    Cart.update_summaries([cart])
+
+    # Blog
+    BlogCategory.objects.bulk_create([
+        BlogCategory(name=f'Rubrique {i}', slug=f'rubrique-{i}') for i in range(volume('blog_categories'))
+    ])
+    blog_categories = list(BlogCategory.objects.order_by('pk'))
+    Tag.objects.bulk_create([Tag(name=f'tag-{i}', slug=f'tag-{i}') for i in range(volume('tags'))])
+    tags = list(Tag.objects.order_by('pk'))
+    authors = [user, staff] + users[:20]
+    Post.objects.bulk_create([
+        Post(
+            title=f'Article {i}',
+            slug=f'article-{i:04d}',
+            author=authors[i % len(authors)],
+            content=CONTENT.format(title=f'Article {i}', index=i),
+            image=f'blog/perf/article-{i % 10}.jpg',
+            category=blog_categories[i % len(blog_categories)],
+            publish=now - timedelta(hours=i),
+            status='published' if i % 10 else 'draft',
+        )
+        for i in range(volume('posts'))
+    ], batch_size=500)
+    posts = list(Post.objects.order_by('pk'))
+    Post.tags.through.objects.bulk_create([
+        Post.tags.through(post=post, tag=tag)
+        for i, post in enumerate(posts)
+        for tag in {tags[i % len(tags)], tags[(i * 7 + 3) % len(tags)]}
+    ], batch_size=1000)
+
+    published = [p for p in posts if p.status == 'published']
+    Comment.objects.bulk_create([
+        Comment(post=published[i % len(published)], name=f'lecteur{i}', email=f'lecteur{i}@example.com',
+                body=f'Commentaire {i}')
+        for i in range(volume('comments'))
+    ], batch_size=1000)
+    comments = list(Comment.objects.order_by('pk')[:volume('comments') // 5])
+    Comment.objects.bulk_create([
+        Comment(post=parent.post, parent=parent, name='auteur', email='auteur@example.com', body='Merci !')
+        for parent in comments
+    ], batch_size=1000)
+    CommentLike.objects.bulk_create([
+        CommentLike(user=users[i % len(users)], comment=comments[i % len(comments)])
+        for i in range(len(comments) * 2)
+    ], batch_size=1000, ignore_conflicts=True)
+    PostView.objects.bulk_create([PostView(user=user, post=post) for post in published[:10]])
+
+    # Index et rendus normalement tenus à jour par les signaux
+    call_command('rebuild_search_index', verbosity=0)
+    call_command('prewarm_markdown', verbosity=0)
+    call_command('rebuild_product_ratings', verbosity=0)
+    call_command('reconcile_comment_likes', verbosity=0)
+    call_command('reconcile_sales_stats', verbosity=0)
+
+
+def load():
+    """Retourne les objets de référence d'un jeu de données déjà inséré."""
+    user = User.objects.get(username='perf_user')
+    post = Post.objects.filter(status='published', comments__isnull=False).order_by('pk').first()
+    product = Product.objects.filter(available=True, reviews__isnull=False).exclude(vendor__profile__user=user).order_by('pk').first()
+    return PerfData(
+        user=user,
+        staff=User.objects.get(username='perf_staff'),
+        category=product.category,
+        product=product,
+        cart_product=CartItem.objects.filter(cart__cart_id='perf-cart').order_by('pk').first().product,
+        vendor_product=Product.objects.filter(vendor__profile__user=user).order_by('pk').first(),
+        blog_category=post.category,
+        tag=post.tags.order_by('pk').first(),
+        post=post,
+        own_post=Post.objects.filter(author=user).order_by('pk').first(),
+        comment=post.comments.filter(parent__isnull=True).order_by('pk').first(),
+        order=Order.objects.filter(user=user).order_by('pk').first(),
+        review=Review.objects.filter(product=product).order_by('pk').first(),
+        email_token=EmailConfirmationToken.objects.get(user=user),
+        cart=Cart.objects.get(cart_id='perf-cart'),
+    )
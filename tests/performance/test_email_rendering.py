@@ -0,0 +1,66 @@
+"""
+Micro-benchmark des emails transactionnels (Hackerz/emails.py).
+
+Un envoi ne doit coûter que le rendu des gabarits compilés : pas de nouvelle
+compilation ni de nouvelle application des styles en ligne à chaque email.
+"""
+import time
+
+import pytest
+from django.template.loader import render_to_string
+
+from Hackerz import emails
+
+pytestmark = pytest.mark.performance
+
+RENDERS = 200
+
+
+def _order_context(data):
+    order_items = list(data.order.items.select_related('product'))
+    return {
+        'order': data.order,
+        'order_items': order_items,
+        'subtotal': '100.00',
+        'tax': '18.00',
+        'shipping': '5.00',
+        'total': '123.00',
+        'site_url': 'http://testserver',
+        'current_year': 2025,
+        'company_name': 'Hackerz E-Commerce',
+    }
+
+
+def _timed(func):
+    start = time.perf_counter()
+    for _ in range(RENDERS):
+        func()
+    return (time.perf_counter() - start) / RENDERS
+
+
+def test_render_does_not_recompile(perf_data):
+    context = _order_context(perf_data)
+    emails.render('order_confirmation', context)
+    misses = emails.compiled.cache_info().misses
+
+    for _ in range(10):
+        email = emails.render('order_confirmation', context)
+
+    assert emails.compiled.cache_info().misses == misses
+    assert email.subject == f'Confirmation de votre commande #{perf_data.order.id}'
+    # Styles appliqués aux balises, version texte fournie
+    assert 'style="' in email.html
+    assert '<style' in email.html
+    assert email.text.strip()
+
+
+def test_compiled_render_faster_than_inlining_each_send(perf_data):
+    context = _order_context(perf_data)
+    emails.render('order_confirmation', context)
+
+    compiled = _timed(lambda: emails.render('order_confirmation', context))
+    per_send = _timed(lambda: emails.inline_css(render_to_string('email/order_confirmation.html', context)))
+
+    assert compiled < per_send, (
+        f"rendu compilé {compiled * 1000:.2f} ms, inlining à chaque envoi {per_send * 1000:.2f} ms"
+    )
@@ -0,0 +1,62 @@
+"""
+Vérifie avec EXPLAIN QUERY PLAN (SQLite) que les requêtes fréquentes des vues
+utilisent les index déclarés dans Meta.indexes, au lieu de parcourir toute la
+table ou de trier en mémoire.
+"""
+import pytest
+from django.db import connection
+
+from Hackerz_E_commerce.models import Cart, CartItem, Order, Product
+from Hackerz_blog.models import Comment, Post, PostView
+
+pytestmark = [
+    pytest.mark.performance,
+    pytest.mark.skipif(connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN est propre à SQLite'),
+]
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+
+def _cases(data):
+    """(description, requête telle qu'écrite dans les vues, index attendu)."""
+    return [
+        ('shop : produits disponibles',
+         Product.objects.filter(available=True)[:4], 'shop_product_avail_name_idx'),
+        ('shop : produits d\'une catégorie',
+         Product.objects.filter(available=True, category=data.category)[:4], 'shop_product_cat_avail_idx'),
+        ('accueil : produits mis en avant',
+         Product.objects.filter(featured=True, available=True)[:4], 'shop_product_featured_idx'),
+        # Cart.objects.get(cart_id=...) : get() supprime le tri
+        ('panier de la session',
+         Cart.objects.filter(cart_id=data.cart.cart_id).order_by(), 'cart_id'),
+        ('articles actifs du panier',
+         CartItem.objects.filter(cart=data.cart, active=True), 'shop_cartitem_cart_active_idx'),
+        ('commandes d\'un client',
+         Order.objects.filter(user=data.user).order_by('-created')[:5], 'shop_order_user_created_idx'),
+        ('commandes par email',
+         Order.objects.filter(email=data.user.email).order_by('-created')[:3], 'shop_order_email_created_idx'),
+        ('blog : articles publiés',
+         Post.objects.filter(status='published')[:6], 'blog_post_status_publish_idx'),
+        ('blog : articles publiés d\'une catégorie',
+         Post.objects.filter(status='published', category=data.blog_category)[:6], 'blog_post_cat_status_idx'),
+        ('commentaires d\'un article',
+         Comment.objects.filter(post=data.post, active=True, parent=None), 'blog_comment_post_active_idx'),
+        ('derniers articles lus',
+         PostView.objects.filter(user=data.user)[:5], 'blog_postview_user_ts_idx'),
+    ]
+
+
+def test_hot_queries_use_indexes(perf_data):
+    failures = []
+    for description, queryset, index in _cases(perf_data):
+        plan = query_plan(queryset)
+        table = queryset.model._meta.db_table
+        # Le premier accès à la table doit passer par l'index, sans tri temporaire
+        if index not in plan or 'USE TEMP B-TREE FOR ORDER BY' in plan or f'SCAN {table}\n' in f'{plan}\n':
+            failures.append(f'{description} (index attendu : {index})\n{plan}')
+    assert not failures, '\n\n'.join(failures)
@@ -0,0 +1,193 @@
+"""
+Benchmark de non-régression : nombre de requêtes SQL et taille de la
+réponse pour chaque route GET de Hackerz.urls (y compris les espaces de noms
+shop, blog, wishlist et api/v1). Le temps de réponse, propre à chaque
+machine, n'est pas comparé à la référence ; les tests de plans de requêtes
+(test_query_plans.py) détectent les régressions d'index.
+
+Les mesures sont comparées à baseline.json ; pour régénérer la référence
+après une évolution volontaire :
+
+    PERF_UPDATE_BASELINE=1 pytest tests/performance
+"""
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .conftest import UPDATE_BASELINE
+
+# Marge relative sur la taille de la réponse (dates, jetons CSRF...)
+SIZE_TOLERANCE = 0.10
+
+# Espaces de noms exclus : l'administration Django n'est pas une page du site
+EXCLUDED_NAMESPACES = ('admin',)
+
+# Routes servies au client anonyme en plus du client connecté
+ANONYMOUS_ROUTES = {
+    'home', 'shop:shop', 'shop:category_view', 'shop:product_detail',
+    'blog:post_list', 'blog:tag_view', 'blog:category_view', 'blog:post_detail',
+    'api:product-list', 'api:post-list',
+}
+
+# Routes réservées aux administrateurs
+STAFF_ROUTES = {'group_users', 'api:user-list', 'api:user-detail'}
+
+# Erreurs déjà présentes dans l'application : mesurées, mais attendues
+KNOWN_ERRORS = {
+    'api:rest_framework:login': "le gabarit de connexion DRF cherche l'espace de noms 'rest_framework'",
+    'shop:delete_product': "l'URL passe product_id à une vue qui attend pk",
+    'update_account': 'gabarit update_account.html manquant',
+    'wishlist': 'gabarit wishlist/wishlist.html manquant',
+    'wishlist:view': 'gabarit wishlist/wishlist.html manquant',
+}
+
+
+def _iter_routes(patterns, namespace=None):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            child = namespace
+            if pattern.namespace:
+                child = f'{namespace}:{pattern.namespace}' if namespace else pattern.namespace
+            yield from _iter_routes(pattern.url_patterns, child)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, tuple(sorted(pattern.pattern.regex.groupindex))
+
+
+def collect_routes():
+    """Routes nommées du projet, une entrée par nom (sans les variantes de format)."""
+    routes = {}
+    for name, params in _iter_routes(get_resolver('Hackerz.urls').url_patterns):
+        if name.split(':')[0] in EXCLUDED_NAMESPACES:
+            continue
+        if 'format' in params and name != 'api:schema-json':
+            continue
+        routes.setdefault(name, params)
+    return sorted(routes.items())
+
+
+def route_kwargs(name, params, data):
+    """Valeurs des paramètres d'URL, prises dans le jeu de données."""
+    by_name = {
+        'shop:category_view': {'category_slug': data.category.slug},
+        'blog:category_view': {'category_slug': data.blog_category.slug},
+        'blog:edit_post': {'post_slug': data.own_post.slug},
+        'blog:publish_post': {'post_id': data.own_post.pk},
+        'shop:cart_remove': {'product_id': data.cart_product.pk},
+        'shop:cart_update': {'product_id': data.cart_product.pk},
+        'shop:delete_from_cart': {'product_id': data.cart_product.pk},
+        'shop:vendor_product_detail': {'product_id': data.vendor_product.pk},
+        'shop:edit_product': {'product_id': data.vendor_product.pk},
+        'shop:delete_product': {'pk': data.vendor_product.pk},
+        'api:product-detail': {'slug': data.product.slug},
+        'api:product-reviews': {'slug': data.product.slug},
+        'api:shopcategory-detail': {'slug': data.category.slug},
+        'api:blog-category-detail': {'slug': data.blog_category.slug},
+        'api:tag-detail': {'slug': data.tag.slug},
+        'api:post-detail': {'slug': data.post.slug},
+        'api:post-comments': {'slug': data.post.slug},
+        'api:review-detail': {'pk': data.review.pk},
+        'api:order-detail': {'pk': data.order.pk},
+        'api:comment-detail': {'pk': data.comment.pk},
+        'api:user-detail': {'pk': data.user.pk},
+        'api:schema-json': {'format': '.json'},
+        'password_reset_confirm': {
+            'uidb64': urlsafe_base64_encode(force_bytes(data.user.pk)),
+            'token': default_token_generator.make_token(data.user),
+        },
+    }
+    common = {
+        'product_id': data.product.pk,
+        'product_slug': data.product.slug,
+        'post_slug': data.post.slug,
+        'post_id': data.post.pk,
+        'tag_slug': data.tag.slug,
+        'comment_id': data.comment.pk,
+        'order_id': data.order.pk,
+        'token': data.email_token.token,
+        'group_name': 'Clients',
+    }
+    values = {**common, **by_name.get(name, {})}
+    missing = [param for param in params if param not in values]
+    if missing:
+        pytest.fail(f"Aucune valeur de test pour {name} ({', '.join(missing)}) : compléter route_kwargs()")
+    return {param: values[param] for param in params}
+
+
+def _cases():
+    for name, params in collect_routes():
+        audiences = ['anonymous', 'user'] if name in ANONYMOUS_ROUTES else ['user']
+        if name in STAFF_ROUTES:
+            audiences = ['staff']
+        for audience in audiences:
+            yield pytest.param(name, params, audience, id=f'{name}[{audience}]')
+
+
+def _make_client(audience, data):
+    client = Client(raise_request_exception=False)
+    if audience == 'user':
+        client.force_login(data.user)
+        session = client.session
+        session['cart_id'] = data.cart.cart_id
+        session.save()
+    elif audience == 'staff':
+        client.force_login(data.staff)
+    return client
+
+
+def _response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(client, url):
+    """Mesure la deuxième requête, après une requête d'échauffement des caches."""
+    cache.clear()
+    with transaction.atomic():
+        client.get(url)
+        transaction.set_rollback(True)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+        size = _response_size(response)
+    return {
+        'status': response.status_code,
+        'queries': len(queries.captured_queries),
+        'bytes': size,
+    }
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize('name, params, audience', list(_cases()))
+def test_route_within_baseline(name, params, audience, perf_data, baseline, record_measurement):
+    url = reverse(name, kwargs=route_kwargs(name, params, perf_data))
+    client = _make_client(audience, perf_data)
+    result = measure(client, url)
+    route_id = f'{name}[{audience}]'
+    record_measurement(route_id, result)
+
+    if UPDATE_BASELINE:
+        return
+    if result['status'] >= 500:
+        if name in KNOWN_ERRORS:
+            pytest.xfail(KNOWN_ERRORS[name])
+        pytest.fail(f"{url} a renvoyé une erreur {result['status']}")
+
+    reference = baseline.get(route_id)
+    if reference is None:
+        pytest.fail(f"Pas de référence pour {route_id} : lancer avec PERF_UPDATE_BASELINE=1")
+
+    assert result['queries'] <= reference['queries'], (
+        f"{url} : {result['queries']} requêtes SQL (référence : {reference['queries']})"
+    )
+    max_size = reference['bytes'] * (1 + SIZE_TOLERANCE) + 512
+    assert result['bytes'] <= max_size, (
+        f"{url} : {result['bytes']} octets (référence : {reference['bytes']})"
+    )
@@ -0,0 +1,130 @@
+"""
+Calcul protégé contre les ruées et recalcul anticipé (Hackerz/caching.py).
+"""
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+
+from Hackerz import caching
+
+
+class FakeClock:
+    """Remplace le module time de caching : le temps n'avance que par sleep()."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.on_sleep = None
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        if self.on_sleep:
+            self.on_sleep()
+
+
+@pytest.fixture
+def clock(monkeypatch, clear_cache):
+    fake = FakeClock()
+    monkeypatch.setattr(caching, 'time', fake)
+    return fake
+
+
+@pytest.fixture
+def draw(monkeypatch):
+    """Fixe le tirage aléatoire de l'algorithme XFetch."""
+    def set_value(value):
+        monkeypatch.setattr(caching, 'random', SimpleNamespace(random=lambda: value))
+    set_value(0.0)
+    return set_value
+
+
+def _compute(value, calls, clock=None):
+    def compute():
+        calls.append(value)
+        if clock is not None:
+            # Calcul d'une seconde : c'est le coût (delta) pris en compte par XFetch
+            clock.now += 1
+        return value
+    return compute
+
+
+def _lock_key(*parts):
+    return caching.make_key('shop', *parts) + ':lock'
+
+
+def test_computed_once_then_served(clock, draw):
+    calls = []
+    assert caching.get_or_compute('shop', 'entree', _compute('a', calls)) == 'a'
+    assert caching.get_or_compute('shop', 'entree', _compute('b', calls)) == 'a'
+    assert calls == ['a']
+    assert cache.get(_lock_key('entree')) is None
+
+
+def test_waits_for_the_process_holding_the_lock(clock, draw):
+    cache.add(_lock_key('entree'), 1)
+    key = caching.make_key('shop', 'entree')
+
+    def other_process_finishes():
+        cache.set(key, ('calculé ailleurs', 0.1, clock.now + 300))
+    clock.on_sleep = other_process_finishes
+
+    calls = []
+    assert caching.get_or_compute('shop', 'entree', _compute('ici', calls)) == 'calculé ailleurs'
+    assert calls == []
+
+
+def test_computes_after_wait_timeout(clock, draw):
+    cache.add(_lock_key('entree'), 1)
+    start = clock.now
+    calls = []
+    assert caching.get_or_compute('shop', 'entree', _compute('ici', calls)) == 'ici'
+    assert calls == ['ici']
+    assert clock.now - start >= caching.WAIT_TIMEOUT
+    # Le verrou appartient à l'autre processus : il n'est pas supprimé
+    assert cache.get(_lock_key('entree')) == 1
+
+
+def test_early_recompute_near_expiry(clock, draw):
+    calls = []
+    caching.get_or_compute('shop', 'entree', _compute('ancien', calls, clock), timeout=300)
+    clock.now += 299
+    # Tirage proche de 1 : -log(1 - r) grand, le recalcul est anticipé
+    draw(0.999999)
+    assert caching.get_or_compute('shop', 'entree', _compute('nouveau', calls), timeout=300) == 'nouveau'
+    assert caching.get_or_compute('shop', 'entree', _compute('autre', calls), timeout=300) == 'nouveau'
+    assert calls == ['ancien', 'nouveau']
+
+
+def test_early_recompute_serves_old_value_while_locked(clock, draw):
+    calls = []
+    caching.get_or_compute('shop', 'entree', _compute('ancien', calls, clock), timeout=300)
+    clock.now += 299
+    draw(0.999999)
+    cache.add(_lock_key('entree'), 1)
+    assert caching.get_or_compute('shop', 'entree', _compute('nouveau', calls), timeout=300) == 'ancien'
+    assert calls == ['ancien']
+
+
+def test_no_early_recompute_far_from_expiry_or_without_beta(clock, draw):
+    calls = []
+    caching.get_or_compute('shop', 'entree', _compute('ancien', calls, clock), timeout=300)
+    draw(0.5)
+    assert caching.get_or_compute('shop', 'entree', _compute('nouveau', calls), timeout=300) == 'ancien'
+    clock.now += 299
+    draw(0.999999)
+    assert caching.get_or_compute('shop', 'entree', _compute('nouveau', calls), timeout=300, beta=0) == 'ancien'
+    assert calls == ['ancien']
+
+
+def test_bump_version_invalidates_namespace(clock, draw):
+    calls = []
+    caching.get_or_compute('shop', 'entree', _compute('a', calls))
+    caching.bump_version('shop')
+    assert caching.get_or_compute('shop', 'entree', _compute('b', calls)) == 'b'
+    assert caching.get_or_compute('blog', 'entree', _compute('c', calls)) == 'c'
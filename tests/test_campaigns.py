@@ -0,0 +1,119 @@
+"""
+Campagnes de newsletter envoyées par lots avec reprise (Hackerz/campaigns.py).
+"""
+import smtplib
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.utils import timezone
+
+from Hackerz import campaigns, outbox, tasks
+from Hackerz.models import BackgroundTask, CampaignDelivery, NewsletterCampaign, NewsletterSubscriber, OutboundEmail
+
+
+@pytest.fixture(autouse=True)
+def worker_mode(monkeypatch):
+    monkeypatch.setattr(tasks, 'MODE', 'worker')
+
+
+@pytest.fixture
+def campaign(db):
+    subscribers = [NewsletterSubscriber.objects.create(email=f'abonne{i}@example.com') for i in range(5)]
+    return NewsletterCampaign.objects.create(
+        subject='Nouveautés', body='Texte', subscriber_ids=[subscriber.pk for subscriber in subscribers],
+    )
+
+
+def _recipients():
+    return Counter(address for message in mail.outbox for address in message.to)
+
+
+def test_interrupted_campaign_resumes_without_duplicates(campaign, monkeypatch):
+    send_messages = locmem.EmailBackend.send_messages
+
+    def disconnect_on_third(self, messages):
+        if messages[0].to == ['abonne2@example.com'] and not getattr(disconnect_on_third, 'done', False):
+            disconnect_on_third.done = True
+            raise smtplib.SMTPServerDisconnected('connexion perdue')
+        return send_messages(self, messages)
+
+    monkeypatch.setattr(locmem.EmailBackend, 'send_messages', disconnect_on_third)
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        campaigns.run(campaign, chunk_size=2)
+    campaign.refresh_from_db()
+    assert campaign.status == 'failed'
+    assert campaign.sent_count == 2
+
+    campaigns.run(campaign, chunk_size=2)
+    campaign.refresh_from_db()
+    assert campaign.status == 'sent'
+    assert campaign.sent_count == 5
+    assert set(_recipients().values()) == {1}
+    assert len(_recipients()) == 5
+
+
+def test_campaign_claimed_by_one_run_only(campaign):
+    assert campaigns.claim(campaign)
+    # Un second envoi (tâche, commande) ne peut pas réserver la campagne en cours d'envoi
+    assert campaigns.run(campaign) is None
+    assert mail.outbox == []
+
+
+def test_start_does_not_enqueue_twice(campaign):
+    assert campaigns.start(campaign)
+    # Envoi interrompu : la tâche attend une nouvelle tentative
+    NewsletterCampaign.objects.filter(pk=campaign.pk).update(status='failed')
+    campaign.refresh_from_db()
+    assert not campaigns.start(campaign)
+    assert BackgroundTask.objects.filter(reference=f'campaign:{campaign.pk}').count() == 1
+
+
+def test_sent_campaign_is_not_sent_again(campaign):
+    campaigns.run(campaign)
+    assert campaigns.run(campaign) is None
+    assert len(mail.outbox) == 5
+
+
+def test_campaign_defers_recipients_over_domain_quota(campaign, monkeypatch):
+    monkeypatch.setattr(outbox, 'RATE_LIMITS', {'example.com': 2})
+    other = NewsletterSubscriber.objects.create(email='ada@corp.com')
+    NewsletterCampaign.objects.filter(pk=campaign.pk).update(subscriber_ids=campaign.subscriber_ids + [other.pk])
+
+    result = campaigns.send_campaign(campaign.pk)
+    assert result == {'sent': 3, 'failed': 0, 'throttled': True}
+    # Le quota de example.com ne retient pas les autres domaines
+    assert _recipients()['ada@corp.com'] == 1
+    assert sum(1 for address in _recipients() if address.endswith('@example.com')) == 2
+    campaign.refresh_from_db()
+    assert campaign.status == 'queued'
+    assert CampaignDelivery.objects.filter(campaign=campaign, status='deferred').count() == 3
+    retry = BackgroundTask.objects.get(name=campaigns.SEND_CAMPAIGN, reference=f'campaign:{campaign.pk}', status='pending')
+    assert retry.run_after > timezone.now()
+
+    # Fenêtre de quota écoulée : les destinataires différés sont repris
+    CampaignDelivery.objects.filter(campaign=campaign).update(
+        sent_at=timezone.now() - timedelta(seconds=outbox.RATE_WINDOW + 1),
+    )
+    assert campaigns.send_campaign(campaign.pk) == {'sent': 5, 'failed': 0, 'throttled': True}
+    CampaignDelivery.objects.filter(campaign=campaign).update(
+        sent_at=timezone.now() - timedelta(seconds=outbox.RATE_WINDOW + 1),
+    )
+    assert campaigns.send_campaign(campaign.pk) == {'sent': 6, 'failed': 0}
+    campaign.refresh_from_db()
+    assert campaign.status == 'sent'
+    assert set(_recipients().values()) == {1}
+    assert len(_recipients()) == 6
+
+
+def test_outbox_quota_counts_campaign_sends(campaign, monkeypatch):
+    monkeypatch.setattr(outbox, 'RATE_LIMITS', {'example.com': 5})
+    campaigns.run(campaign)
+    email = outbox.enqueue('Mot de passe', 'Texte', ['ada@example.com'])
+
+    outbox.deliver_pending()
+    email.refresh_from_db()
+    assert email.status == 'pending'
+    assert not OutboundEmail.objects.filter(status='sent').exists()
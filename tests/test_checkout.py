@@ -0,0 +1,69 @@
+"""
+Passage de commande (Hackerz_E_commerce/checkout.py).
+"""
+from decimal import Decimal
+
+import pytest
+
+from Hackerz_E_commerce import checkout
+from Hackerz_E_commerce.models import Cart, CartItem, Order, Product
+
+CUSTOMER = {
+    'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com',
+    'address': '1 rue du Test', 'postal_code': '75001', 'city': 'Paris',
+}
+
+
+@pytest.fixture
+def other_product(product):
+    return Product.objects.create(
+        category=product.category, name='Câble', slug='tests-cable', description='Câble de test',
+        regular_price='5.00', price='5.00', stock=2,
+    )
+
+
+def _cart(*lines):
+    cart = Cart.objects.create(cart_id='tests-checkout')
+    for product, quantity in lines:
+        CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    return cart
+
+
+def _stock(product):
+    return Product.objects.values_list('stock', flat=True).get(pk=product.pk)
+
+
+def test_place_order_decrements_stock(product, other_product):
+    cart = _cart((product, 3), (other_product, 2))
+    order, subtotal = checkout.place_order(cart, **CUSTOMER)
+    assert subtotal == Decimal('55.00')
+    assert order.items.count() == 2
+    assert (_stock(product), _stock(other_product)) == (7, 0)
+    assert not CartItem.objects.filter(cart=cart).exists()
+
+
+def test_out_of_stock_writes_nothing(product, other_product):
+    cart = _cart((product, 3), (other_product, 5))
+    orders = Order.objects.count()
+
+    with pytest.raises(checkout.InsufficientStockError) as excinfo:
+        checkout.place_order(cart, **CUSTOMER)
+
+    [line] = excinfo.value.lines
+    assert (line.product.pk, line.requested, line.available) == (other_product.pk, 5, 2)
+    # Aucun stock décrémenté, aucune commande, panier intact
+    assert (_stock(product), _stock(other_product)) == (10, 2)
+    assert Order.objects.count() == orders
+    assert CartItem.objects.filter(cart=cart).count() == 2
+
+
+def test_quantities_of_same_product_are_cumulated(product):
+    cart = _cart((product, 6), (product, 6))
+    with pytest.raises(checkout.InsufficientStockError):
+        checkout.place_order(cart, **CUSTOMER)
+    assert _stock(product) == 10
+
+
+def test_empty_cart(db):
+    with pytest.raises(checkout.EmptyCartError):
+        checkout.place_order(_cart(), **CUSTOMER)
@@ -0,0 +1,54 @@
+"""
+« J'aime » des commentaires du blog (Comment.set_liked, action AJAX « like »).
+"""
+import json
+
+import pytest
+from django.urls import reverse
+
+from Hackerz_blog.models import Comment, CommentLike
+
+
+@pytest.fixture
+def comment(make_post):
+    return Comment.objects.create(post=make_post(), name='Ada', email='ada@example.com', body='Bravo')
+
+
+def _like(client, comment, **fields):
+    response = client.post(
+        reverse('blog:comment_action'),
+        json.dumps({'action': 'like', 'comment_id': comment.pk, **fields}),
+        content_type='application/json', HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_replayed_like_is_counted_once(client, user, comment):
+    client.force_login(user)
+    assert _like(client, comment, liked=True)['likes_count'] == 1
+    # Requête rejouée (double clic, nouvel essai du client)
+    assert _like(client, comment, liked=True)['likes_count'] == 1
+    comment.refresh_from_db()
+    assert comment.likes_count == 1
+    assert CommentLike.objects.filter(comment=comment).count() == 1
+
+    assert _like(client, comment, liked=False)['likes_count'] == 0
+    assert _like(client, comment, liked=False)['likes_count'] == 0
+
+
+def test_like_without_state_toggles(client, user, comment):
+    client.force_login(user)
+    assert _like(client, comment)['liked'] is True
+    assert _like(client, comment)['liked'] is False
+    comment.refresh_from_db()
+    assert comment.likes_count == 0
+
+
+def test_save_does_not_overwrite_likes(user, comment):
+    stale = Comment.objects.get(pk=comment.pk)
+    comment.set_liked(user, True)
+    stale.body = 'Bravo !'
+    stale.save()
+    stale.refresh_from_db()
+    assert stale.likes_count == 1
@@ -0,0 +1,88 @@
+"""
+Arbre des commentaires d'un article (Hackerz_blog/comment_tree.py).
+"""
+import pytest
+from django.contrib.auth.models import AnonymousUser
+
+from Hackerz_blog.comment_tree import load_comment_tree
+from Hackerz_blog.models import Comment
+
+
+@pytest.fixture
+def post(make_post):
+    return make_post()
+
+
+@pytest.fixture
+def comment(post):
+    def make(body, parent=None, **fields):
+        return Comment.objects.create(post=post, name='Ada', email='ada@example.com', body=body, parent=parent, **fields)
+    return make
+
+
+def _bodies(comments):
+    return [(comment.body, _bodies(comment.children)) for comment in comments]
+
+
+def test_tree_is_assembled_for_the_requested_page(post, comment):
+    first = comment('Premier')
+    reply = comment('Réponse', parent=first)
+    comment('Réponse à la réponse', parent=reply)
+    comment('Second')
+
+    tree = load_comment_tree(post, per_page=1)
+    assert tree.total == 4
+    # Fils les plus récents d'abord
+    assert _bodies(tree.threads) == [('Second', [])]
+
+    tree = load_comment_tree(post, page=2, per_page=1)
+    assert _bodies(tree.threads) == [('Premier', [('Réponse', [('Réponse à la réponse', [])])])]
+    assert tree.threads[0].children[0].parent is tree.threads[0]
+
+
+def test_invalid_page_falls_back(post, comment):
+    comment('Premier')
+    comment('Second')
+    assert _bodies(load_comment_tree(post, page='abc', per_page=1).threads) == [('Second', [])]
+    assert _bodies(load_comment_tree(post, page=9, per_page=1).threads) == [('Premier', [])]
+
+
+def test_replies_under_inactive_parent_are_hidden(post, comment):
+    first = comment('Premier')
+    hidden = comment('Masquée', parent=first, active=False)
+    comment('Sous une réponse masquée', parent=hidden)
+    comment('Fil masqué', active=False)
+
+    tree = load_comment_tree(post)
+    assert _bodies(tree.threads) == [('Premier', [])]
+    assert tree.total == 1
+
+
+def test_liked_flag(post, comment, user):
+    first = comment('Premier')
+    reply = comment('Réponse', parent=first)
+    reply.set_liked(user, True)
+
+    thread = load_comment_tree(post, user).threads[0]
+    assert thread.liked is False
+    assert thread.children[0].liked is True
+    assert thread.children[0].likes_count == 1
+    assert load_comment_tree(post, AnonymousUser()).threads[0].children[0].liked is False
+
+
+def test_query_count_does_not_depend_on_comments(post, comment, django_assert_num_queries):
+    for i in range(3):
+        parent = comment(f'Fil {i}')
+        for depth in range(3):
+            parent = comment(f'Réponse {i}.{depth}', parent=parent)
+    # Fils plus récents, en page 1 : ni chargés ni parcourus
+    for i in range(5):
+        comment(f'Fil récent {i}')
+
+    # Nombre de fils, identifiants de la page, fils de la page, total
+    with django_assert_num_queries(4):
+        tree = load_comment_tree(post, page=2, per_page=5)
+        threads = _bodies(tree.threads)
+    assert [body for body, _ in threads] == ['Fil 2', 'Fil 1', 'Fil 0']
+    assert threads[0][1] == [('Réponse 2.0', [('Réponse 2.1', [('Réponse 2.2', [])])])]
+    assert tree.total == 17
@@ -0,0 +1,36 @@
+"""
+Commande d'export en flux continu (Hackerz/exports.py, export_data).
+"""
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def _exported_ids(*args):
+    out = StringIO()
+    call_command('export_data', 'orders', '--format', 'jsonl', *args, stdout=out)
+    return {json.loads(line)['order_id'] for line in out.getvalue().splitlines()}
+
+
+@pytest.mark.parametrize('value', ['true', 'True', 'TRUE', '1'])
+def test_boolean_filter(product, make_order, value):
+    paid = make_order(product, paid=True)
+    unpaid = make_order(product, paid=False)
+    exported = _exported_ids('--filter', f'paid={value}', '--filter', 'email=ada@example.com')
+    assert paid.pk in exported
+    assert unpaid.pk not in exported
+
+
+def test_in_and_status_filters(product, make_order):
+    shipped = make_order(product, status='shipped')
+    pending = make_order(product, status='pending')
+    exported = _exported_ids('--filter', f'id__in={shipped.pk},{pending.pk}', '--filter', 'status=shipped')
+    assert exported == {shipped.pk}
+
+
+def test_invalid_filter_value(db):
+    with pytest.raises(CommandError):
+        _exported_ids('--filter', 'paid=peut-être')
@@ -0,0 +1,113 @@
+"""
+Journalisation structurée (Hackerz/log.py).
+"""
+import json
+import logging
+import sys
+from decimal import Decimal
+
+import pytest
+from django.http import HttpResponse
+
+from Hackerz import log
+
+
+def _record(level=logging.INFO, msg='Panier %s', args=(42,), exc_info=None, **extra):
+    record = logging.LogRecord('Hackerz.tests', level, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+def _middleware(seen):
+    def get_response(request):
+        seen.append(log.request_id.get())
+        return HttpResponse()
+    return log.RequestIdMiddleware(get_response)
+
+
+def test_request_id_header_is_reused_and_echoed(rf):
+    seen = []
+    request = rf.get('/', HTTP_X_REQUEST_ID='proxy-1234.a_b')
+    response = _middleware(seen)(request)
+    assert seen == ['proxy-1234.a_b']
+    assert request.request_id == 'proxy-1234.a_b'
+    assert response[log.REQUEST_ID_HEADER] == 'proxy-1234.a_b'
+    # Hors requête
+    assert log.request_id.get() == '-'
+
+
+@pytest.mark.parametrize('header', ['', 'id avec espaces', 'x\nfaux log', 'a' * 65])
+def test_unsafe_request_id_is_replaced(rf, header):
+    seen = []
+    response = _middleware(seen)(rf.get('/', HTTP_X_REQUEST_ID=header))
+    generated = response[log.REQUEST_ID_HEADER]
+    assert generated != header
+    assert len(generated) == 32
+    assert seen == [generated]
+
+
+def test_request_id_is_reset_after_an_error(rf):
+    def get_response(request):
+        raise ValueError('erreur de vue')
+
+    with pytest.raises(ValueError):
+        log.RequestIdMiddleware(get_response)(rf.get('/', HTTP_X_REQUEST_ID='abc'))
+    assert log.request_id.get() == '-'
+
+
+def test_request_id_filter():
+    record = _record()
+    assert log.RequestIdFilter().filter(record)
+    assert record.request_id == '-'
+    token = log.request_id.set('abc')
+    try:
+        log.RequestIdFilter().filter(record)
+    finally:
+        log.request_id.reset(token)
+    assert record.request_id == 'abc'
+
+
+def test_sampling_keeps_warnings_and_a_fraction_of_the_rest(monkeypatch):
+    sampling = log.SamplingFilter('0.25')
+    monkeypatch.setattr(log.random, 'random', lambda: 0.5)
+    assert not sampling.filter(_record(logging.INFO))
+    assert not sampling.filter(_record(logging.DEBUG))
+    assert sampling.filter(_record(logging.WARNING))
+    assert sampling.filter(_record(logging.ERROR))
+    monkeypatch.setattr(log.random, 'random', lambda: 0.1)
+    assert sampling.filter(_record(logging.INFO))
+
+
+def test_sampling_disabled_at_full_rate(monkeypatch):
+    monkeypatch.setattr(log.random, 'random', lambda: 0.99)
+    assert log.SamplingFilter().filter(_record(logging.DEBUG))
+
+
+def test_json_formatter_includes_extra_fields():
+    record = _record(request_id='abc', cart_id=42, amount=12.5)
+    entry = json.loads(log.JsonFormatter().format(record))
+    assert entry['message'] == 'Panier 42'
+    assert (entry['level'], entry['logger'], entry['request_id']) == ('INFO', 'Hackerz.tests', 'abc')
+    assert (entry['cart_id'], entry['amount']) == (42, 12.5)
+    # Attributs standard du LogRecord non repris
+    assert not {'args', 'msg', 'levelno', 'pathname'} & set(entry)
+    assert 'exception' not in entry
+
+
+def test_json_formatter_serializes_exceptions_and_other_values():
+    try:
+        raise ValueError('échec')
+    except ValueError:
+        record = _record(logging.ERROR, exc_info=sys.exc_info(), total=Decimal('12.50'))
+    entry = json.loads(log.JsonFormatter().format(record))
+    assert 'ValueError: échec' in entry['exception']
+    assert entry['total'] == '12.50'
+    assert entry['request_id'] == '-'
+
+
+def test_module_levels():
+    assert log.module_levels(' Hackerz_blog=debug , Hackerz.tasks=WARNING,,invalide,=INFO,vide=') == {
+        'Hackerz_blog': {'level': 'DEBUG'},
+        'Hackerz.tasks': {'level': 'WARNING'},
+    }
+    assert log.module_levels('') == {}
@@ -0,0 +1,53 @@
+"""
+Champs compteurs protégés par save() (Hackerz/model_mixins.py).
+"""
+from Hackerz_blog.models import Comment, Post
+from Hackerz_E_commerce.models import Order, Product
+
+
+def test_save_keeps_counters_updated_meanwhile(product, make_order, make_post):
+    stale = Product.objects.get(pk=product.pk)
+    Product.apply_rating_delta(product.pk, 1, 5)
+    stale.name = 'Clé USB 3.0'
+    stale.save()
+    product.refresh_from_db()
+    assert (product.name, product.review_count, product.rating_sum) == ('Clé USB 3.0', 1, 5)
+
+    order = make_order(product)
+    stale = Order.objects.get(pk=order.pk)
+    Order.objects.filter(pk=order.pk).update(sales_recorded=True)
+    stale.city = 'Lyon'
+    stale.save()
+    assert Order.objects.values_list('city', 'sales_recorded').get(pk=order.pk) == ('Lyon', True)
+
+    post = make_post()
+    stale = Post.objects.get(pk=post.pk)
+    Post.objects.filter(pk=post.pk).update(views_count=7)
+    stale.title = 'Nouveau titre'
+    stale.save()
+    assert Post.objects.values_list('title', 'views_count').get(pk=post.pk) == ('Nouveau titre', 7)
+
+
+def test_save_of_deleted_row_inserts_it(product, make_post):
+    Product.apply_rating_delta(product.pk, 2, 9)
+    product.refresh_from_db()
+    Product.objects.filter(pk=product.pk).delete()
+    product.save()
+    restored = Product.objects.get(pk=product.pk)
+    # Insertion complète : les compteurs de l'instance sont enregistrés
+    assert (restored.review_count, restored.rating_sum) == (2, 9)
+    assert restored.description_html
+
+    comment = Comment.objects.create(post=make_post(), name='Ada', email='ada@example.com', body='Bravo')
+    Comment.objects.filter(pk=comment.pk).delete()
+    comment.body = 'Bravo !'
+    comment.save()
+    assert Comment.objects.get(pk=comment.pk).body == 'Bravo !'
+
+
+def test_explicit_update_fields_are_kept(product):
+    Product.apply_rating_delta(product.pk, 1, 4)
+    product.stock = 3
+    product.save(update_fields=['stock'])
+    product.refresh_from_db()
+    assert (product.stock, product.review_count) == (3, 1)
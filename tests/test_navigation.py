@@ -0,0 +1,44 @@
+"""
+Invalidation du cache de navigation (Hackerz/navigation.py, signaux de Hackerz/signals.py).
+"""
+import pytest
+
+from Hackerz import navigation
+from Hackerz_blog.models import Tag
+from Hackerz_E_commerce.models import Category
+
+
+@pytest.fixture(autouse=True)
+def cleared(clear_cache):
+    navigation._memo.clear()
+    yield
+    navigation._memo.clear()
+
+
+def test_category_save_bumps_navigation(db, django_assert_num_queries):
+    category = Category.objects.create(name='Réseau', slug='tests-reseau')
+    assert category in navigation.shop_categories()
+    # Servi depuis la mémoire du processus
+    with django_assert_num_queries(0):
+        navigation.shop_categories()
+
+    before = navigation.get_version()
+    category.name = 'Réseaux'
+    category.save()
+    assert navigation.get_version() > before
+    assert 'Réseaux' in [item.name for item in navigation.shop_categories()]
+
+
+def test_post_tags_change_bumps_navigation(make_post):
+    post = make_post()
+    tag = Tag.objects.create(name='Sécurité', slug='tests-securite')
+    assert [list(item.tags.all()) for item in navigation.recent_posts() if item.pk == post.pk] == [[]]
+
+    before = navigation.get_version()
+    post.tags.add(tag)
+    assert navigation.get_version() > before
+    assert [list(item.tags.all()) for item in navigation.recent_posts() if item.pk == post.pk] == [[tag]]
+
+    before = navigation.get_version()
+    post.tags.remove(tag)
+    assert navigation.get_version() > before
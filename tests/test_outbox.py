@@ -0,0 +1,144 @@
+"""
+Boîte d'envoi des emails (Hackerz/outbox.py).
+"""
+import smtplib
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.utils import timezone
+
+from Hackerz import outbox, tasks as tasks_queue
+from Hackerz.models import BackgroundTask, OutboundEmail
+from Hackerz_E_commerce import invoices, tasks
+
+
+@pytest.fixture(autouse=True)
+def worker_mode(monkeypatch):
+    # La remise est déclenchée explicitement par les tests
+    monkeypatch.setattr('Hackerz.tasks.MODE', 'worker')
+
+
+def test_order_confirmation_attaches_current_invoice(product, make_order):
+    order = make_order(product)
+    tasks.send_order_confirmation(order.id, 'http://testserver')
+    first_version = invoices.storage_name(order)
+
+    # La commande change avant l'envoi : l'ancienne facture est supprimée
+    order.paid = True
+    order.save()
+    invoices.get_invoice(order)
+    assert invoices.storage_name(order) != first_version
+
+    outbox.deliver_pending()
+    email = OutboundEmail.objects.get(reference=f'order:{order.id}')
+    assert email.status == 'sent'
+    (filename, content, mimetype), = mail.outbox[-1].attachments
+    assert filename == invoices.invoice_filename(order)
+    assert content.startswith(b'%PDF')
+
+
+def test_missing_attachment_is_a_permanent_failure(db):
+    email = outbox.enqueue('Objet', 'Texte', ['ada@example.com'], attachments=[
+        {'path': 'introuvable/facture.pdf', 'filename': 'facture.pdf', 'mimetype': 'application/pdf'},
+    ])
+    outbox.deliver_pending()
+    email.refresh_from_db()
+    assert email.status == 'failed'
+    assert email.attempts == 1
+    assert 'MissingAttachment' in email.last_error
+
+
+@pytest.fixture
+def smtp_error(monkeypatch):
+    """Fait échouer tous les envois avec l'exception donnée."""
+    def install(exc):
+        def send_messages(self, messages):
+            raise exc
+        monkeypatch.setattr(locmem.EmailBackend, 'send_messages', send_messages)
+    return install
+
+
+def test_transient_failure_is_retried_later(db, smtp_error):
+    smtp_error(smtplib.SMTPServerDisconnected('connexion perdue'))
+    email = outbox.enqueue('Objet', 'Texte', ['ada@example.com'])
+    outbox.deliver_pending()
+    email.refresh_from_db()
+    assert email.status == 'pending'
+    assert email.attempts == 1
+    assert email.send_after > timezone.now()
+    assert 'SMTPServerDisconnected' in email.last_error
+    # Pas encore dû : le lot suivant ne le reprend pas
+    assert outbox.deliver_pending() == 0
+
+
+def test_failed_after_max_attempts(db, smtp_error):
+    smtp_error(smtplib.SMTPServerDisconnected('connexion perdue'))
+    email = outbox.enqueue('Objet', 'Texte', ['ada@example.com'])
+    OutboundEmail.objects.filter(pk=email.pk).update(attempts=email.max_attempts - 1)
+    outbox.deliver_pending()
+    email.refresh_from_db()
+    assert email.status == 'failed'
+
+
+def test_refused_recipient_is_a_permanent_failure(db, smtp_error):
+    smtp_error(smtplib.SMTPRecipientsRefused({'ada@example.com': (550, b'Utilisateur inconnu')}))
+    email = outbox.enqueue('Objet', 'Texte', ['ada@example.com'])
+    outbox.deliver_pending()
+    email.refresh_from_db()
+    assert email.status == 'failed'
+    assert email.attempts == 1
+
+
+def test_saturated_domain_does_not_hold_back_other_domains(db, monkeypatch):
+    monkeypatch.setattr(outbox, 'RATE_LIMITS', {'gmail.com': 2})
+    now = timezone.now()
+    OutboundEmail.objects.bulk_create([
+        OutboundEmail(subject='Envoyé', body='Texte', to=[f'deja{i}@gmail.com'], domain='gmail.com',
+                      status='sent', sent_at=now)
+        for i in range(2)
+    ] + [
+        OutboundEmail(subject='En attente', body='Texte', to=[f'abonne{i}@gmail.com'], domain='gmail.com',
+                      send_after=now)
+        for i in range(250)
+    ])
+    reset = outbox.enqueue('Mot de passe', 'Texte', ['ada@corp.com'])
+
+    outbox.deliver_pending()
+    reset.refresh_from_db()
+    assert reset.status == 'sent'
+    assert OutboundEmail.objects.filter(domain='gmail.com', status='pending').count() == 250
+
+
+def _delivery_tasks():
+    return BackgroundTask.objects.filter(name=outbox.DELIVER, status='pending')
+
+
+def test_one_delivery_task_for_many_emails(db):
+    for i in range(3):
+        outbox.enqueue('Objet', 'Texte', [f'abonne{i}@example.com'])
+    assert _delivery_tasks().count() == 1
+
+
+def test_delivery_task_sends_a_batch_and_schedules_the_next(db, monkeypatch):
+    monkeypatch.setattr(outbox, 'BATCH_SIZE', 2)
+    for i in range(3):
+        outbox.enqueue('Objet', 'Texte', [f'abonne{i}@example.com'])
+    _delivery_tasks().update(run_after=timezone.now())
+
+    assert tasks_queue.run_pending() == 1
+    assert OutboundEmail.objects.filter(status='sent').count() == 2
+    # Lot complet : une nouvelle tâche due immédiatement
+    assert tasks_queue.run_pending() == 1
+    assert OutboundEmail.objects.filter(status='pending').count() == 0
+    assert not _delivery_tasks().exists()
+
+
+def test_failed_email_is_retried_by_a_later_task(db, smtp_error):
+    smtp_error(smtplib.SMTPServerDisconnected('connexion perdue'))
+    email = outbox.enqueue('Objet', 'Texte', ['ada@example.com'])
+    tasks_queue.run_pending()
+    email.refresh_from_db()
+    retry = _delivery_tasks().get()
+    assert retry.run_after >= email.send_after - timedelta(seconds=1)
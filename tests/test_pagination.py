@@ -0,0 +1,44 @@
+"""
+Pagination des listes (Hackerz/pagination.py).
+"""
+import datetime
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from Hackerz.pagination import KeysetPaginator, cached_count
+from Hackerz_blog.models import Post
+from Hackerz_E_commerce.models import Product
+
+
+@pytest.mark.django_db
+def test_cached_count_of_empty_queryset():
+    assert cached_count(Product.objects.none()) == 0
+    assert cached_count(Product.objects.filter(id__in=[])) == 0
+
+
+@pytest.mark.django_db
+def test_search_without_results(client, clear_cache):
+    response = client.get(reverse('shop:shop'), {'q': 'zzqxjaucunresultat'})
+    assert response.status_code == 200
+
+
+def test_cursor_keeps_microseconds(make_post):
+    # Trois articles publiés dans la même milliseconde
+    base = timezone.now().replace(microsecond=0) + datetime.timedelta(days=365)
+    posts = [
+        make_post(f'Article {i}', publish=base + datetime.timedelta(microseconds=100 * i))
+        for i in range(3)
+    ]
+    queryset = Post.objects.filter(pk__in=[post.pk for post in posts]).order_by('-publish')
+    paginator = KeysetPaginator(queryset, per_page=1)
+
+    seen, cursor = [], None
+    while True:
+        page = paginator.page(cursor)
+        seen.extend(post.pk for post in page)
+        if not page.has_next():
+            break
+        cursor = page.next_cursor
+    assert seen == [post.pk for post in reversed(posts)]
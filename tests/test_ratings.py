@@ -0,0 +1,81 @@
+"""
+Notes dénormalisées des produits (Product.apply_rating_delta, signaux de Review).
+"""
+from decimal import Decimal
+
+import pytest
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+
+from Hackerz_E_commerce.models import Product, Review
+
+
+@pytest.fixture
+def reviewers(db):
+    return [User.objects.create_user(f'client-{i}', f'client{i}@example.com', 'motdepasse') for i in range(3)]
+
+
+def _review(product, user, rating, **fields):
+    return Review.objects.create(product=product, user=user, rating=rating, title='Avis', comment='Avis', **fields)
+
+
+def _ratings(product):
+    product.refresh_from_db()
+    return product.review_count, product.rating_sum, product.avg_rating
+
+
+def test_rating_follows_review_changes(product, reviewers):
+    first = _review(product, reviewers[0], 4)
+    second = _review(product, reviewers[1], 2)
+    assert _ratings(product) == (2, 6, Decimal('3.00'))
+
+    second.rating = 5
+    second.save()
+    assert _ratings(product) == (2, 9, Decimal('4.50'))
+
+    first.active = False
+    first.save()
+    assert _ratings(product) == (1, 5, Decimal('5.00'))
+
+    # Un avis inactif ne compte pas, même quand sa note change
+    first.rating = 1
+    first.save()
+    assert _ratings(product) == (1, 5, Decimal('5.00'))
+
+    second.delete()
+    assert _ratings(product) == (0, 0, Decimal('0.00'))
+
+
+def test_inactive_review_created(product, reviewers):
+    _review(product, reviewers[0], 3, active=False)
+    assert _ratings(product) == (0, 0, Decimal('0.00'))
+
+
+def test_review_moved_to_another_product(product, reviewers):
+    other = Product.objects.create(
+        category=product.category, name='Autre', slug='tests-autre', description='Autre',
+        regular_price='10.00', price='10.00', stock=1,
+    )
+    review = _review(product, reviewers[0], 4)
+    review.product = other
+    review.save()
+    assert _ratings(product) == (0, 0, Decimal('0.00'))
+    assert _ratings(other) == (1, 4, Decimal('4.00'))
+
+
+def test_admin_moderation_recomputes_ratings(product, reviewers):
+    reviews = [_review(product, user, rating) for user, rating in zip(reviewers, (5, 4, 1))]
+    admin = site._registry[Review]
+
+    assert admin._set_active(Review.objects.filter(pk=reviews[2].pk), False) == 1
+    assert _ratings(product) == (2, 9, Decimal('4.50'))
+    admin._set_active(Review.objects.filter(product=product), True)
+    assert _ratings(product) == (3, 10, Decimal('3.33'))
+
+
+def test_product_save_keeps_ratings(product, reviewers):
+    stale = Product.objects.get(pk=product.pk)
+    _review(product, reviewers[0], 5)
+    stale.name = 'Clé USB 64 Go'
+    stale.save()
+    assert _ratings(product) == (1, 5, Decimal('5.00'))
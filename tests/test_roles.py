@@ -0,0 +1,46 @@
+"""
+Rôles des utilisateurs et mémoire des identifiants de groupes (Hackerz/roles.py).
+"""
+import pytest
+from django.contrib.auth.models import Group
+
+from Hackerz import caching, roles
+
+
+@pytest.fixture(autouse=True)
+def fresh_roles(db, clear_cache):
+    roles.clear()
+    yield
+    roles.clear()
+
+
+def test_group_ids_reloaded_when_another_process_recreates_a_group(django_assert_num_queries):
+    roles.group_ids()
+    ids = roles.group_ids()
+    with django_assert_num_queries(0):
+        assert roles.group_ids() == ids
+
+    # Un autre processus remplace le groupe : aucun signal dans ce processus,
+    # seule la version partagée de l'espace « roles » est incrémentée
+    Group.objects.filter(pk=ids[roles.VENDOR_GROUP]).update(name='Vendeurs (supprimé)')
+    Group.objects.bulk_create([Group(name=roles.VENDOR_GROUP)])
+    caching.bump_version(roles.NAMESPACE)
+
+    recreated = Group.objects.get(name=roles.VENDOR_GROUP)
+    assert roles.group_id(roles.VENDOR_GROUP) == recreated.pk != ids[roles.VENDOR_GROUP]
+
+def test_group_ids_reloaded_after_group_deleted():
+    vendor_id = roles.group_id(roles.VENDOR_GROUP)
+    Group.objects.filter(pk=vendor_id).delete()
+    assert roles.group_id(roles.VENDOR_GROUP) == Group.objects.get(name=roles.VENDOR_GROUP).pk != vendor_id
+
+
+def test_roles_loaded_once_and_forgotten(user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert not roles.get_roles(user).is_client
+        assert not roles.get_roles(user).is_admin
+
+    user.groups.add(roles.group_id(roles.CLIENT_GROUP))
+    assert not roles.get_roles(user).is_client
+    roles.forget(user)
+    assert roles.get_roles(user).is_client
@@ -0,0 +1,94 @@
+"""
+Statistiques de ventes matérialisées (Hackerz_E_commerce/sales.py).
+"""
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+
+from Hackerz_E_commerce import checkout, sales
+from Hackerz_E_commerce.models import Cart, CartItem, Order, ProductSales
+
+
+def _units_sold(product):
+    return ProductSales.objects.filter(product=product).values_list('units_sold', flat=True).first() or 0
+
+
+@pytest.fixture
+def placed_order(product):
+    cart = Cart.objects.create(cart_id='tests-sales')
+    CartItem.objects.create(cart=cart, product=product, quantity=3)
+    order, _ = checkout.place_order(
+        cart, first_name='Ada', last_name='Lovelace', email='ada@example.com',
+        address='1 rue du Test', postal_code='75001', city='Paris',
+    )
+    return order
+
+
+def test_placed_order_counted_once(product, placed_order):
+    assert _units_sold(product) == 3
+    sales.record_order_placed(placed_order)
+    assert _units_sold(product) == 3
+
+
+def test_cancel_and_restore(product, placed_order):
+    placed_order.status = 'cancelled'
+    placed_order.save()
+    assert _units_sold(product) == 0
+    # Annuler de nouveau ne retire rien
+    sales.record_order_cancelled(placed_order)
+    assert _units_sold(product) == 0
+
+    placed_order.status = 'pending'
+    placed_order.save()
+    assert _units_sold(product) == 3
+
+
+def test_delete_counted_order(product, placed_order):
+    placed_order.delete()
+    assert _units_sold(product) == 0
+
+
+def test_uncounted_order_cancel_and_delete(product, make_order):
+    # Commande créée hors du passage de commande (admin, API) : jamais comptée
+    order = make_order(product, quantity=2)
+    order.status = 'cancelled'
+    order.save()
+    order.delete()
+    assert _units_sold(product) == 0
+
+
+def test_stale_instance_does_not_reset_recorded_flag(product, placed_order):
+    stale = Order.objects.get(pk=placed_order.pk)
+    stale.sales_recorded = False
+    stale.city = 'Lyon'
+    stale.save()
+    assert Order.objects.get(pk=placed_order.pk).sales_recorded
+
+
+def test_reconcile_counts_orders_created_outside_checkout(product, make_order):
+    order = make_order(product, quantity=2)
+    sales.reconcile()
+    order.refresh_from_db()
+    assert order.sales_recorded
+    assert _units_sold(product) == 2
+    # Comptée par la réconciliation : la suppression la retire
+    order.delete()
+    assert _units_sold(product) == 0
+
+
+def test_migration_backfill_matches_reconcile(product, make_order):
+    counted = make_order(product, quantity=2)
+    make_order(product, quantity=5, status='cancelled')
+    migration = importlib.import_module('Hackerz_E_commerce.migrations.0010_order_sales_recorded')
+    state = MigrationLoader(connection).project_state(('Hackerz_E_commerce', '0010_order_sales_recorded'))
+
+    migration.fill_sales_stats(state.apps, SimpleNamespace(connection=connection))
+
+    counted.refresh_from_db()
+    assert counted.sales_recorded
+    assert _units_sold(product) == 2
+    # Tables déjà alignées : la réconciliation ne corrige rien
+    assert sales.reconcile() == {'commandes': 0, 'produits': 0, 'vendeurs': 0, 'jours': 0}
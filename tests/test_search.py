@@ -0,0 +1,110 @@
+"""
+Recherche plein texte des produits (Hackerz_E_commerce/search.py).
+"""
+import functools
+
+import pytest
+from django.urls import reverse
+
+from Hackerz_E_commerce import search, views
+from Hackerz_E_commerce.models import Product
+
+
+@pytest.fixture
+def matching(product):
+    return [product] + [
+        Product.objects.create(
+            category=product.category, name=f'Clé USB zorglub {i}', slug=f'tests-zorglub-{i}',
+            description='Clé zorglub', regular_price='20.00', price='15.00', stock=5,
+        )
+        for i in range(3)
+    ]
+
+
+def test_filter_products_is_not_capped(matching):
+    assert len(search.search_product_ids('zorglub', limit=1)) == 1
+    found = search.filter_products(Product.objects.all(), 'zorglub')
+    assert set(found) == set(matching[1:])
+
+
+def test_listing_keeps_results_beyond_ranking_cap(rf, matching, monkeypatch):
+    monkeypatch.setattr(search, 'search_product_ids', functools.partial(search.search_product_ids, limit=1))
+    listing = views._product_listing(rf.get(reverse('shop:shop'), {'q': 'zorglub'}))
+    ranked = search.search_product_ids('zorglub')
+    assert list(listing)[0].pk == ranked[0]
+    assert set(listing) == set(matching[1:])
+
+
+def _product(category, slug, name, description=''):
+    return Product.objects.create(
+        category=category, name=name, slug=slug, description=description,
+        regular_price='20.00', price='15.00', stock=5,
+    )
+
+
+def test_name_matches_rank_before_description_matches(product):
+    in_description = _product(product.category, 'tests-bm25-description', 'Câble', 'Câble pour zorglub')
+    in_name = _product(product.category, 'tests-bm25-name', 'Zorglub', 'Adaptateur')
+    assert search.fts_available()
+    assert search.search_product_ids('zorglub') == [in_name.pk, in_description.pk]
+    # Préfixe et accents
+    assert search.search_product_ids('ZORG') == [in_name.pk, in_description.pk]
+    assert search.search_product_ids('cable zorglub') == [in_description.pk]
+
+
+def test_in_memory_backend(product, django_capture_on_commit_callbacks):
+    in_description = _product(product.category, 'tests-memory-description', 'Câble', 'Câble pour zorglub')
+    in_name = _product(product.category, 'tests-memory-name', 'Zorglub', 'Adaptateur')
+    backend = search.InMemoryBackend()
+    assert backend.search('zorglub') == [in_name.pk, in_description.pk]
+    assert backend.search('cable zorg') == [in_description.pk]
+    assert backend.search('zorglub', limit=1) == [in_name.pk]
+    assert set(backend.filter(Product.objects.all(), 'zorg')) == {in_name, in_description}
+
+    # Mises à jour incrémentales, appliquées à la validation de la transaction
+    in_name.name = 'Adaptateur'
+    with django_capture_on_commit_callbacks(execute=True):
+        backend.index([in_name])
+        backend.remove([in_description.pk])
+        assert backend.search('zorglub') == [in_name.pk, in_description.pk]
+    assert backend.search('zorglub') == []
+    assert backend.search('adaptateur') == [in_name.pk]
+
+
+def test_in_memory_backend_without_fts(product, monkeypatch):
+    monkeypatch.setattr(search, '_backends', {})
+    monkeypatch.setattr(search, 'fts_available', lambda using='default': False)
+    zorglub = _product(product.category, 'tests-memory-zorglub', 'Zorglub')
+    assert isinstance(search.get_backend(), search.InMemoryBackend)
+    assert search.search_product_ids('zorglub') == [zorglub.pk]
+
+
+def test_product_save_reindexes(product):
+    assert search.search_product_ids('zorglub') == []
+    product.name = 'Clé zorglub'
+    product.save()
+    assert search.search_product_ids('zorglub') == [product.pk]
+    # Changement sans effet sur l'index
+    product.stock = 3
+    product.save(update_fields=['stock'])
+    assert search.search_product_ids('zorglub') == [product.pk]
+    product.delete()
+    assert search.search_product_ids('zorglub') == []
+
+
+def test_category_rename_reindexes_its_products(product, monkeypatch):
+    category = product.category
+    category.name = 'Zorglub'
+    category.save()
+    assert search.search_product_ids('zorglub') == [product.pk]
+
+    reindexed = []
+    monkeypatch.setattr(search, 'reindex_category', lambda category, using='default': reindexed.append(category))
+    # Nom inchangé : pas de réindexation
+    category.description = 'Nouvelle description'
+    category.save()
+    category.save(update_fields=['description'])
+    assert reindexed == []
+    category.name = 'Clés'
+    category.save()
+    assert reindexed == [category]
@@ -0,0 +1,92 @@
+"""
+Invalidation du cache applicatif de la boutique (Hackerz/caching.py).
+"""
+import pytest
+from django.contrib.admin.sites import site
+from django.urls import reverse
+
+from Hackerz import caching
+from Hackerz_E_commerce import checkout, listing_cache
+from Hackerz_E_commerce.models import Cart, CartItem, Product, Review
+
+
+@pytest.fixture(autouse=True)
+def cleared(clear_cache):
+    yield
+
+
+def _versions():
+    return caching.get_version('shop'), caching.get_version('api')
+
+
+def _bumped(before):
+    return all(after > version for version, after in zip(before, _versions()))
+
+
+def test_review_moderation_invalidates_shop_and_api(product, user, django_capture_on_commit_callbacks):
+    review = Review.objects.create(product=product, user=user, title='Bien', comment='Bien', rating=4)
+    before = _versions()
+    with django_capture_on_commit_callbacks(execute=True):
+        site._registry[Review]._set_active(Review.objects.filter(pk=review.pk), False)
+    assert _bumped(before)
+
+
+def _checkout(product, quantity, capture):
+    cart = Cart.objects.create(cart_id=f'tests-cache-{quantity}')
+    CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    with capture(execute=True):
+        checkout.place_order(
+            cart, first_name='Ada', last_name='Lovelace', email='ada@example.com',
+            address='1 rue du Test', postal_code='75001', city='Paris',
+        )
+
+
+def test_checkout_invalidates_only_the_product_page(product, django_capture_on_commit_callbacks):
+    before, product_before = _versions(), listing_cache.product_version(product.slug)
+    _checkout(product, 1, django_capture_on_commit_callbacks)
+    assert _versions() == before
+    assert listing_cache.product_version(product.slug) > product_before
+
+
+def test_checkout_emptying_stock_invalidates_shop_and_api(product, django_capture_on_commit_callbacks):
+    before = _versions()
+    _checkout(product, product.stock, django_capture_on_commit_callbacks)
+    assert _bumped(before)
+
+
+def test_product_page_shows_stock_after_checkout(client, product, django_capture_on_commit_callbacks):
+    url = reverse('shop:product_detail', args=[product.slug])
+    assert 'max="10"' in client.get(url).content.decode()
+    _checkout(product, 3, django_capture_on_commit_callbacks)
+    assert 'max="7"' in client.get(url).content.decode()
+
+
+def test_unknown_product_is_not_cached(client, db):
+    response = client.get(reverse('shop:product_detail', args=['produit-inexistant']))
+    assert response.status_code == 404
+    assert caching.cache.get(caching.make_key('shop', 'product', 'produit-inexistant', listing_cache.product_version('produit-inexistant'))) is None
+
+
+def test_fragment_key_ignores_unrelated_parameters(rf):
+    key = listing_cache.fragment_key(rf.get('/shop/', {'q': 'usb', 'sort': 'newest', 'page': '2'}))
+    # Paramètres de suivi ou de cache-busting : même fragment
+    assert listing_cache.fragment_key(rf.get('/shop/', {'page': '2', 'utm_source': 'mail', 'sort': 'newest', 'q': 'usb', '_': '123'})) == key
+    for params in ({'q': 'clé', 'sort': 'newest', 'page': '2'}, {'q': 'usb', 'sort': 'rating', 'page': '2'},
+                   {'q': 'usb', 'sort': 'newest', 'page': '3'}, {'q': 'usb', 'sort': 'newest', 'cursor': 'abc'}):
+        assert listing_cache.fragment_key(rf.get('/shop/', params)) != key
+    assert listing_cache.fragment_key(rf.get('/shop/tests-category/', {'q': 'usb', 'sort': 'newest', 'page': '2'})) != key
+
+
+def test_cached_grid_links_keep_only_listing_parameters(client, product):
+    # Les gabarits de la boutique affichent l'image de chaque produit
+    Product.objects.filter(pk=product.pk).update(image='products/tests.png')
+    for i in range(4):
+        Product.objects.create(
+            category=product.category, name=f'Câble {i}', slug=f'tests-cable-{i}', regular_price='5.00', price='5.00',
+            image='products/tests.png',
+        )
+    url = reverse('shop:category_view', args=[product.category.slug])
+    content = client.get(url, {'sort': 'newest', 'utm_source': 'mail'}).content.decode()
+    # Le fragment en cache sert aussi les visiteurs sans ce paramètre
+    assert 'sort=newest&amp;page=2' in content
+    assert 'utm_source' not in content
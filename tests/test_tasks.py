@@ -0,0 +1,143 @@
+"""
+File de tâches locale (Hackerz/tasks.py) : réservation, nouvelles tentatives,
+tâches interrompues.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from Hackerz import tasks
+from Hackerz.models import BackgroundTask
+
+ECHO = 'tests.echo'
+FLAKY = 'tests.flaky'
+
+
+@pytest.fixture(autouse=True)
+def worker_mode(monkeypatch):
+    monkeypatch.setattr(tasks, 'MODE', 'worker')
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Enregistre les tâches de test ; retourne la liste de leurs appels."""
+    calls = []
+    monkeypatch.setattr(tasks, '_registry', dict(tasks._registry))
+
+    @tasks.task(ECHO)
+    def echo(value=None):
+        calls.append(value)
+        return {'value': value}
+
+    @tasks.task(FLAKY, max_attempts=3)
+    def flaky():
+        calls.append('flaky')
+        raise ValueError('service indisponible')
+
+    return calls
+
+
+def _due(background_task):
+    # Avance l'horloge jusqu'à la prochaine tentative
+    BackgroundTask.objects.filter(pk=background_task.pk).update(run_after=timezone.now())
+
+
+def test_task_is_claimed_once(db, calls):
+    background_task = tasks.enqueue(ECHO, {'value': 42})
+    assert tasks.run_task(background_task.pk) == 'done'
+    # Second exécutant (thread, process_tasks) : la tâche n'est plus en attente
+    assert tasks.run_task(background_task.pk) is None
+    assert calls == [42]
+    background_task.refresh_from_db()
+    assert (background_task.status, background_task.attempts, background_task.result) == ('done', 1, {'value': 42})
+
+
+def test_concurrent_claims(db, calls):
+    background_task = tasks.enqueue(ECHO)
+    assert tasks._claim(background_task.pk)
+    assert not tasks._claim(background_task.pk)
+    assert tasks.run_task(background_task.pk) is None
+    assert calls == []
+
+
+def test_delayed_task_is_not_claimed_early(db, calls):
+    background_task = tasks.enqueue(ECHO, delay=60)
+    assert tasks.run_task(background_task.pk) is None
+    assert tasks.run_pending() == 0
+    _due(background_task)
+    assert tasks.run_pending() == 1
+    assert calls == [None]
+
+
+def test_failed_task_is_retried_with_backoff(db, calls):
+    background_task = tasks.enqueue(FLAKY)
+    before = timezone.now()
+    assert tasks.run_task(background_task.pk) == 'pending'
+    background_task.refresh_from_db()
+    assert background_task.attempts == 1
+    assert background_task.locked_at is None
+    assert 'ValueError: service indisponible' in background_task.last_error
+    assert background_task.run_after >= before + timedelta(seconds=tasks.RETRY_DELAY)
+    # Pas encore due
+    assert tasks.run_task(background_task.pk) is None
+
+    _due(background_task)
+    before = timezone.now()
+    assert tasks.run_task(background_task.pk) == 'pending'
+    background_task.refresh_from_db()
+    # Délai doublé à chaque échec
+    assert background_task.run_after >= before + timedelta(seconds=tasks.RETRY_DELAY * 2)
+    assert background_task.run_after < before + timedelta(seconds=tasks.RETRY_DELAY * 4)
+
+
+def test_retry_delay_doubles():
+    assert [tasks.retry_delay(attempts) for attempts in (1, 2, 3)] == [
+        tasks.RETRY_DELAY, tasks.RETRY_DELAY * 2, tasks.RETRY_DELAY * 4,
+    ]
+
+
+def test_task_fails_after_max_attempts(db, calls):
+    background_task = tasks.enqueue(FLAKY)
+    for _ in range(2):
+        assert tasks.run_task(background_task.pk) == 'pending'
+        _due(background_task)
+    assert tasks.run_task(background_task.pk) == 'failed'
+    assert tasks.run_task(background_task.pk) is None
+    assert calls == ['flaky'] * 3
+    assert tasks.latest_status('', FLAKY)['status'] == 'failed'
+
+
+def test_unknown_task_fails_without_retry(db, calls):
+    background_task = BackgroundTask.objects.create(name='tests.inconnue', payload={})
+    assert tasks.run_task(background_task.pk) == 'failed'
+    background_task.refresh_from_db()
+    assert 'UnknownTask' in background_task.last_error
+
+
+def test_stale_task_is_requeued(db, calls):
+    now = timezone.now()
+    stale = tasks.enqueue(ECHO, {'value': 'interrompue'})
+    running = tasks.enqueue(ECHO, {'value': 'en cours'})
+    BackgroundTask.objects.filter(pk=stale.pk).update(
+        status='running', locked_at=now - timedelta(seconds=tasks.STALE_AFTER + 1), attempts=1,
+    )
+    BackgroundTask.objects.filter(pk=running.pk).update(status='running', locked_at=now, attempts=1)
+
+    # Seule la tâche dont l'exécutant a été interrompu est reprise
+    assert tasks.run_pending() == 1
+    assert calls == ['interrompue']
+    assert BackgroundTask.objects.get(pk=running.pk).status == 'running'
+    stale.refresh_from_db()
+    assert (stale.status, stale.attempts) == ('done', 2)
+
+
+def test_eager_mode_runs_due_tasks_only(db, calls, monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(tasks, 'MODE', 'eager')
+    with django_capture_on_commit_callbacks(execute=True):
+        now = tasks.enqueue(ECHO, {'value': 'maintenant'})
+        later = tasks.enqueue(ECHO, {'value': 'plus tard'}, delay=60)
+    assert calls == ['maintenant']
+    assert tasks.latest_status('', ECHO)['status'] == 'pending'
+    assert BackgroundTask.objects.get(pk=now.pk).status == 'done'
+    assert BackgroundTask.objects.get(pk=later.pk).status == 'pending'
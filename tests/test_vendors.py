@@ -0,0 +1,82 @@
+"""
+Approbation et rejet des vendeurs par lots (Hackerz/vendors.py).
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from Hackerz import roles, tasks, vendors
+from Hackerz.models import BackgroundTask, OutboundEmail, Vendor
+
+
+@pytest.fixture(autouse=True)
+def worker_mode(monkeypatch, clear_cache):
+    monkeypatch.setattr(tasks, 'MODE', 'worker')
+    roles.clear()
+    yield
+    roles.clear()
+
+
+@pytest.fixture
+def make_vendors(db):
+    def make(count, prefix='vendeur'):
+        created = []
+        for i in range(count):
+            user = User.objects.create_user(f'{prefix}-{i}', f'{prefix}{i}@example.com', 'motdepasse')
+            created.append(Vendor.objects.create(profile=user.profile, shop_name=f'Boutique {prefix} {i}'))
+        return created
+    return make
+
+
+def _vendor_users(vendor_list):
+    return User.objects.filter(profile__vendor__in=vendor_list)
+
+
+def test_bulk_approval_grants_vendor_role(make_vendors):
+    pending = make_vendors(3)
+    # Déjà dans le groupe : l'insertion groupée ignore le doublon
+    _vendor_users(pending[:1]).get().groups.add(roles.group_id(roles.VENDOR_GROUP))
+
+    assert vendors.approve(Vendor.objects.filter(pk__in=[v.pk for v in pending]), 'http://testserver') == 3
+
+    assert Vendor.objects.filter(pk__in=[v.pk for v in pending], is_approved=True).count() == 3
+    users = _vendor_users(pending)
+    assert users.filter(groups__name=roles.VENDOR_GROUP).count() == 3
+    assert users.filter(profile__is_vendor=True).count() == 3
+    task = BackgroundTask.objects.get(name=vendors.NOTIFY_DECISION)
+    assert sorted(task.payload['vendor_ids']) == sorted(v.pk for v in pending)
+    assert task.payload['decision'] == 'approved'
+
+
+def test_approval_query_count_does_not_depend_on_vendor_count(make_vendors, django_assert_num_queries):
+    few, many = make_vendors(2, 'petit'), make_vendors(6, 'grand')
+    # Groupes des rôles créés et mémorisés
+    roles.group_ids()
+    roles.group_ids()
+
+    with CaptureQueriesContext(connection) as few_queries:
+        vendors.approve(Vendor.objects.filter(pk__in=[v.pk for v in few]), 'http://testserver')
+    with django_assert_num_queries(len(few_queries)):
+        vendors.approve(Vendor.objects.filter(pk__in=[v.pk for v in many]), 'http://testserver')
+
+
+def test_only_changed_vendors_are_notified(make_vendors):
+    [vendor] = make_vendors(1)
+    queryset = Vendor.objects.filter(pk=vendor.pk)
+    assert vendors.approve(queryset, 'http://testserver') == 1
+    assert vendors.approve(queryset, 'http://testserver') == 0
+    assert BackgroundTask.objects.filter(name=vendors.NOTIFY_DECISION).count() == 1
+
+    assert vendors.reject(queryset, 'http://testserver') == 1
+    vendor.refresh_from_db()
+    assert not vendor.is_approved
+    assert BackgroundTask.objects.filter(name=vendors.NOTIFY_DECISION).count() == 2
+
+
+def test_notify_decision_queues_one_email_per_vendor(make_vendors):
+    pending = make_vendors(2)
+    result = vendors.notify_decision([v.pk for v in pending], 'approved', 'http://testserver')
+    assert result == {'notified': 2}
+    references = set(OutboundEmail.objects.filter(reference__startswith='vendor:').values_list('reference', flat=True))
+    assert references == {f'vendor:{v.pk}' for v in pending}
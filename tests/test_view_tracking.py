@@ -0,0 +1,45 @@
+"""
+Enregistrement différé des lectures d'articles (Hackerz_blog/view_tracking.py).
+"""
+import pytest
+from django.contrib.auth.models import User
+
+from Hackerz_blog import view_tracking
+from Hackerz_blog.models import Post, PostView
+
+
+@pytest.fixture(autouse=True)
+def buffered(db, settings):
+    # Lectures gardées en mémoire jusqu'au vidage explicite
+    settings.POST_VIEWS_FLUSH_INTERVAL = 3600
+    view_tracking.flush()
+    yield
+    view_tracking.flush()
+
+
+def test_flush_writes_views(make_post, user):
+    post = make_post()
+    view_tracking.record_view(post, user)
+    view_tracking.record_view(post)
+    assert view_tracking.flush() == 2
+    assert Post.objects.get(pk=post.pk).views_count == 2
+    assert PostView.objects.filter(post=post, user=user).count() == 1
+
+
+def test_flush_drops_views_of_deleted_post_and_user(make_post, user):
+    kept = make_post('Article conservé')
+    deleted = make_post('Article supprimé')
+    reader = User.objects.create_user('lecteur-supprime', 'supprime@example.com', 'motdepasse')
+    view_tracking.record_view(kept, user)
+    view_tracking.record_view(kept, reader)
+    view_tracking.record_view(deleted, user)
+    deleted.delete()
+    reader.delete()
+
+    assert view_tracking.flush() == 2
+    assert Post.objects.get(pk=kept.pk).views_count == 2
+    assert list(PostView.objects.filter(post=kept).values_list('user_id', flat=True)) == [user.pk]
+    # Rien n'est remis dans le tampon : les vidages suivants ne sont pas bloqués
+    assert view_tracking.pending() == 0
+    view_tracking.record_view(kept)
+    assert view_tracking.flush() == 1